@@ -0,0 +1,272 @@
+"""
+Atividade de login por usuário (perfil, detalhes do usuário e admin).
+
+UserLoginDay consolida, por usuário e dia, a quantidade de logins, os IPs
+distintos e o último user agent. A consolidação é atualizada a cada
+gravação do histórico (sinal post_save de LoginHistory e gravação em lote
+em accounts.audit): as páginas leem só as linhas do período exibido, nunca
+o histórico completo, que pode ser arquivado (prune_login_history) sem
+alterar os totais.
+
+get_login_activity() monta os gráficos (logins por dia e por semana, IPs
+distintos) e os guarda no cache por usuário (LOGIN_ACTIVITY_CACHE_TIMEOUT),
+invalidado quando novos logins do usuário são consolidados.
+manage.py rebuild_dashboard_stats também recalcula esta consolidação.
+"""
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Window
+from django.db.models.functions import RowNumber, TruncDate
+from django.utils import timezone
+
+ACTIVITY_CACHE_PREFIX = 'accounts:login-activity'
+
+# Dias do gráfico diário e semanas do gráfico semanal
+ACTIVITY_DAYS = 30
+ACTIVITY_WEEKS = 12
+
+UPDATE_FIELDS = ('logins', 'ip_addresses', 'distinct_ips', 'last_login_time', 'last_user_agent')
+
+
+def _merge(row, entries):
+    """Soma os logins (ip_address, user_agent, login_time) à linha do dia"""
+    ips = list(row.ip_addresses)
+    for ip_address, user_agent, login_time in entries:
+        row.logins += 1
+        if ip_address and ip_address not in ips:
+            ips.append(ip_address)
+        if row.last_login_time is None or login_time >= row.last_login_time:
+            row.last_login_time = login_time
+            row.last_user_agent = user_agent
+    row.ip_addresses = ips
+    row.distinct_ips = len(ips)
+
+
+def _group(entries):
+    groups = {}
+    for user_id, ip_address, user_agent, login_time in entries:
+        key = (user_id, timezone.localdate(login_time))
+        groups.setdefault(key, []).append((ip_address, user_agent, login_time))
+    return groups
+
+
+def _apply(groups):
+    from .models import UserLoginDay
+
+    existing = {
+        (row.user_id, row.date): row
+        for row in UserLoginDay.objects.select_for_update().filter(
+            user_id__in={user_id for user_id, _ in groups},
+            date__in={date for _, date in groups},
+        )
+    }
+    created, updated = [], []
+    for (user_id, date), entries in groups.items():
+        row = existing.get((user_id, date))
+        if row is None:
+            row = UserLoginDay(user_id=user_id, date=date, ip_addresses=[])
+            created.append(row)
+        else:
+            updated.append(row)
+        _merge(row, entries)
+    UserLoginDay.objects.bulk_update(updated, UPDATE_FIELDS)
+    UserLoginDay.objects.bulk_create(created)
+
+
+def add_user_logins(entries):
+    """Soma os logins informados (LoginHistory) à consolidação por usuário"""
+    groups = _group(
+        (entry.user_id, entry.ip_address, entry.user_agent, entry.login_time)
+        for entry in entries
+    )
+    if not groups:
+        return
+    try:
+        with transaction.atomic():
+            _apply(groups)
+    except IntegrityError:
+        # Linha do dia criada por outra gravação entre a leitura e o INSERT
+        with transaction.atomic():
+            _apply(groups)
+    invalidate_login_activity({user_id for user_id, _ in groups})
+
+
+def _history_days(start):
+    """Linhas de UserLoginDay agregadas no banco a partir do histórico"""
+    from .models import LoginHistory, UserLoginDay
+
+    history = (
+        LoginHistory.objects.filter(login_time__gte=start)
+        .annotate(date=TruncDate('login_time'))
+        .order_by()
+    )
+    rows = {
+        (user_id, date): UserLoginDay(
+            user_id=user_id, date=date, logins=logins,
+            last_login_time=last_login_time, ip_addresses=[],
+        )
+        for user_id, date, logins, last_login_time in history.values_list(
+            'user_id', 'date'
+        ).annotate(Count('pk'), Max('login_time'))
+    }
+    # IPs na ordem do primeiro login, como na consolidação incremental
+    ips = (
+        history.exclude(ip_address=None)
+        .values_list('user_id', 'date', 'ip_address')
+        .annotate(first_login=Min('login_time'))
+        .order_by('first_login')
+    )
+    for user_id, date, ip_address, _ in ips:
+        if ip_address and (user_id, date) in rows:
+            rows[user_id, date].ip_addresses.append(ip_address)
+    latest = history.annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=[F('user_id'), F('date')],
+            order_by=[F('login_time').desc(), F('pk').desc()],
+        )
+    ).filter(position=1).values_list('user_id', 'date', 'user_agent')
+    for user_id, date, user_agent in latest:
+        if (user_id, date) in rows:
+            rows[user_id, date].last_user_agent = user_agent
+    for row in rows.values():
+        row.distinct_ips = len(row.ip_addresses)
+    return rows
+
+
+def _rebuild(since, start):
+    from .models import UserLoginDay
+
+    # As linhas do período ficam travadas antes da leitura do histórico:
+    # logins gravados depois (histórico e consolidação na mesma transação)
+    # esperam o fim do recálculo e somam sobre ele
+    existing = {
+        (row.user_id, row.date): row
+        for row in UserLoginDay.objects.select_for_update().filter(date__gte=since)
+    }
+    rows = _history_days(start)
+    created, updated = [], []
+    for key, row in rows.items():
+        current = existing.pop(key, None)
+        if current is None:
+            created.append(row)
+        else:
+            row.pk = current.pk
+            updated.append(row)
+    UserLoginDay.objects.bulk_update(updated, UPDATE_FIELDS, batch_size=1000)
+    UserLoginDay.objects.bulk_create(created, batch_size=1000)
+    # Dias sem histórico no período
+    UserLoginDay.objects.filter(pk__in=[row.pk for row in existing.values()]).delete()
+    return {user_id for user_id, _ in rows} | {user_id for user_id, _ in existing}, len(rows)
+
+
+def rebuild_user_logins(days):
+    """Recalcula a consolidação por usuário dos últimos `days` dias"""
+    since = timezone.localdate() - datetime.timedelta(days=days - 1)
+    start = timezone.make_aware(datetime.datetime.combine(since, datetime.time.min))
+    try:
+        with transaction.atomic():
+            user_ids, count = _rebuild(since, start)
+    except IntegrityError:
+        # Linha do dia criada por um login concorrente: refaz com ela travada
+        with transaction.atomic():
+            user_ids, count = _rebuild(since, start)
+    invalidate_login_activity(user_ids)
+    return count
+
+
+def activity_key(user_id):
+    # A data na chave renova os gráficos na virada do dia
+    return f'{ACTIVITY_CACHE_PREFIX}:{user_id}:{timezone.localdate():%Y%m%d}'
+
+
+def invalidate_login_activity(user_ids):
+    cache.delete_many([activity_key(user_id) for user_id in user_ids])
+
+
+def _activity_query(user_id):
+    from .models import UserLoginDay
+
+    today = timezone.localdate()
+    week_start = today - datetime.timedelta(days=today.weekday())
+    since = min(
+        week_start - datetime.timedelta(weeks=ACTIVITY_WEEKS - 1),
+        today - datetime.timedelta(days=ACTIVITY_DAYS - 1),
+    )
+    return UserLoginDay.objects.filter(user_id=user_id, date__gte=since).order_by('date')
+
+
+def _series(points):
+    peak = max((point['logins'] for point in points), default=0) or 1
+    for point in points:
+        point['percent'] = round(point['logins'] * 100 / peak)
+    return points
+
+
+def _build_activity(rows):
+    """Gráficos e totais a partir das linhas de UserLoginDay (em ordem de data)"""
+    today = timezone.localdate()
+    per_day = {row.date: row for row in rows}
+
+    days = [today - datetime.timedelta(days=offset) for offset in range(ACTIVITY_DAYS - 1, -1, -1)]
+    daily = _series([
+        {
+            'date': day,
+            'logins': per_day[day].logins if day in per_day else 0,
+            'distinct_ips': per_day[day].distinct_ips if day in per_day else 0,
+        }
+        for day in days
+    ])
+
+    week_start = today - datetime.timedelta(days=today.weekday())
+    weekly = []
+    for offset in range(ACTIVITY_WEEKS - 1, -1, -1):
+        start = week_start - datetime.timedelta(weeks=offset)
+        week = [
+            per_day[day]
+            for day in (start + datetime.timedelta(days=i) for i in range(7))
+            if day in per_day
+        ]
+        weekly.append({
+            'date': start,
+            'logins': sum(row.logins for row in week),
+            'distinct_ips': len({ip for row in week for ip in row.ip_addresses}),
+        })
+
+    period = [per_day[day] for day in days if day in per_day]
+    ips = {ip for row in period for ip in row.ip_addresses}
+    last = rows[-1] if rows else None
+    return {
+        'days': ACTIVITY_DAYS,
+        'logins': sum(row.logins for row in period),
+        'active_days': len(period),
+        'distinct_ips': len(ips),
+        'ip_addresses': sorted(ips),
+        'last_login_time': last.last_login_time if last else None,
+        'last_user_agent': last.last_user_agent if last else '',
+        'daily': daily,
+        'weekly': _series(weekly),
+    }
+
+
+def get_login_activity(user_id):
+    """Atividade de login do usuário, lida do cache ou da consolidação"""
+    key = activity_key(user_id)
+    activity = cache.get(key)
+    if activity is None:
+        activity = _build_activity(list(_activity_query(user_id)))
+        cache.set(key, activity, getattr(settings, 'LOGIN_ACTIVITY_CACHE_TIMEOUT', 300))
+    return activity
+
+
+async def aget_login_activity(user_id):
+    """get_login_activity para as views assíncronas"""
+    key = activity_key(user_id)
+    activity = await cache.aget(key)
+    if activity is None:
+        activity = _build_activity([row async for row in _activity_query(user_id)])
+        await cache.aset(key, activity, getattr(settings, 'LOGIN_ACTIVITY_CACHE_TIMEOUT', 300))
+    return activity
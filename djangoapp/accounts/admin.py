@@ -1,7 +1,31 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
-from .models import UserProfile, LoginHistory
+from django.template.loader import render_to_string
+from .activity import get_login_activity
+from .exports import export_login_history, export_users
+from .models import UserProfile, LoginHistory, LoginLockout, Notification, UserLoginDay
+from .pagination import ApproximateCountPaginator
+
+
+@admin.action(description='Exportar selecionados (CSV)')
+def export_users_csv(modeladmin, request, queryset):
+    return export_users(queryset.order_by('username', 'pk'), 'csv')
+
+
+@admin.action(description='Exportar selecionados (XLSX)')
+def export_users_xlsx(modeladmin, request, queryset):
+    return export_users(queryset.order_by('username', 'pk'), 'xlsx')
+
+
+@admin.action(description='Exportar selecionados (CSV)')
+def export_logins_csv(modeladmin, request, queryset):
+    return export_login_history(queryset.order_by('-login_time', '-pk'), 'csv')
+
+
+@admin.action(description='Exportar selecionados (XLSX)')
+def export_logins_xlsx(modeladmin, request, queryset):
+    return export_login_history(queryset.order_by('-login_time', '-pk'), 'xlsx')
 
 
 class UserProfileInline(admin.StackedInline):
@@ -15,11 +39,23 @@ class UserAdmin(BaseUserAdmin):
     inlines = (UserProfileInline,)
     list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff', 'get_role')
     list_select_related = ('profile',)
+    actions = (export_users_csv, export_users_xlsx)
+    fieldsets = BaseUserAdmin.fieldsets + (
+        ('Atividade de login', {'fields': ('login_activity',)}),
+    )
+    readonly_fields = ('login_activity',)
     
     def get_role(self, instance):
         return instance.profile.get_role_display()
     get_role.short_description = 'Função'
     
+    @admin.display(description='Gráficos')
+    def login_activity(self, instance):
+        # Lido da consolidação por dia (UserLoginDay), não do histórico
+        return render_to_string(
+            'admin/accounts/login_activity.html', {'activity': get_login_activity(instance.pk)}
+        )
+    
     def get_inline_instances(self, request, obj=None):
         if not obj:
             return list()
@@ -37,9 +73,14 @@ class UserProfileAdmin(admin.ModelAdmin):
 @admin.register(LoginHistory)
 class LoginHistoryAdmin(admin.ModelAdmin):
     list_display = ('user', 'login_time', 'ip_address')
+    list_select_related = ('user',)
     list_filter = ('login_time',)
+    # Total aproximado (pg_class.reltuples) em vez de COUNT(*) na tabela toda
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
     search_fields = ('user__username', 'ip_address')
     readonly_fields = ('user', 'login_time', 'ip_address', 'user_agent')
+    actions = (export_logins_csv, export_logins_xlsx)
     
     def has_add_permission(self, request):
         return False
@@ -48,6 +89,48 @@ class LoginHistoryAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(LoginLockout)
+class LoginLockoutAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'scope', 'username', 'ip_address', 'attempts', 'locked_until')
+    list_select_related = ('user',)
+    list_filter = ('scope', 'created_at')
+    search_fields = ('username', 'ip_address')
+    readonly_fields = ('scope', 'username', 'user', 'ip_address', 'attempts', 'created_at', 'locked_until')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(UserLoginDay)
+class UserLoginDayAdmin(admin.ModelAdmin):
+    list_display = ('date', 'user', 'logins', 'distinct_ips', 'last_login_time')
+    list_select_related = ('user',)
+    list_filter = ('date',)
+    date_hierarchy = 'date'
+    search_fields = ('user__username',)
+    readonly_fields = (
+        'user', 'date', 'logins', 'ip_addresses', 'distinct_ips', 'last_login_time', 'last_user_agent',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # Re-registrar UserAdmin
 admin.site.unregister(User)
 admin.site.register(User, UserAdmin)
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('title', 'recipient', 'level', 'created_at', 'read_at')
+    list_filter = ('level', 'created_at')
+    search_fields = ('title', 'recipient__username')
+    list_select_related = ('recipient',)
+    raw_id_fields = ('recipient',)
@@ -5,4 +5,7 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
     verbose_name = 'Gerenciamento de Contas'
+
+    def ready(self):
+        from . import checks  # noqa: F401
     
\ No newline at end of file
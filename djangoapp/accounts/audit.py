@@ -0,0 +1,207 @@
+"""
+Gravação em lote do histórico de logins.
+
+Os eventos de login são enfileirados em memória e gravados com bulk_create
+por uma thread em segundo plano, quando o lote atinge LOGIN_AUDIT_BATCH_SIZE
+ou a cada LOGIN_AUDIT_FLUSH_INTERVAL segundos, para que o INSERT não faça
+parte do tempo de resposta do login. A fila é descarregada no encerramento
+do processo. Com LOGIN_AUDIT_ASYNC = False a gravação é síncrona.
+
+Registros não são descartados por uma falha transitória do banco (conexão
+perdida, lock timeout): o lote volta ao início da fila e a gravação é
+tentada de novo com espera crescente, até max_attempts vezes. Se o lote
+falhar por outro motivo (uma linha inválida), os registros são gravados um
+a um e só os que falham são descartados.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections, transaction
+from django.utils import timezone
+
+from .activity import add_user_logins
+from .dashboard import add_logins
+from .models import LoginHistory
+
+logger = logging.getLogger(__name__)
+
+
+class LoginAuditWriter:
+    """
+    Fila de eventos de login com gravação em lote em uma thread dedicada
+    """
+
+    def __init__(self, batch_size=100, flush_interval=2.0, max_attempts=8, max_backoff=60.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self._pending = []
+        self._failures = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def enqueue(self, entry):
+        """Enfileira um LoginHistory (ainda não salvo) para gravação"""
+        self._ensure_thread()
+        with self._lock:
+            self._pending.append(entry)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """Grava imediatamente todos os eventos pendentes"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                # bulk_create não envia post_save: consolida os logins aqui
+                with transaction.atomic():
+                    LoginHistory.objects.bulk_create(batch, batch_size=self.batch_size)
+                    add_logins(entry.login_time for entry in batch)
+                    add_user_logins(batch)
+            except (OperationalError, InterfaceError):
+                logger.warning('Falha ao gravar %d registros de login', len(batch), exc_info=True)
+                self._requeue(batch)
+                return 0
+            except Exception:
+                logger.exception('Falha ao gravar o lote de %d registros de login', len(batch))
+                return self._save_each(batch)
+            self._failures = 0
+            return len(batch)
+
+    def _save_each(self, batch):
+        """Grava um a um (com os sinais); descarta só os registros inválidos"""
+        saved = 0
+        for index, entry in enumerate(batch):
+            try:
+                with transaction.atomic():
+                    entry.save()
+            except (OperationalError, InterfaceError):
+                logger.warning('Falha ao gravar registro de login', exc_info=True)
+                self._requeue(batch[index:])
+                return saved
+            except Exception:
+                logger.exception(
+                    'Registro de login descartado (usuário %s, %s)', entry.user_id, entry.login_time
+                )
+            else:
+                saved += 1
+        self._failures = 0
+        return saved
+
+    def _requeue(self, batch):
+        """Devolve o lote ao início da fila e adia a próxima gravação"""
+        retry = []
+        for entry in batch:
+            entry._audit_attempts = getattr(entry, '_audit_attempts', 0) + 1
+            if entry._audit_attempts < self.max_attempts:
+                retry.append(entry)
+        if len(retry) < len(batch):
+            logger.error(
+                '%d registros de login descartados após %d tentativas',
+                len(batch) - len(retry), self.max_attempts,
+            )
+        with self._lock:
+            self._pending[:0] = retry
+        self._failures += 1
+        self._retry_at = time.monotonic() + min(
+            self.flush_interval * 2 ** self._failures, self.max_backoff
+        )
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _ensure_thread(self):
+        # Após um fork (ex.: workers do servidor) a thread não existe no filho
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name='login-audit-writer', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if time.monotonic() < self._retry_at:
+                continue
+            # Descarta a conexão que falhou na tentativa anterior
+            close_old_connections()
+            self.flush()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Retorna o LoginAuditWriter do processo"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = LoginAuditWriter(
+                    batch_size=getattr(settings, 'LOGIN_AUDIT_BATCH_SIZE', 100),
+                    flush_interval=getattr(settings, 'LOGIN_AUDIT_FLUSH_INTERVAL', 2.0),
+                )
+                atexit.register(_writer.flush)
+    return _writer
+
+
+def _login_entry(user, ip_address, user_agent):
+    return LoginHistory(
+        user=user,
+        login_time=timezone.now(),
+        ip_address=ip_address,
+        user_agent=user_agent,
+    )
+
+
+def _save_entry(entry):
+    # Histórico e consolidações (sinal post_save) na mesma transação, como
+    # na gravação em lote (ver activity.rebuild_user_logins)
+    with transaction.atomic():
+        entry.save()
+
+
+def record_login(user, ip_address=None, user_agent=''):
+    """
+    Registra um login no histórico, em lote ou de forma síncrona conforme
+    LOGIN_AUDIT_ASYNC
+    """
+    entry = _login_entry(user, ip_address, user_agent)
+    if not getattr(settings, 'LOGIN_AUDIT_ASYNC', False):
+        _save_entry(entry)
+        return entry
+    get_writer().enqueue(entry)
+    return entry
+
+
+async def arecord_login(user, ip_address=None, user_agent=''):
+    """record_login para as views assíncronas"""
+    entry = _login_entry(user, ip_address, user_agent)
+    if not getattr(settings, 'LOGIN_AUDIT_ASYNC', False):
+        await sync_to_async(_save_entry)(entry)
+        return entry
+    # Apenas memória: não bloqueia o event loop
+    get_writer().enqueue(entry)
+    return entry
@@ -0,0 +1,165 @@
+"""
+Processamento dos avatares dos usuários.
+
+Quando o avatar de um perfil muda, a imagem é decodificada e redimensionada
+em um pool de threads, fora da requisição, gerando miniaturas em vários
+tamanhos (AVATAR_SIZES) com nomes baseados no hash do conteúdo. Como o nome
+muda sempre que a imagem muda, as miniaturas podem ser servidas com cache de
+longa duração.
+
+Sem avatar, initials_avatar gera um SVG com as iniciais, embutido na
+página (data URI), sem depender de serviços externos.
+"""
+import functools
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from html import escape
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+AVATAR_SIZES = {'small': 32, 'medium': 64, 'large': 300}
+THUMBNAIL_DIR = 'avatars/thumbs'
+
+# Avatar de iniciais (cores da identidade visual)
+INITIALS_BACKGROUND = '#4f46e5'
+INITIALS_COLOR = '#fff'
+INITIALS_SIZE = 64
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_sizes():
+    return getattr(settings, 'AVATAR_SIZES', AVATAR_SIZES)
+
+
+def get_format():
+    """Retorna (formato PIL, extensão) das miniaturas"""
+    if getattr(settings, 'AVATAR_FORMAT', 'WEBP') == 'WEBP' and features.check('webp'):
+        return 'WEBP', 'webp'
+    return 'JPEG', 'jpg'
+
+
+def thumbnail_name(content_hash, size):
+    _, extension = get_format()
+    return f'{THUMBNAIL_DIR}/{content_hash[:2]}/{content_hash}_{size}.{extension}'
+
+
+def thumbnail_url(content_hash, size):
+    return default_storage.url(thumbnail_name(content_hash, size))
+
+
+def generate_thumbnails(data):
+    """
+    Gera as miniaturas da imagem (bytes) e retorna o hash do conteúdo.
+    Miniaturas já existentes para o mesmo conteúdo não são regeradas.
+    """
+    content_hash = hashlib.sha256(data).hexdigest()[:32]
+    image_format, _ = get_format()
+    image = None
+    for size in sorted(set(get_sizes().values()), reverse=True):
+        name = thumbnail_name(content_hash, size)
+        if default_storage.exists(name):
+            continue
+        if image is None:
+            image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+            image = image.convert('RGB')
+        # Recorte central quadrado no tamanho desejado
+        thumb = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        thumb.save(buffer, image_format, quality=85)
+        default_storage.save(name, ContentFile(buffer.getvalue()))
+    return content_hash
+
+
+def process_avatar(profile_id):
+    """Gera as miniaturas do avatar atual do perfil e grava o hash"""
+    from .backends import invalidate_cached_user
+    from .layout import bump_layout_version
+    from .models import UserProfile
+
+    try:
+        profile = UserProfile.objects.only('user_id', 'avatar').get(pk=profile_id)
+        if not profile.avatar:
+            return None
+        with profile.avatar.open('rb') as avatar:
+            data = avatar.read()
+        content_hash = generate_thumbnails(data)
+        # update() não dispara save()/sinais e só altera o hash se o avatar
+        # não tiver mudado enquanto a imagem era processada
+        updated = UserProfile.objects.filter(
+            pk=profile_id, avatar=profile.avatar.name
+        ).update(avatar_hash=content_hash)
+        if updated:
+            # Sem sinais: o usuário em cache e o cabeçalho ainda têm o hash antigo
+            invalidate_cached_user(profile.user_id)
+            bump_layout_version(profile.user_id)
+        return content_hash
+    except Exception:
+        logger.exception('Falha ao processar o avatar do perfil %s', profile_id)
+        return None
+
+
+def _process_in_worker(profile_id):
+    close_old_connections()
+    try:
+        return process_avatar(profile_id)
+    finally:
+        close_old_connections()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'AVATAR_WORKERS', 2),
+                    thread_name_prefix='avatar',
+                )
+    return _executor
+
+
+def schedule_avatar_processing(profile_id):
+    """
+    Agenda o processamento do avatar após o commit da transação atual,
+    em segundo plano ou de forma síncrona conforme AVATAR_PROCESSING_ASYNC
+    """
+    if not getattr(settings, 'AVATAR_PROCESSING_ASYNC', True):
+        process_avatar(profile_id)
+        return
+    transaction.on_commit(lambda: get_executor().submit(_process_in_worker, profile_id))
+
+
+def initials(name):
+    """Até duas iniciais: primeira e última palavra do nome"""
+    words = name.split()
+    if not words:
+        return '?'
+    if len(words) == 1:
+        return words[0][:2].upper()
+    return (words[0][0] + words[-1][0]).upper()
+
+
+@functools.lru_cache(maxsize=1024)
+def initials_avatar(name, size=INITIALS_SIZE):
+    """data URI de um SVG com as iniciais de name"""
+    svg = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+        f'viewBox="0 0 {size} {size}">'
+        f'<rect width="100%" height="100%" fill="{INITIALS_BACKGROUND}"/>'
+        f'<text x="50%" y="50%" dy=".35em" fill="{INITIALS_COLOR}" text-anchor="middle" '
+        f'font-family="Inter, sans-serif" font-size="{size * 0.4:g}">{escape(initials(name))}</text>'
+        '</svg>'
+    )
+    return 'data:image/svg+xml,' + quote(svg, safe='=:/,.()')
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+
+USER_CACHE_PREFIX = 'accounts:user'
+
+
+def _user_key(user_id):
+    return f'{USER_CACHE_PREFIX}:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    """Remove o usuário (e perfil) do cache de autenticação"""
+    cache.delete(_user_key(user_id))
+
+
+class ProfileModelBackend(ModelBackend):
+    """
+    ModelBackend que carrega o usuário da sessão junto com o perfil em uma
+    única consulta (select_related), evitando a consulta extra ao perfil em
+    toda página (cabeçalho, menu do usuário). O resultado pode ser guardado
+    no cache por USER_CACHE_TIMEOUT segundos; o cache é invalidado quando o
+    usuário ou o perfil são salvos.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username, password, **kwargs)
+        if user is None and password is not None:
+            # Encerra a autenticação: o ModelBackend listado em seguida (só
+            # para sessões antigas) calcularia o hash da senha de novo
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        timeout = getattr(settings, 'USER_CACHE_TIMEOUT', 0)
+        if timeout:
+            user = cache.get(_user_key(user_id))
+            if user is not None:
+                return user if self.user_can_authenticate(user) else None
+
+        try:
+            user = User.objects.select_related('profile').get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+
+        if timeout:
+            cache.set(_user_key(user_id), user, timeout)
+        return user if self.user_can_authenticate(user) else None
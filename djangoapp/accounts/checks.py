@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends com incr atômico e sem descarte de chaves antes do maxmemory
+THROTTLE_CACHE_BACKENDS = ('django.core.cache.backends.redis.RedisCache',)
+
+
+@register(Tags.caches, deploy=True)
+def check_login_throttle_cache(app_configs, **kwargs):
+    """Limite de tentativas de login (accounts.throttling) em um cache confiável"""
+    if not getattr(settings, 'LOGIN_THROTTLE_ENABLED', True):
+        return []
+    backend = settings.CACHES['default']['BACKEND']
+    if backend in THROTTLE_CACHE_BACKENDS:
+        return []
+    return [
+        Warning(
+            f'O limite de tentativas de login usa o cache {backend}.',
+            hint=(
+                'Sem incr atômico, tentativas simultâneas podem não ser contadas, e os '
+                'contadores podem ser descartados ao atingir MAX_ENTRIES (os bloqueios já '
+                'aplicados continuam valendo pelo banco). Use CACHE_BACKEND=redis.'
+            ),
+            id='accounts.W001',
+        )
+    ]
@@ -0,0 +1,279 @@
+"""
+Estatísticas do dashboard.
+
+Os números vêm de tabelas de consolidação atualizadas a cada gravação, em
+vez de agregados calculados a cada visita:
+- DashboardCounter: usuários (total e ativos) e usuários por função e por
+  departamento, mantidos pelos sinais de User e UserProfile;
+- DailyLoginCount: logins por dia, mantido pelos sinais de LoginHistory e
+  pela gravação em lote (accounts.audit).
+
+get_dashboard_stats() monta as estatísticas visíveis ao usuário e as guarda
+no cache por nível de acesso (DASHBOARD_STATS_CACHE_TIMEOUT): a página faz
+uma única leitura de cache. manage.py rebuild_dashboard_stats recalcula as
+consolidações a partir dos dados e corrige eventuais diferenças, como
+gravações feitas sem sinais.
+"""
+import datetime
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Case, Count, F, Q, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+DASHBOARD_CACHE_PREFIX = 'accounts:dashboard'
+
+# Dias exibidos no gráfico de logins
+LOGIN_DAYS = 14
+
+TOTAL_USERS = 'users:total'
+ACTIVE_USERS = 'users:active'
+
+
+def role_key(role):
+    return f'role:{role}'
+
+
+def department_key(department):
+    return f'department:{department}'
+
+
+def _increment(model, key_field, value_field, amounts):
+    """
+    Soma as quantidades ({chave: quantidade}) às linhas da consolidação com
+    um único UPDATE; as linhas que ainda não existem são criadas.
+    """
+    amounts = {key: amount for key, amount in amounts.items() if amount}
+    if not amounts:
+        return
+
+    def update(keys):
+        return model.objects.filter(**{f'{key_field}__in': keys}).update(**{
+            value_field: F(value_field) + Case(
+                *[When(**{key_field: key}, then=Value(amounts[key])) for key in keys],
+                output_field=BigIntegerField(),
+            ),
+        })
+
+    updated = update(list(amounts))
+    if updated == len(amounts):
+        return
+    missing = set(amounts)
+    if updated:
+        missing -= set(
+            model.objects.filter(**{f'{key_field}__in': list(amounts)})
+            .values_list(key_field, flat=True)
+        )
+    for key in missing:
+        try:
+            with transaction.atomic():
+                model.objects.create(**{key_field: key, value_field: amounts[key]})
+        except IntegrityError:
+            # Criada por outra requisição entre o UPDATE e o INSERT
+            update([key])
+
+
+def increment_counters(amounts):
+    """Soma os valores informados ({chave: quantidade}) aos contadores"""
+    from .models import DashboardCounter
+
+    _increment(DashboardCounter, 'key', 'value', amounts)
+
+
+def add_logins(login_times):
+    """Soma os logins informados (horários) às contagens diárias"""
+    from .models import DailyLoginCount
+
+    per_day = Counter(timezone.localdate(value) for value in login_times)
+    _increment(DailyLoginCount, 'date', 'logins', per_day)
+
+
+def _replace(model, key_field, value_field, rows, compute):
+    """
+    Substitui as linhas `rows` da consolidação pelos valores de compute()
+    ({chave: valor}), atualizando no lugar. As linhas são travadas antes do
+    cálculo: gravações concorrentes (dado e consolidação na mesma transação)
+    esperam o fim do recálculo e somam sobre ele.
+    """
+    def replace():
+        existing = {getattr(row, key_field): row for row in rows.select_for_update()}
+        values = compute()
+        changed = []
+        for key, row in existing.items():
+            if key in values and getattr(row, value_field) != values[key]:
+                setattr(row, value_field, values[key])
+                changed.append(row)
+        model.objects.bulk_update(changed, [value_field], batch_size=1000)
+        model.objects.bulk_create(
+            [model(**{key_field: key, value_field: value}) for key, value in values.items()
+             if key not in existing],
+            batch_size=1000,
+        )
+        model.objects.filter(
+            pk__in=[row.pk for key, row in existing.items() if key not in values]
+        ).delete()
+        return values
+
+    try:
+        with transaction.atomic():
+            return replace()
+    except IntegrityError:
+        # Linha criada por uma gravação concorrente: refaz com ela travada
+        with transaction.atomic():
+            return replace()
+
+
+def count_users():
+    """Contadores de usuários calculados a partir de User e UserProfile"""
+    from django.contrib.auth.models import User
+
+    from .models import UserProfile
+
+    totals = User.objects.aggregate(
+        total=Count('pk'), active=Count('pk', filter=Q(is_active=True))
+    )
+    values = {TOTAL_USERS: totals['total'], ACTIVE_USERS: totals['active']}
+    for role, count in UserProfile.objects.order_by().values_list('role').annotate(Count('pk')):
+        values[role_key(role)] = count
+    for department, count in (
+        UserProfile.objects.order_by().values_list('department').annotate(Count('pk'))
+    ):
+        values[department_key(department)] = count
+    return values
+
+
+def rebuild_counters():
+    """Recalcula os contadores de usuários a partir de User e UserProfile"""
+    from .models import DashboardCounter
+
+    return _replace(DashboardCounter, 'key', 'value', DashboardCounter.objects.all(), count_users)
+
+
+def rebuild_daily_logins(days):
+    """Recalcula os logins por dia dos últimos `days` dias"""
+    from .models import DailyLoginCount, LoginHistory
+
+    since = timezone.localdate() - datetime.timedelta(days=days - 1)
+    start = timezone.make_aware(datetime.datetime.combine(since, datetime.time.min))
+
+    def count_logins():
+        return dict(
+            LoginHistory.objects.filter(login_time__gte=start)
+            .annotate(date=TruncDate('login_time'))
+            .order_by()
+            .values_list('date')
+            .annotate(Count('pk'))
+        )
+
+    values = _replace(
+        DailyLoginCount, 'date', 'logins',
+        DailyLoginCount.objects.filter(date__gte=since), count_logins,
+    )
+    return len(values)
+
+
+def can_view_user_stats(user):
+    """Estatísticas de usuários: mesmo acesso da listagem de usuários"""
+    return user.is_staff or user.is_superuser
+
+
+def _stats_queries():
+    from .models import DailyLoginCount, DashboardCounter
+
+    since = timezone.localdate() - datetime.timedelta(days=LOGIN_DAYS - 1)
+    return (
+        DashboardCounter.objects.values_list('key', 'value'),
+        DailyLoginCount.objects.filter(date__gte=since).order_by().values_list('date', 'logins'),
+    )
+
+
+def compute_stats():
+    """Estatísticas de usuários e logins a partir das consolidações"""
+    counters, logins = _stats_queries()
+    return _build_stats(dict(counters), dict(logins))
+
+
+async def acompute_stats():
+    """compute_stats com o ORM assíncrono"""
+    counters, logins = _stats_queries()
+    return _build_stats(
+        {key: value async for key, value in counters},
+        {date: count async for date, count in logins},
+    )
+
+
+def _build_stats(counters, logins):
+    from .models import UserProfile
+
+    today = timezone.localdate()
+    since = today - datetime.timedelta(days=LOGIN_DAYS - 1)
+    days = [since + datetime.timedelta(days=offset) for offset in range(LOGIN_DAYS)]
+    peak = max(logins.values(), default=0) or 1
+
+    roles = [
+        (label, counters.get(role_key(role), 0))
+        for role, label in UserProfile.ROLE_CHOICES
+    ]
+    prefix = department_key('')
+    departments = sorted(
+        (
+            (key[len(prefix):] or 'Sem departamento', value)
+            for key, value in counters.items()
+            if key.startswith(prefix) and value > 0
+        ),
+        key=lambda item: (-item[1], item[0]),
+    )
+
+    return {
+        'total_users': counters.get(TOTAL_USERS, 0),
+        'active_users': counters.get(ACTIVE_USERS, 0),
+        'logins_today': logins.get(today, 0),
+        'logins_per_day': [
+            {
+                'date': day,
+                'logins': logins.get(day, 0),
+                'percent': round(logins.get(day, 0) * 100 / peak),
+            }
+            for day in days
+        ],
+        'roles': roles,
+        'departments': departments,
+    }
+
+
+def get_dashboard_stats(user):
+    """
+    Estatísticas visíveis ao usuário, lidas do cache (uma leitura por página)
+    """
+    if not can_view_user_stats(user):
+        return {}
+    key = stats_key('staff')
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_stats()
+        cache.set(key, stats, getattr(settings, 'DASHBOARD_STATS_CACHE_TIMEOUT', 60))
+    return stats
+
+
+async def aget_dashboard_stats(user):
+    """get_dashboard_stats para as views assíncronas"""
+    if not can_view_user_stats(user):
+        return {}
+    key = stats_key('staff')
+    stats = await cache.aget(key)
+    if stats is None:
+        stats = await acompute_stats()
+        await cache.aset(key, stats, getattr(settings, 'DASHBOARD_STATS_CACHE_TIMEOUT', 60))
+    return stats
+
+
+def stats_key(level):
+    # A data na chave renova "logins hoje" na virada do dia
+    return f'{DASHBOARD_CACHE_PREFIX}:stats:{level}:{timezone.localdate():%Y%m%d}'
+
+
+def invalidate_dashboard_stats():
+    cache.delete(stats_key('staff'))
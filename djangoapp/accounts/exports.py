@@ -0,0 +1,229 @@
+"""
+Exportação de usuários e histórico de logins em CSV e XLSX.
+
+As linhas são lidas com iterator(chunk_size=...) (cursor no servidor no
+PostgreSQL) e enviadas com StreamingHttpResponse à medida que são geradas:
+a memória usada não depende do número de linhas e os primeiros bytes saem
+imediatamente.
+
+O XLSX é gerado sem dependências: um zip gravado em fluxo (zipfile sem
+seek) com a planilha escrita linha a linha, em vez de montar o arquivo
+inteiro em memória como fazem as bibliotecas de planilha.
+"""
+import csv
+import datetime
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+# Linhas lidas do banco por vez
+CHUNK_SIZE = 2000
+
+FORMATS = ('csv', 'xlsx')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+USER_COLUMNS = [
+    ('ID', 'pk'),
+    ('Usuário', 'username'),
+    ('Nome', 'first_name'),
+    ('Sobrenome', 'last_name'),
+    ('Email', 'email'),
+    ('Função', 'profile__role'),
+    ('Departamento', 'profile__department'),
+    ('Telefone', 'profile__phone'),
+    ('Ativo', 'is_active'),
+    ('Staff', 'is_staff'),
+    ('Cadastro', 'date_joined'),
+    ('Último Login', 'last_login'),
+]
+
+LOGIN_HISTORY_COLUMNS = [
+    ('ID', 'pk'),
+    ('Usuário', 'user__username'),
+    ('Horário', 'login_time'),
+    ('Endereço IP', 'ip_address'),
+    ('User Agent', 'user_agent'),
+]
+
+
+class _Buffer:
+    """Arquivo somente de escrita (sem seek) que acumula os bytes gravados"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class _TextAdapter:
+    """Recebe o texto do csv.writer e grava os bytes no buffer"""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def write(self, text):
+        return self.buffer.write(text.encode())
+
+
+def format_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'Sim' if value else 'Não'
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.strftime('%d/%m/%Y %H:%M:%S')
+    return value
+
+
+# Início de célula interpretado como fórmula pelo Excel/LibreOffice
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def csv_value(value):
+    """
+    Valor formatado para o CSV. Textos que começam como fórmula recebem um
+    apóstrofo (CSV injection): nome, departamento e user agent vêm do
+    usuário. No XLSX as células são texto (inlineStr) e não precisam disso.
+    """
+    value = format_value(value)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_rows(queryset, columns, chunk_size=CHUNK_SIZE):
+    """Linhas (tuplas) do queryset, lidas em blocos por cursor"""
+    fields = [field for _, field in columns]
+    yield from queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def stream_csv(rows, header):
+    """Gera o CSV em blocos de bytes (com BOM, para o Excel reconhecer UTF-8)"""
+    buffer = _Buffer()
+    writer = csv.writer(_TextAdapter(buffer))
+    yield '﻿'.encode()
+    writer.writerow(header)
+    for count, row in enumerate(rows, 1):
+        writer.writerow([csv_value(value) for value in row])
+        if count % CHUNK_SIZE == 0:
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+# Caracteres de controle não permitidos em XML
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+
+def _xlsx_cell(value):
+    value = format_value(value)
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_INVALID_XML.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+def stream_xlsx(rows, header, sheet_name='Dados'):
+    """Gera o XLSX em blocos de bytes, uma planilha com textos inline"""
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_PARTS.items():
+            archive.writestr(name, content)
+        archive.writestr('xl/workbook.xml', _WORKBOOK.format(name=escape(sheet_name[:31])))
+        yield buffer.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetData>'
+            )
+            sheet.write(_xlsx_row(header).encode())
+            for count, row in enumerate(rows, 1):
+                sheet.write(_xlsx_row(row).encode())
+                if count % CHUNK_SIZE == 0:
+                    yield buffer.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
+
+
+def export_response(queryset, columns, fmt, filename):
+    """StreamingHttpResponse com o queryset exportado no formato informado"""
+    header = [label for label, _ in columns]
+    rows = iter_rows(queryset, columns)
+    if fmt == 'xlsx':
+        content = stream_xlsx(rows, header)
+    else:
+        content = stream_csv(rows, header)
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[fmt])
+    stamp = timezone.localtime().strftime('%Y%m%d-%H%M')
+    response['Content-Disposition'] = f'attachment; filename="{filename}-{stamp}.{fmt}"'
+    return response
+
+
+def export_users(queryset, fmt):
+    return export_response(queryset, USER_COLUMNS, fmt, 'usuarios')
+
+
+def export_login_history(queryset, fmt):
+    return export_response(queryset, LOGIN_HISTORY_COLUMNS, fmt, 'historico-login')
@@ -162,3 +162,23 @@ class ProfileUpdateForm(forms.ModelForm):
                 'placeholder': '00000-000'
             }),
         }
+
+
+class UserImportForm(forms.Form):
+    """
+    Formulário de importação de usuários em lote (CSV)
+    """
+    file = forms.FileField(
+        widget=forms.FileInput(attrs={
+            'class': 'form-control',
+            'accept': '.csv,text/csv'
+        }),
+        label='Arquivo CSV'
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        widget=forms.CheckboxInput(attrs={
+            'class': 'form-check-input'
+        }),
+        label='Apenas validar (não grava)'
+    )
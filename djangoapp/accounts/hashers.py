@@ -0,0 +1,62 @@
+"""
+Hashers de senha com o hash executado no pool de accounts.hashing.
+
+Os hashes gerados são idênticos aos dos hashers do Django (mesmo algoritmo
+e formato), então os hashers podem ser trocados a qualquer momento. O custo
+é configurável (PASSWORD_PBKDF2_ITERATIONS, PASSWORD_SCRYPT_WORK_FACTOR):
+quando o custo ou o hasher preferido (PASSWORD_HASHER) mudam, o Django
+refaz o hash da senha no próximo login (check_password + must_update).
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from .hashing import run_hasher
+
+
+class PooledHasherMixin:
+    # Hasher do Django que faz o trabalho
+    base_hasher = None
+    # Atributos de custo repassados ao hasher no processo do pool
+    cost_attributes = ()
+
+    def _cost(self):
+        return {name: getattr(self, name) for name in self.cost_attributes}
+
+    def encode(self, password, salt, *args):
+        return run_hasher(self.base_hasher, self._cost(), 'encode', password, salt, *args)
+
+    def verify(self, password, encoded):
+        return run_hasher(self.base_hasher, self._cost(), 'verify', password, encoded)
+
+
+class PBKDF2PasswordHasher(PooledHasherMixin, hashers.PBKDF2PasswordHasher):
+    base_hasher = 'django.contrib.auth.hashers.PBKDF2PasswordHasher'
+    cost_attributes = ('iterations',)
+
+    @property
+    def iterations(self):
+        return (
+            getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', None)
+            or hashers.PBKDF2PasswordHasher.iterations
+        )
+
+
+class ScryptPasswordHasher(PooledHasherMixin, hashers.ScryptPasswordHasher):
+    """scrypt: memory-hard, sem dependências (hashlib)"""
+
+    base_hasher = 'django.contrib.auth.hashers.ScryptPasswordHasher'
+    cost_attributes = ('work_factor', 'block_size', 'parallelism')
+
+    @property
+    def work_factor(self):
+        return (
+            getattr(settings, 'PASSWORD_SCRYPT_WORK_FACTOR', None)
+            or hashers.ScryptPasswordHasher.work_factor
+        )
+
+
+class Argon2PasswordHasher(PooledHasherMixin, hashers.Argon2PasswordHasher):
+    """Argon2id: memory-hard, requer argon2-cffi"""
+
+    base_hasher = 'django.contrib.auth.hashers.Argon2PasswordHasher'
+    cost_attributes = ('time_cost', 'memory_cost', 'parallelism')
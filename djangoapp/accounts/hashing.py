@@ -0,0 +1,160 @@
+"""
+Hash de senhas fora da thread da requisição.
+
+Os hashers do Django são lentos de propósito (PBKDF2 com centenas de
+milhares de iterações) e cada hash ocupa um núcleo inteiro:
+
+- run_hasher() executa o hash/verificação dos hashers de accounts.hashers
+  em um pool de processos compartilhado e limitado a
+  PASSWORD_HASHING_WORKERS processos. Em uma rajada de logins as
+  verificações entram na fila do pool em vez de ocupar a CPU de todas as
+  threads do servidor, que continuam atendendo as outras páginas. Com 0
+  (padrão) o hash roda na própria thread, como no Django;
+- PasswordHasherPool distribui as senhas de uma importação em lote
+  (accounts.imports) entre processos próprios.
+
+Este módulo não importa modelos: é carregado pelos processos dos pools
+(iniciados com spawn) antes do django.setup().
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.utils.module_loading import import_string
+
+# Senhas por tarefa enviada ao pool de processos
+HASH_CHUNK_SIZE = 16
+
+
+def is_hashed(password):
+    """Verifica se o valor já é um hash reconhecido pelos PASSWORD_HASHERS"""
+    try:
+        identify_hasher(password)
+    except ValueError:
+        return False
+    return True
+
+
+_in_worker = False
+
+
+def _init_worker():
+    global _in_worker
+    # Processos iniciados com spawn não herdam a configuração do Django
+    django.setup()
+    # Os hashers do próprio processo do pool rodam localmente
+    _in_worker = True
+
+
+def _spawn_executor(workers):
+    # spawn: o processo atual pode ter threads (ex.: accounts.audit)
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+    )
+
+
+_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+
+
+def get_executor():
+    """
+    Pool compartilhado do processo atual, criado no primeiro uso, ou None
+    quando o hash deve rodar na thread atual
+    """
+    global _executor, _executor_pid
+    workers = getattr(settings, 'PASSWORD_HASHING_WORKERS', 0)
+    if _in_worker or workers <= 0:
+        return None
+    if _executor is not None and _executor_pid == os.getpid():
+        return _executor
+    with _lock:
+        # Após um fork (ex.: workers do gunicorn) o pool herdado é abandonado
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = _spawn_executor(workers)
+            _executor_pid = os.getpid()
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    with _lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown()
+        _executor = None
+
+
+def _call_hasher(path, cost, method, *args):
+    hasher = import_string(path)()
+    for name, value in cost.items():
+        setattr(hasher, name, value)
+    return getattr(hasher, method)(*args)
+
+
+def run_hasher(path, cost, method, *args):
+    """
+    Executa hasher.method(*args) do hasher do Django `path`, com os
+    parâmetros de custo informados, no pool compartilhado (ou na thread
+    atual, sem pool)
+    """
+    executor = get_executor()
+    if executor is None:
+        return _call_hasher(path, cost, method, *args)
+    try:
+        return executor.submit(_call_hasher, path, cost, method, *args).result()
+    except BrokenProcessPool:
+        # Processo do pool encerrado (ex.: falta de memória): recria no próximo uso
+        shutdown_executor()
+        return _call_hasher(path, cost, method, *args)
+
+
+class PasswordHasherPool:
+    """
+    Converte senhas em hash, em paralelo quando workers > 1. O pool de
+    processos só é criado quando há senhas em texto para converter.
+
+    Senhas vazias recebem um hash inutilizável e hashes já prontos são
+    mantidos como estão. Os processos usam os PASSWORD_HASHERS do módulo
+    de configuração (DJANGO_SETTINGS_MODULE).
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def hash(self, passwords):
+        encoded = list(passwords)
+        plain = [
+            index for index, password in enumerate(encoded)
+            if password and not is_hashed(password)
+        ]
+        for index, password in enumerate(encoded):
+            if not password:
+                encoded[index] = make_password(None)
+        if self.workers > 1 and len(plain) > HASH_CHUNK_SIZE:
+            if self._executor is None:
+                self._executor = _spawn_executor(self.workers)
+            hashes = self._executor.map(
+                make_password, [encoded[index] for index in plain],
+                chunksize=HASH_CHUNK_SIZE,
+            )
+        else:
+            hashes = [make_password(encoded[index]) for index in plain]
+        for index, password_hash in zip(plain, hashes):
+            encoded[index] = password_hash
+        return encoded
@@ -0,0 +1,213 @@
+"""
+Importação de usuários em lote a partir de CSV.
+
+Criar usuários um a um (UserRegisterForm/create_user) custa um INSERT do
+usuário mais um INSERT do perfil e um UPDATE dos contadores por linha,
+disparados pelos sinais. Aqui o CSV é lido em streaming e processado em
+lotes de USER_IMPORT_BATCH_SIZE linhas:
+
+- cada linha é validada com as regras dos modelos (clean_fields) e dos
+  validadores de senha; usuários já existentes são buscados com uma
+  consulta por lote;
+- as senhas em texto são convertidas em hash em um pool de processos
+  (USER_IMPORT_WORKERS); hashes do Django já prontos são gravados como
+  estão e linhas sem senha recebem senha inutilizável;
+- usuários e perfis são gravados com bulk_create (sem sinais) e os
+  contadores do dashboard recebem um único UPDATE por lote.
+
+Linhas inválidas não interrompem a importação: são devolvidas em
+ImportResult.errors com o número da linha no arquivo.
+"""
+import csv
+import io
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import password_validation
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .dashboard import (
+    ACTIVE_USERS, TOTAL_USERS, department_key, increment_counters,
+    invalidate_dashboard_stats, role_key,
+)
+from .hashing import PasswordHasherPool, is_hashed
+from .models import UserProfile
+
+COLUMNS = ('username', 'email', 'first_name', 'last_name', 'password', 'role', 'department', 'phone')
+USER_FIELDS = ('username', 'email', 'first_name', 'last_name')
+PROFILE_FIELDS = ('role', 'department', 'phone')
+
+@dataclass
+class ImportResult:
+    processed: int = 0
+    created: int = 0
+    # (linha, mensagem)
+    errors: list = field(default_factory=list)
+
+    @property
+    def valid(self):
+        return self.processed - len(self.errors)
+
+
+def read_csv(file, encoding='utf-8-sig'):
+    """
+    Linhas (número da linha, dicionário) de um CSV com cabeçalho, lidas em
+    streaming. Aceita arquivos em modo texto ou binário.
+    """
+    wrapper = None
+    if isinstance(file.read(0), bytes):
+        file = wrapper = io.TextIOWrapper(file, encoding=encoding, newline='')
+    try:
+        reader = csv.DictReader(file)
+        if reader.fieldnames is None or 'username' not in (
+            name.strip().lower() for name in reader.fieldnames
+        ):
+            raise ValidationError('O arquivo precisa de um cabeçalho com a coluna "username".')
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+        for row in reader:
+            yield reader.line_num, row
+    finally:
+        # O TextIOWrapper fecharia o arquivo recebido, que pode ser lido de novo
+        if wrapper is not None:
+            wrapper.detach()
+
+
+def count_plain_passwords(rows):
+    """Linhas com senha em texto, que precisam ser convertidas em hash"""
+    return sum(
+        1 for _, row in rows
+        if (password := row.get('password')) and not is_hashed(password)
+    )
+
+
+def _messages(exc):
+    if hasattr(exc, 'error_dict'):
+        return [
+            f'{name}: {message}'
+            for name, messages in exc.message_dict.items()
+            for message in messages
+        ]
+    return exc.messages
+
+
+def _validate(batch, seen, seen_emails, result):
+    """Linhas válidas do lote como (linha, usuário, perfil, senha)"""
+    rows = []
+    for line, row in batch:
+        data = {name: (row.get(name) or '').strip() for name in COLUMNS}
+        data['username'] = User.normalize_username(data['username'])
+        data['email'] = User.objects.normalize_email(data['email'])
+        # Espaços fazem parte da senha
+        data['password'] = row.get('password') or ''
+        rows.append((line, data))
+
+    existing = set(
+        User.objects.filter(username__in=[data['username'] for _, data in rows])
+        .values_list('username', flat=True)
+    )
+    # Mesma regra do UserRegisterForm: um email por usuário
+    existing_emails = set(
+        User.objects.filter(email__in=[data['email'] for _, data in rows if data['email']])
+        .values_list('email', flat=True)
+    )
+    valid = []
+    for line, data in rows:
+        user = User(**{name: data[name] for name in USER_FIELDS})
+        profile = UserProfile(
+            user=user, **{name: data[name] for name in PROFILE_FIELDS if data[name]}
+        )
+        errors = []
+        try:
+            user.clean_fields(exclude=['password'])
+        except ValidationError as exc:
+            errors += _messages(exc)
+        try:
+            profile.clean_fields(exclude=['user'])
+        except ValidationError as exc:
+            errors += _messages(exc)
+        if data['username'] in existing or data['username'] in seen:
+            errors.append(f'username: o usuário "{data["username"]}" já existe.')
+        if data['email'] and (data['email'] in existing_emails or data['email'] in seen_emails):
+            errors.append(f'email: o email "{data["email"]}" já está cadastrado.')
+        password = data['password']
+        if password and not is_hashed(password):
+            try:
+                password_validation.validate_password(password, user)
+            except ValidationError as exc:
+                errors += [f'password: {message}' for message in exc.messages]
+
+        if errors:
+            result.errors.append((line, ' '.join(errors)))
+            continue
+        seen.add(data['username'])
+        if data['email']:
+            seen_emails.add(data['email'])
+        valid.append((line, user, profile, password))
+    return valid
+
+
+def _insert(valid):
+    users = [user for _, user, _, _ in valid]
+    profiles = [profile for _, _, profile, _ in valid]
+    amounts = Counter()
+    for user, profile in zip(users, profiles):
+        amounts[TOTAL_USERS] += 1
+        amounts[ACTIVE_USERS] += int(user.is_active)
+        amounts[role_key(profile.role)] += 1
+        amounts[department_key(profile.department)] += 1
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        # bulk_create preenche profile.user_id com a chave do usuário criado
+        UserProfile.objects.bulk_create(profiles)
+        # bulk_create não envia sinais (create_user_profile, count_user...)
+        increment_counters(amounts)
+
+
+def _insert_batch(valid, hasher, result):
+    for (_, user, _, _), password_hash in zip(valid, hasher.hash(row[3] for row in valid)):
+        user.password = password_hash
+    try:
+        _insert(valid)
+    except IntegrityError:
+        # Usuário criado por outra requisição depois da validação do lote
+        existing = set(
+            User.objects.filter(username__in=[user.username for _, user, _, _ in valid])
+            .values_list('username', flat=True)
+        )
+        if not existing:
+            raise
+        for line, user, _, _ in valid:
+            if user.username in existing:
+                result.errors.append((line, f'username: o usuário "{user.username}" já existe.'))
+        valid = [row for row in valid if row[1].username not in existing]
+        if valid:
+            _insert(valid)
+    result.created += len(valid)
+
+
+def import_users(rows, batch_size=None, workers=None, dry_run=False):
+    """
+    Importa as linhas (número da linha, dicionário), como as de read_csv().
+    Com dry_run apenas valida.
+    """
+    batch_size = batch_size or getattr(settings, 'USER_IMPORT_BATCH_SIZE', 1000)
+    if workers is None:
+        workers = getattr(settings, 'USER_IMPORT_WORKERS', 1)
+    result = ImportResult()
+    seen = set()
+    seen_emails = set()
+    rows = iter(rows)
+    with PasswordHasherPool(workers) as hasher:
+        while batch := list(islice(rows, batch_size)):
+            result.processed += len(batch)
+            valid = _validate(batch, seen, seen_emails, result)
+            if valid and not dry_run:
+                _insert_batch(valid, hasher, result)
+    result.errors.sort()
+    if result.created:
+        invalidate_dashboard_stats()
+    return result
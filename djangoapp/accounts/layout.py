@@ -0,0 +1,83 @@
+"""
+Cache dos fragmentos do layout (cabeçalho, busca, menu do usuário e menu
+lateral), repetidos em todas as páginas.
+
+Cada fragmento é guardado por usuário, com a chave formada por:
+- a versão do layout do usuário, incrementada quando o usuário, o perfil ou
+  suas permissões mudam (bump_layout_version, ver accounts.models);
+- o hash das permissões do menu (PermissionSnapshot), que muda quando as
+  permissões de um grupo mudam (invalidate_all_menus);
+- o hash da definição do menu e o idioma ativo;
+- valores extras do fragmento (ex.: itens ativos do menu lateral).
+
+Partes que mudam a cada requisição (total de notificações não lidas,
+mensagens) ficam fora do cache. Tempo de vida: LAYOUT_CACHE_TIMEOUT.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+
+from .menu import get_menu_digest, get_permission_snapshot
+
+LAYOUT_CACHE_PREFIX = 'accounts:layout'
+
+
+def _version_key(user_id):
+    return f'{LAYOUT_CACHE_PREFIX}:version:{user_id}'
+
+
+def get_layout_version(user_id):
+    # Inicializada com o horário: se a versão sair do cache, a nova não
+    # coincide com a de fragmentos antigos que ainda estejam guardados
+    return cache.get_or_set(_version_key(user_id), time.time_ns() // 1000, timeout=None)
+
+
+def bump_layout_version(user_id):
+    """Invalida os fragmentos do layout de um usuário"""
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        get_layout_version(user_id)
+
+
+def permissions_hash(snapshot):
+    signature = repr((sorted(snapshot.perms), snapshot.is_staff, snapshot.is_superuser))
+    return hashlib.sha1(signature.encode()).hexdigest()[:12]
+
+
+def get_key_prefix(request, user):
+    """
+    Prefixo das chaves dos fragmentos do usuário, calculado uma vez por
+    requisição
+    """
+    prefix = getattr(request, '_layout_key_prefix', None) if request is not None else None
+    if prefix is None:
+        snapshot = get_permission_snapshot(user)
+        prefix = ':'.join((
+            LAYOUT_CACHE_PREFIX, get_menu_digest(), translation.get_language() or '',
+            str(user.pk), str(get_layout_version(user.pk)), permissions_hash(snapshot),
+        ))
+        if request is not None:
+            request._layout_key_prefix = prefix
+    return prefix
+
+
+def cached_fragment(request, user, name, render, vary_on=()):
+    """
+    Retorna o fragmento `name` do cache ou o gera com render(). Sem cache
+    para usuários anônimos ou com LAYOUT_CACHE_TIMEOUT=0.
+    """
+    timeout = getattr(settings, 'LAYOUT_CACHE_TIMEOUT', 300)
+    if not timeout or not user.is_authenticated:
+        return render()
+    key = f'{get_key_prefix(request, user)}:{name}'
+    if vary_on:
+        key += ':' + hashlib.sha1(repr(tuple(vary_on)).encode()).hexdigest()[:12]
+    content = cache.get(key)
+    if content is None:
+        content = render()
+        cache.set(key, content, timeout)
+    return content
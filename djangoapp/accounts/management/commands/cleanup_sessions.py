@@ -0,0 +1,52 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DatabaseSessionStore
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        'Remove as sessões expiradas (como o clearsessions), em lotes para não '
+        'bloquear a tabela django_session. Feito para rodar periodicamente.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=getattr(settings, 'SESSION_CLEANUP_BATCH_SIZE', 5000),
+            help='Sessões removidas por lote',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Apenas mostra quantas sessões seriam removidas',
+        )
+
+    def handle(self, *args, **options):
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not issubclass(store, DatabaseSessionStore):
+            # Sessões só em cache/cookie expiram sozinhas ou via clear_expired
+            if not options['dry_run']:
+                store.clear_expired()
+            self.stdout.write('Sessões expiradas removidas pelo backend.')
+            return
+
+        expired = store.get_model_class().objects.filter(
+            expire_date__lt=timezone.now()
+        )
+        if options['dry_run']:
+            self.stdout.write(f'{expired.count()} sessões expiradas')
+            return
+
+        # As entradas do cached_db expiram no cache junto com a sessão
+        total = 0
+        while True:
+            keys = list(
+                expired.order_by().values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not keys:
+                break
+            deleted, _ = expired.filter(pk__in=keys).delete()
+            total += deleted
+        self.stdout.write(f'{total} sessões expiradas removidas')
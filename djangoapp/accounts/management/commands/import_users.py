@@ -0,0 +1,59 @@
+import sys
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.imports import COLUMNS, import_users, read_csv
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa usuários de um CSV com cabeçalho (colunas: '
+        + ', '.join(COLUMNS)
+        + '; apenas username é obrigatória), em lotes e sem sinais por linha. '
+        'Linhas inválidas são informadas e não interrompem a importação.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Arquivo CSV (use - para a entrada padrão)')
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=getattr(settings, 'USER_IMPORT_BATCH_SIZE', 1000),
+            help='Linhas validadas e gravadas por lote',
+        )
+        parser.add_argument(
+            '--workers', type=int,
+            default=getattr(settings, 'USER_IMPORT_WORKERS', 1),
+            help='Processos usados para converter as senhas em hash',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Apenas valida o arquivo, sem gravar',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options['path'] == '-':
+                result = self.run(sys.stdin, options)
+            else:
+                with open(options['path'], encoding='utf-8-sig', newline='') as file:
+                    result = self.run(file, options)
+        except (OSError, ValidationError) as exc:
+            raise CommandError(exc)
+
+        for line, message in result.errors:
+            self.stderr.write(f'linha {line}: {message}')
+        if options['dry_run']:
+            summary = f'{result.valid} linhas válidas'
+        else:
+            summary = f'{result.created} usuários importados'
+        self.stdout.write(f'{summary}, {len(result.errors)} com erro')
+
+    def run(self, file, options):
+        return import_users(
+            read_csv(file),
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            dry_run=options['dry_run'],
+        )
@@ -0,0 +1,128 @@
+import csv
+import datetime
+import gzip
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts import partitions
+from accounts.models import LoginHistory
+
+COLUMNS = ['id', 'user_id', 'login_time', 'ip_address', 'user_agent']
+
+
+class Command(BaseCommand):
+    help = (
+        'Remove (arquivando em .csv.gz) o histórico de logins mais antigo que o '
+        'período de retenção. No PostgreSQL remove partições mensais inteiras e '
+        'cria as partições dos próximos meses.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-months', type=int,
+            default=getattr(settings, 'LOGIN_HISTORY_RETENTION_MONTHS', 12),
+            help='Meses de histórico a manter (além do mês atual)',
+        )
+        parser.add_argument(
+            '--archive-dir',
+            default=getattr(settings, 'LOGIN_HISTORY_ARCHIVE_DIR', None),
+            help='Pasta onde os arquivos .csv.gz serão gravados',
+        )
+        parser.add_argument(
+            '--no-archive', action='store_true',
+            help='Remove o histórico antigo sem arquivar',
+        )
+        parser.add_argument(
+            '--months-ahead', type=int, default=3,
+            help='Quantidade de partições futuras a criar',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Apenas mostra o que seria feito',
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.archive_dir = None
+        if not options['no_archive']:
+            if not options['archive_dir']:
+                self.stderr.write('Informe --archive-dir ou use --no-archive.')
+                return
+            self.archive_dir = Path(options['archive_dir'])
+            self.archive_dir.mkdir(parents=True, exist_ok=True)
+
+        cutoff = partitions.add_months(
+            partitions.month_start(timezone.now()), -options['retention_months']
+        )
+        self.stdout.write(f'Removendo histórico anterior a {cutoff:%m/%Y}')
+
+        if partitions.is_supported(connection) and partitions.is_partitioned(connection):
+            self.prune_partitions(cutoff, options['months_ahead'])
+        else:
+            self.prune_rows(LoginHistory.objects.all(), cutoff, 'loginhistory')
+
+    def prune_partitions(self, cutoff, months_ahead):
+        if not self.dry_run:
+            created = partitions.ensure_partitions(connection, months_ahead)
+            self.stdout.write(f'Partições garantidas: {", ".join(created)}')
+
+        for name, month in partitions.list_partitions(connection):
+            if month >= cutoff:
+                continue
+            self.stdout.write(f'Partição {name} ({month:%m/%Y})')
+            if self.dry_run:
+                continue
+            with transaction.atomic():
+                if self.archive_dir:
+                    self.archive_partition(name)
+                partitions.drop_partition(connection, name)
+            self.stdout.write(self.style.SUCCESS('  removida'))
+
+        # Registros antigos restantes só podem estar na partição padrão
+        self.prune_rows(LoginHistory.objects.all(), cutoff, partitions.DEFAULT_PARTITION)
+
+    def archive_partition(self, name):
+        path = self.archive_dir / f'{name}.csv.gz'
+        columns = ', '.join(f'"{column}"' for column in COLUMNS)
+        with gzip.open(path, 'wt', encoding='utf-8', newline='') as output:
+            output.write(','.join(COLUMNS) + '\n')
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f'COPY (SELECT {columns} FROM "{name}" ORDER BY "login_time") '
+                    'TO STDOUT WITH (FORMAT csv)',
+                    output,
+                )
+        self.stdout.write(f'  arquivada em {path}')
+
+    def prune_rows(self, queryset, cutoff, label):
+        """Fallback sem particionamento: arquiva e apaga em lotes"""
+        limit = datetime.datetime.combine(
+            cutoff, datetime.time.min, tzinfo=datetime.timezone.utc
+        )
+        old = queryset.filter(login_time__lt=limit).order_by('id')
+        total = old.count()
+        self.stdout.write(f'{label}: {total} registros antigos')
+        if self.dry_run or not total:
+            return
+
+        if self.archive_dir:
+            stamp = timezone.now().strftime('%Y%m%d%H%M%S')
+            path = self.archive_dir / f'{label}_{stamp}.csv.gz'
+            with gzip.open(path, 'wt', encoding='utf-8', newline='') as output:
+                writer = csv.writer(output)
+                writer.writerow(COLUMNS)
+                for row in old.values_list(*COLUMNS).iterator(chunk_size=5000):
+                    writer.writerow(row)
+            self.stdout.write(f'  arquivados em {path}')
+
+        deleted = 0
+        while True:
+            ids = list(old.values_list('id', flat=True)[:5000])
+            if not ids:
+                break
+            deleted += LoginHistory.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'  {deleted} registros removidos'))
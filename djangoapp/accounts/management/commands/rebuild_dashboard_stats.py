@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from accounts import activity, dashboard
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula as consolidações do dashboard (contadores de usuários e '
+        'logins por dia, total e por usuário) a partir dos dados, corrigindo '
+        'eventuais diferenças.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=30,
+            help='Dias de logins a recalcular (a partir de hoje)',
+        )
+
+    def handle(self, *args, **options):
+        counters = dashboard.rebuild_counters()
+        days = dashboard.rebuild_daily_logins(options['days'])
+        user_days = activity.rebuild_user_logins(options['days'])
+        dashboard.invalidate_dashboard_stats()
+        self.stdout.write(
+            f'{len(counters)} contadores, {days} dias de logins e '
+            f'{user_days} dias de logins por usuário recalculados'
+        )
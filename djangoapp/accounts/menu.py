@@ -1,13 +1,27 @@
+from dataclasses import dataclass, replace
+from functools import lru_cache
+import hashlib
+import unicodedata
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
+MENU_CACHE_PREFIX = 'accounts:menu'
+
+
 class MenuItem:
-    def __init__(self, title, url=None, icon=None, permissions=None, children=None):
+    def __init__(self, title, url=None, icon=None, permissions=None, children=None,
+                 staff_only=False, superuser_only=False):
         self.title = title
         self.url = url
         self.icon = icon or "bi bi-circle"
         self.permissions = permissions or []
         self.children = children or []
+        self.staff_only = staff_only
+        self.superuser_only = superuser_only
 
     def has_permission(self, user):
         """Verifica se o usuário tem permissão para ver este item de menu"""
@@ -25,13 +39,40 @@ class MenuItem:
             return True
         return any(child.is_active(current_url) for child in self.children)
 
-def get_menu_items(user):
+
+@dataclass(frozen=True)
+class CompiledMenuItem:
+    """
+    Versão imutável de um MenuItem, gerada uma única vez por processo
+    a partir da definição do menu.
+    """
+    id: str
+    title: str
+    url: str
+    icon: str
+    permissions: frozenset
+    children: tuple
+    staff_only: bool = False
+    superuser_only: bool = False
+
+    def is_visible(self, perms, is_staff=False, is_superuser=False):
+        """Verifica a visibilidade do item contra um conjunto de permissões"""
+        if self.staff_only and not is_staff:
+            return False
+        if self.superuser_only and not is_superuser:
+            return False
+        if not self.permissions:
+            return True
+        return not self.permissions.isdisjoint(perms)
+
+
+def get_menu_definition():
     """
-    Retorna todos os itens de menu baseado nas permissões do usuário.
+    Retorna a definição completa do menu, sem filtrar por usuário.
     OBSERVAÇÃO: Todas as URLs marcadas com '/temp/' são temporárias e devem ser substituídas
     pelas URLs reais quando os respectivos apps e views forem criados.
     """
-    menu_items = [
+    return [
         MenuItem(
             title=_("Principal"),
             children=[
@@ -152,31 +193,320 @@ def get_menu_items(user):
                 ),
             ]
         ),
+        # Menu de configurações para staff
+        MenuItem(
+            title=_("Sistema"),
+            staff_only=True,
+            children=[
+                MenuItem(
+                    title=_("Configurações"),
+                    url="#",  # Adicione a URL correta
+                    icon="bi bi-gear",
+                ),
+                # Administração apenas para superusuários
+                MenuItem(
+                    title=_("Administração"),
+                    url=reverse('admin:index'),
+                    icon="bi bi-shield-lock",
+                    superuser_only=True,
+                ),
+            ]
+        ),
     ]
 
-    # Adiciona menu de configurações para staff
-    if user.is_staff:
-        menu_items.append(
-            MenuItem(
-                title=_("Sistema"),
-                children=[
-                    MenuItem(
-                        title=_("Configurações"),
-                        url="#",  # Adicione a URL correta
-                        icon="bi bi-gear",
-                    ),
-                ]
-            )
-        )
 
-    # Adiciona menu de administração para superusuários
-    if user.is_superuser:
-        menu_items[-1].children.append(
-            MenuItem(
-                title=_("Administração"),
-                url=reverse('admin:index'),
-                icon="bi bi-shield-lock",
-            )
+def _filter_flags(items, user):
+    """Remove itens restritos a staff/superusuários"""
+    result = []
+    for item in items:
+        if item.staff_only and not user.is_staff:
+            continue
+        if item.superuser_only and not user.is_superuser:
+            continue
+        item.children = _filter_flags(item.children, user)
+        result.append(item)
+    return result
+
+
+def get_menu_items(user):
+    """
+    Retorna todos os itens de menu (MenuItem) disponíveis para o usuário.
+    Mantido por compatibilidade; a renderização usa get_user_menu.
+    """
+    return _filter_flags(get_menu_definition(), user)
+
+
+def _compile(items, prefix=''):
+    compiled = []
+    for index, item in enumerate(items, start=1):
+        node_id = f'{prefix}{index}'
+        compiled.append(CompiledMenuItem(
+            id=node_id,
+            title=item.title,
+            url=item.url,
+            icon=item.icon,
+            permissions=frozenset(item.permissions),
+            children=_compile(item.children, prefix=f'{node_id}-'),
+            staff_only=item.staff_only,
+            superuser_only=item.superuser_only,
+        ))
+    return tuple(compiled)
+
+
+def _walk(items):
+    for item in items:
+        yield item
+        yield from _walk(item.children)
+
+
+@lru_cache(maxsize=None)
+def get_compiled_menu():
+    """
+    Compila a definição do menu uma única vez por processo em uma
+    estrutura imutável (as chamadas a reverse() acontecem apenas aqui).
+    """
+    return _compile(get_menu_definition())
+
+
+@lru_cache(maxsize=None)
+def get_menu_permissions():
+    """Retorna todas as permissões referenciadas na definição do menu"""
+    return frozenset(
+        perm for item in _walk(get_compiled_menu()) for perm in item.permissions
+    )
+
+
+@lru_cache(maxsize=None)
+def get_menu_digest():
+    """Hash da definição compilada, usado para versionar as chaves de cache"""
+    signature = repr([
+        (item.id, item.url, item.icon, sorted(item.permissions),
+         item.staff_only, item.superuser_only)
+        for item in _walk(get_compiled_menu())
+    ])
+    return hashlib.sha1(signature.encode()).hexdigest()[:12]
+
+
+class MenuPrefixIndex:
+    """
+    Índice de prefixos das URLs do menu compilado. Mapeia o caminho da
+    requisição para o conjunto de ids ativos (o item cuja URL é prefixo do
+    caminho e todos os seus ancestrais) com uma consulta a dicionário por
+    comprimento distinto de URL, em vez de percorrer a árvore inteira.
+    """
+
+    def __init__(self, items):
+        by_url = {}
+        self._collect(items, (), by_url)
+        self._by_url = {url: frozenset(ids) for url, ids in by_url.items()}
+        # Comprimentos distintos das URLs, do maior para o menor
+        self._lengths = tuple(sorted({len(url) for url in self._by_url}, reverse=True))
+
+    def _collect(self, items, ancestors, by_url):
+        for item in items:
+            path = ancestors + (item.id,)
+            if item.url and item.url.startswith('/'):
+                by_url.setdefault(item.url, set()).update(path)
+            self._collect(item.children, path, by_url)
+
+    def lookup(self, current_url):
+        """Retorna os ids dos itens ativos para a URL informada"""
+        active = set()
+        for length in self._lengths:
+            if length > len(current_url):
+                continue
+            prefix = current_url[:length]
+            # A raiz ('/') é prefixo de todas as URLs: só fica ativa na própria raiz
+            if prefix == '/' and current_url != '/':
+                continue
+            ids = self._by_url.get(prefix)
+            if ids:
+                active.update(ids)
+        return frozenset(active)
+
+
+@lru_cache(maxsize=None)
+def get_menu_prefix_index():
+    """Índice de prefixos construído uma única vez a partir do menu compilado"""
+    return MenuPrefixIndex(get_compiled_menu())
+
+
+@lru_cache(maxsize=1024)
+def get_active_menu_ids(current_url):
+    """Retorna os ids dos itens de menu ativos para a URL atual"""
+    return get_menu_prefix_index().lookup(current_url)
+
+
+def _filter_items(items, perms, is_staff, is_superuser):
+    visible = []
+    for item in items:
+        if not item.is_visible(perms, is_staff, is_superuser):
+            continue
+        children = _filter_items(item.children, perms, is_staff, is_superuser)
+        visible.append(replace(item, children=children))
+    return tuple(visible)
+
+
+@lru_cache(maxsize=256)
+def _get_filtered_menu(perms, is_staff, is_superuser):
+    """
+    Filtra o menu compilado para um conjunto de permissões. O resultado
+    depende apenas dos argumentos, então é compartilhado entre todos os
+    usuários com o mesmo conjunto efetivo de permissões.
+    """
+    sections = _filter_items(get_compiled_menu(), perms, is_staff, is_superuser)
+    # Seções sem nenhum item visível não são exibidas
+    return tuple(section for section in sections if section.children)
+
+
+def normalize_search_text(text):
+    """Minúsculas e sem acentos, para a busca de itens do menu"""
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+@lru_cache(maxsize=256)
+def _get_menu_search_entries(perms, is_staff, is_superuser):
+    """
+    Índice de busca dos links do menu visível para um conjunto de
+    permissões: [(palavras normalizadas, item, título da seção)]
+    """
+    entries = []
+    for section in _get_filtered_menu(perms, is_staff, is_superuser):
+        for item in _walk(section.children):
+            if not item.url or not item.url.startswith('/'):
+                continue
+            words = tuple(normalize_search_text(f'{section.title} {item.title}').split())
+            entries.append((words, item, section.title))
+    return tuple(entries)
+
+
+def search_menu(snapshot, query, limit=5):
+    """
+    Busca os links do menu visíveis para a PermissionSnapshot. Cada termo da
+    busca deve ser prefixo de alguma palavra do título (ou da seção).
+    """
+    terms = normalize_search_text(query).split()
+    if not terms:
+        return []
+    results = []
+    entries = _get_menu_search_entries(snapshot.perms, snapshot.is_staff, snapshot.is_superuser)
+    for words, item, section in entries:
+        if all(any(word.startswith(term) for word in words) for term in terms):
+            results.append((item, section))
+            if len(results) >= limit:
+                break
+    return results
+
+
+def _get_generation():
+    return cache.get_or_set(f'{MENU_CACHE_PREFIX}:generation', 1, timeout=None)
+
+
+def _user_perms_key(user_id):
+    return f'{MENU_CACHE_PREFIX}:{get_menu_digest()}:{_get_generation()}:perms:{user_id}'
+
+
+class PermissionSnapshot:
+    """
+    Fotografia imutável das permissões do menu que um usuário possui.
+    Resolvida com no máximo duas consultas (permissões diretas e de grupos)
+    e avaliada contra um frozenset, sem chamar user.has_perm por item.
+    """
+    __slots__ = ('perms', 'is_staff', 'is_superuser')
+
+    def __init__(self, perms=frozenset(), is_staff=False, is_superuser=False):
+        self.perms = frozenset(perms)
+        self.is_staff = is_staff
+        self.is_superuser = is_superuser
+
+    @staticmethod
+    def resolve(user, wanted):
+        """
+        Retorna quais das permissões em `wanted` ('app_label.codename') o
+        usuário possui, com uma consulta para as permissões do usuário e
+        outra para as permissões dos seus grupos.
+        """
+        if not user.is_active or not wanted:
+            return frozenset()
+        if user.is_superuser:
+            return frozenset(wanted)
+
+        app_labels = {perm.split('.', 1)[0] for perm in wanted}
+        codenames = {perm.split('.', 1)[1] for perm in wanted}
+        base = Permission.objects.filter(
+            content_type__app_label__in=app_labels,
+            codename__in=codenames,
+        ).values_list('content_type__app_label', 'codename')
+
+        found = set()
+        for lookup in ({'user': user}, {'group__user': user}):
+            found.update(f'{app}.{codename}' for app, codename in base.filter(**lookup))
+        return frozenset(found) & frozenset(wanted)
+
+    @classmethod
+    def for_user(cls, user):
+        """Cria a fotografia das permissões do menu para o usuário"""
+        return cls(
+            cls.resolve(user, get_menu_permissions()),
+            is_staff=user.is_staff,
+            is_superuser=user.is_superuser,
         )
 
-    return menu_items
\ No newline at end of file
+    def has_perm(self, perm):
+        return self.is_superuser or perm in self.perms
+
+    def has_any(self, perms):
+        """Equivalente a any(user.has_perm(p) for p in perms)"""
+        return self.is_superuser or not self.perms.isdisjoint(perms)
+
+    def is_visible(self, item):
+        return item.is_visible(self.perms, self.is_staff, self.is_superuser)
+
+    def get_menu(self):
+        """Retorna o menu filtrado para esta fotografia de permissões"""
+        return _get_filtered_menu(self.perms, self.is_staff, self.is_superuser)
+
+
+def get_permission_snapshot(user):
+    """
+    Retorna a PermissionSnapshot do usuário, guardando as permissões no
+    cache para evitar as consultas de permissões a cada página.
+    """
+    if not user.is_authenticated:
+        return PermissionSnapshot()
+    if not user.is_active or user.is_superuser:
+        # Não depende do banco de dados
+        return PermissionSnapshot.for_user(user)
+
+    key = _user_perms_key(user.pk)
+    perms = cache.get(key)
+    if perms is None:
+        perms = PermissionSnapshot.resolve(user, get_menu_permissions())
+        cache.set(key, perms, getattr(settings, 'MENU_CACHE_TIMEOUT', 300))
+    return PermissionSnapshot(perms, user.is_staff, user.is_superuser)
+
+
+def get_user_menu(user, snapshot=None):
+    """
+    Retorna o menu já filtrado para o usuário como uma tupla de
+    CompiledMenuItem, com os filhos visíveis já resolvidos.
+    """
+    if not user.is_authenticated:
+        return ()
+    if snapshot is None:
+        snapshot = get_permission_snapshot(user)
+    return snapshot.get_menu()
+
+
+def invalidate_user_menu(user_id):
+    """Invalida o cache de permissões do menu de um usuário"""
+    cache.delete(_user_perms_key(user_id))
+
+
+def invalidate_all_menus():
+    """Invalida o cache de permissões do menu de todos os usuários"""
+    try:
+        cache.incr(f'{MENU_CACHE_PREFIX}:generation')
+    except ValueError:
+        cache.set(f'{MENU_CACHE_PREFIX}:generation', 2, timeout=None)
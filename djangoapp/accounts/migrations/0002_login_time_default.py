@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:18
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='loginhistory',
+            name='login_time',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Horário de Login'),
+        ),
+    ]
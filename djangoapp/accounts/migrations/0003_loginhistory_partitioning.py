@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:19
+
+from django.db import migrations, models
+
+from accounts import partitions
+
+
+def partition_login_history(apps, schema_editor):
+    if partitions.is_supported(schema_editor.connection):
+        partitions.convert_to_partitioned(schema_editor.connection)
+
+
+def unpartition_login_history(apps, schema_editor):
+    if partitions.is_supported(schema_editor.connection):
+        partitions.convert_to_regular(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_login_time_default'),
+    ]
+
+    operations = [
+        # Particionamento mensal por login_time (apenas PostgreSQL)
+        migrations.RunPython(partition_login_history, unpartition_login_history),
+        migrations.AddIndex(
+            model_name='loginhistory',
+            index=models.Index(fields=['user', '-login_time'], name='loginhistory_user_time_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_loginhistory_partitioning'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='avatar_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Hash do Avatar'),
+        ),
+    ]
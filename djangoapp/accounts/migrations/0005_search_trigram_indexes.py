@@ -0,0 +1,43 @@
+from django.db import migrations
+
+# Índices GIN pg_trgm sobre as mesmas expressões geradas por icontains
+# no PostgreSQL: UPPER(coluna::text)
+TRIGRAM_INDEXES = [
+    ('accounts_user_username_trgm', 'auth_user', 'username'),
+    ('accounts_user_first_name_trgm', 'auth_user', 'first_name'),
+    ('accounts_user_last_name_trgm', 'auth_user', 'last_name'),
+    ('accounts_user_email_trgm', 'auth_user', 'email'),
+    ('accounts_profile_department_trgm', 'accounts_userprofile', 'department'),
+    ('accounts_profile_phone_trgm', 'accounts_userprofile', 'phone'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "{table}" '
+            f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY não pode rodar dentro de uma transação
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0004_userprofile_avatar_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:38
+
+import datetime
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+# Dias de logins consolidados ao criar as tabelas (o dashboard mostra 14)
+SEED_LOGIN_DAYS = 30
+
+
+def seed_rollups(apps, schema_editor):
+    """
+    Preenche as consolidações a partir dos dados existentes: sem isso os
+    contadores começariam em zero (e ficariam negativos ao remover usuários)
+    """
+    User = apps.get_model('auth', 'User')
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    LoginHistory = apps.get_model('accounts', 'LoginHistory')
+    DashboardCounter = apps.get_model('accounts', 'DashboardCounter')
+    DailyLoginCount = apps.get_model('accounts', 'DailyLoginCount')
+    db = schema_editor.connection.alias
+
+    totals = User.objects.using(db).aggregate(
+        total=Count('pk'), active=Count('pk', filter=Q(is_active=True))
+    )
+    values = {'users:total': totals['total'], 'users:active': totals['active']}
+    profiles = UserProfile.objects.using(db).order_by()
+    for role, count in profiles.values_list('role').annotate(Count('pk')):
+        values[f'role:{role}'] = count
+    for department, count in profiles.values_list('department').annotate(Count('pk')):
+        values[f'department:{department}'] = count
+    DashboardCounter.objects.using(db).bulk_create(
+        DashboardCounter(key=key, value=value) for key, value in values.items()
+    )
+
+    since = timezone.localdate() - datetime.timedelta(days=SEED_LOGIN_DAYS - 1)
+    start = timezone.make_aware(datetime.datetime.combine(since, datetime.time.min))
+    per_day = (
+        LoginHistory.objects.using(db).filter(login_time__gte=start)
+        .annotate(date=TruncDate('login_time'))
+        .order_by()
+        .values_list('date')
+        .annotate(Count('pk'))
+    )
+    DailyLoginCount.objects.using(db).bulk_create(
+        DailyLoginCount(date=date, logins=count) for date, count in per_day
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_loginhistory_time_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyLoginCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='Data')),
+                ('logins', models.PositiveIntegerField(default=0, verbose_name='Logins')),
+            ],
+            options={
+                'verbose_name': 'Logins por Dia',
+                'verbose_name_plural': 'Logins por Dia',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=150, unique=True, verbose_name='Chave')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Valor')),
+            ],
+            options={
+                'verbose_name': 'Contador do Dashboard',
+                'verbose_name_plural': 'Contadores do Dashboard',
+            },
+        ),
+        migrations.RunPython(seed_rollups, migrations.RunPython.noop),
+    ]
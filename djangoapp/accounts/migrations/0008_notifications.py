@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0007_dashboard_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='unread_notifications',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Notificações Não Lidas'),
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200, verbose_name='Título')),
+                ('message', models.TextField(blank=True, verbose_name='Mensagem')),
+                ('level', models.CharField(choices=[('info', 'Informação'), ('success', 'Sucesso'), ('warning', 'Aviso'), ('danger', 'Urgente')], default='info', max_length=10, verbose_name='Nível')),
+                ('url', models.CharField(blank=True, max_length=255, verbose_name='Link')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Criada em')),
+                ('read_at', models.DateTimeField(blank=True, null=True, verbose_name='Lida em')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL, verbose_name='Destinatário')),
+            ],
+            options={
+                'verbose_name': 'Notificação',
+                'verbose_name_plural': 'Notificações',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['recipient', '-created_at', '-id'], name='notification_recipient_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0008_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginLockout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('ip', 'Endereço IP'), ('username', 'Usuário')], max_length=10, verbose_name='Escopo')),
+                ('username', models.CharField(blank=True, max_length=150, verbose_name='Usuário Informado')),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True, verbose_name='Endereço IP')),
+                ('attempts', models.PositiveIntegerField(verbose_name='Tentativas na Janela')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Bloqueado em')),
+                ('locked_until', models.DateTimeField(verbose_name='Bloqueado até')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='login_lockouts', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Bloqueio de Login',
+                'verbose_name_plural': 'Bloqueios de Login',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['-created_at'], name='loginlockout_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0009_login_lockouts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserLoginDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('logins', models.PositiveIntegerField(default=0, verbose_name='Logins')),
+                ('ip_addresses', models.JSONField(blank=True, default=list, verbose_name='Endereços IP')),
+                ('distinct_ips', models.PositiveIntegerField(default=0, verbose_name='IPs Distintos')),
+                ('last_login_time', models.DateTimeField(blank=True, null=True, verbose_name='Último Login')),
+                ('last_user_agent', models.TextField(blank=True, verbose_name='Último User Agent')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='login_days', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Logins do Usuário por Dia',
+                'verbose_name_plural': 'Logins dos Usuários por Dia',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='userloginday',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='userloginday_user_date_uniq'),
+        ),
+    ]
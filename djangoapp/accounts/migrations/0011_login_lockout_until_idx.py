@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_user_login_days'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loginlockout',
+            index=models.Index(fields=['locked_until'], name='loginlockout_until_idx'),
+        ),
+    ]
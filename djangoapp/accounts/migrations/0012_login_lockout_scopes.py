@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_login_lockout_until_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='loginlockout',
+            name='scope',
+            field=models.CharField(choices=[('ip', 'Endereço IP'), ('username', 'Usuário e IP'), ('account', 'Usuário (qualquer IP)')], max_length=10, verbose_name='Escopo'),
+        ),
+    ]
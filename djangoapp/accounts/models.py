@@ -1,10 +1,20 @@
 from django.db import models
-from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.contrib.auth.models import User, Group, Permission
+from django.db.models.signals import post_init, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
-from PIL import Image
+from django.utils import timezone
 import os
 
+from .activity import add_user_logins
+from .avatars import get_sizes, schedule_avatar_processing, thumbnail_url
+from .backends import invalidate_cached_user
+from .dashboard import (
+    ACTIVE_USERS, TOTAL_USERS, add_logins, department_key, increment_counters, role_key,
+)
+from .layout import bump_layout_version
+from .menu import invalidate_user_menu, invalidate_all_menus
+from .notifications import add_unread
+
 
 class UserProfile(models.Model):
     """
@@ -30,6 +40,13 @@ class UserProfile(models.Model):
         blank=True,
         verbose_name='Avatar'
     )
+    # Hash do conteúdo do avatar, usado nos nomes das miniaturas
+    avatar_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        verbose_name='Hash do Avatar'
+    )
     role = models.CharField(
         max_length=20, 
         choices=ROLE_CHOICES, 
@@ -75,6 +92,12 @@ class UserProfile(models.Model):
         blank=True,
         verbose_name='CEP'
     )
+    # Total de notificações não lidas, mantido por accounts.notifications
+    unread_notifications = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Notificações Não Lidas'
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Criado em'
@@ -92,17 +115,96 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"Perfil de {self.user.username}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valores carregados, usados para detectar alterações no save()
+        instance._loaded_values = {
+            name: instance._normalize(name, value)
+            for name, value in zip(field_names, values)
+        }
+        return instance
+
+    @staticmethod
+    def _normalize(name, value):
+        if name == 'avatar':
+            return getattr(value, 'name', value) or None
+        return value
+
+    def _get_field_values(self):
+        """Valores atuais dos campos carregados (campos adiados são ignorados)"""
+        return {
+            field.attname: self._normalize(field.attname, self.__dict__[field.attname])
+            for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname in self.__dict__
+        }
+
+    def get_dirty_fields(self):
+        """Retorna os campos alterados desde que o perfil foi carregado ou salvo"""
+        current = self._get_field_values()
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return list(current)
+        return [
+            name for name, value in current.items()
+            if name not in loaded or loaded[name] != value
+        ]
+
     def save(self, *args, **kwargs):
+        avatar_changed = 'avatar' in self.get_dirty_fields()
+        update_fields = kwargs.get('update_fields')
+        if avatar_changed:
+            self.avatar_hash = ''
+            if update_fields is not None and 'avatar' in update_fields:
+                kwargs['update_fields'] = update_fields = {*update_fields, 'avatar_hash'}
         super().save(*args, **kwargs)
-        
-        # Redimensionar avatar se existir
-        if self.avatar:
-            img = Image.open(self.avatar.path)
-            
-            if img.height > 300 or img.width > 300:
-                output_size = (300, 300)
-                img.thumbnail(output_size)
-                img.save(self.avatar.path)
+
+        current = self._get_field_values()
+        if update_fields is None:
+            self._loaded_values = current
+        else:
+            loaded = getattr(self, '_loaded_values', {})
+            loaded.update({
+                name: value for name, value in current.items()
+                if name in update_fields or name.removesuffix('_id') in update_fields
+            })
+            self._loaded_values = loaded
+
+        # Miniaturas geradas em segundo plano apenas quando a imagem muda
+        if avatar_changed and self.avatar:
+            schedule_avatar_processing(self.pk)
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        if update_fields is None:
+            # O contador de notificações só muda por UPDATE com F()
+            # (accounts.notifications): o UPDATE de um save completo não o
+            # sobrescreve com o valor carregado. Sem linha para atualizar, o
+            # save segue para o INSERT com todos os campos, como no Django.
+            values = [value for value in values if value[0].name != 'unread_notifications']
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+    def get_avatar_url(self, size):
+        """
+        URL da miniatura do avatar no tamanho informado (AVATAR_SIZES), ou do
+        original enquanto as miniaturas não foram geradas
+        """
+        if not self.avatar:
+            return None
+        if self.avatar_hash:
+            return thumbnail_url(self.avatar_hash, size)
+        return self.avatar.url
+
+    @property
+    def avatar_small_url(self):
+        return self.get_avatar_url(get_sizes()['small'])
+
+    @property
+    def avatar_medium_url(self):
+        return self.get_avatar_url(get_sizes()['medium'])
+
+    @property
+    def avatar_large_url(self):
+        return self.get_avatar_url(get_sizes()['large'])
     
     def get_full_name(self):
         """Retorna o nome completo do usuário"""
@@ -128,10 +230,77 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """Salva o perfil quando o usuário é salvo"""
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
+def save_user_profile(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Salva o perfil quando o usuário é salvo, apenas se o perfil já estiver
+    carregado e tiver sido alterado. Saves parciais (update_fields, como a
+    atualização de last_login no login) não afetam o perfil.
+    """
+    if created or update_fields is not None:
+        return
+    if not User.profile.is_cached(instance):
+        return
+    profile = instance.profile
+    dirty = profile.get_dirty_fields()
+    if dirty:
+        profile.save(update_fields=[*dirty, 'updated_at'] if profile.pk else None)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_menu_on_user_permissions_change(sender, instance, action, reverse, **kwargs):
+    """Invalida o cache do menu quando grupos/permissões de um usuário mudam"""
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, User):
+        invalidate_user_menu(instance.pk)
+        bump_layout_version(instance.pk)
+    else:
+        # Alteração feita a partir do grupo/permissão (relação reversa)
+        invalidate_all_menus()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_menu_on_group_permissions_change(sender, action, **kwargs):
+    """Invalida o cache do menu quando as permissões de um grupo mudam"""
+    if action.startswith('post_'):
+        invalidate_all_menus()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def invalidate_menu_on_delete(sender, **kwargs):
+    """Invalida o cache do menu quando um grupo ou permissão é removido"""
+    invalidate_all_menus()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user_on_user_change(sender, instance, **kwargs):
+    """Remove o usuário do cache de autenticação quando ele muda"""
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_cached_user_on_profile_change(sender, instance, **kwargs):
+    """Remove o usuário do cache de autenticação quando o perfil muda"""
+    invalidate_cached_user(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_layout_on_user_change(sender, instance, update_fields=None, **kwargs):
+    """Invalida os fragmentos do layout (nome, papel, avatar, staff)"""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump_layout_version(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_layout_on_profile_change(sender, instance, **kwargs):
+    bump_layout_version(instance.user_id)
 
 
 class LoginHistory(models.Model):
@@ -144,8 +313,11 @@ class LoginHistory(models.Model):
         related_name='login_history',
         verbose_name='Usuário'
     )
+    # default em vez de auto_now_add: preserva o horário do evento quando
+    # a gravação é feita em lote (accounts.audit)
     login_time = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         verbose_name='Horário de Login'
     )
     ip_address = models.GenericIPAddressField(
@@ -162,6 +334,323 @@ class LoginHistory(models.Model):
         verbose_name = 'Histórico de Login'
         verbose_name_plural = 'Históricos de Login'
         ordering = ['-login_time']
+        indexes = [
+            # Últimos logins de um usuário (perfil, detalhes do usuário)
+            models.Index(fields=['user', '-login_time'], name='loginhistory_user_time_idx'),
+            # Listagem geral (admin) e paginação por cursor
+            models.Index(fields=['-login_time', '-id'], name='loginhistory_time_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.login_time}"
+
+
+class LoginLockout(models.Model):
+    """
+    Bloqueio temporário de login por excesso de tentativas inválidas
+    (accounts.throttling)
+    """
+    SCOPE_CHOICES = [
+        ('ip', 'Endereço IP'),
+        ('username', 'Usuário e IP'),
+        ('account', 'Usuário (qualquer IP)'),
+    ]
+
+    scope = models.CharField(
+        max_length=10,
+        choices=SCOPE_CHOICES,
+        verbose_name='Escopo'
+    )
+    # Usuário informado no formulário (pode não existir)
+    username = models.CharField(
+        max_length=150,
+        blank=True,
+        verbose_name='Usuário Informado'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='login_lockouts',
+        verbose_name='Usuário'
+    )
+    ip_address = models.GenericIPAddressField(
+        null=True,
+        blank=True,
+        verbose_name='Endereço IP'
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Tentativas na Janela'
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        verbose_name='Bloqueado em'
+    )
+    locked_until = models.DateTimeField(
+        verbose_name='Bloqueado até'
+    )
+
+    class Meta:
+        verbose_name = 'Bloqueio de Login'
+        verbose_name_plural = 'Bloqueios de Login'
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['-created_at'], name='loginlockout_created_idx'),
+            # Bloqueios ativos, conferidos quando o cache não tem o bloqueio
+            models.Index(fields=['locked_until'], name='loginlockout_until_idx'),
+        ]
+
+    def __str__(self):
+        target = self.ip_address if self.scope == 'ip' else self.username
+        return f"{self.get_scope_display()} {target} - {self.created_at}"
+
+
+class DashboardCounter(models.Model):
+    """
+    Contadores consolidados do dashboard (accounts.dashboard), atualizados a
+    cada gravação em vez de agregados a cada visita
+    """
+    key = models.CharField(
+        max_length=150,
+        unique=True,
+        verbose_name='Chave'
+    )
+    value = models.BigIntegerField(
+        default=0,
+        verbose_name='Valor'
+    )
+
+    class Meta:
+        verbose_name = 'Contador do Dashboard'
+        verbose_name_plural = 'Contadores do Dashboard'
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+
+class DailyLoginCount(models.Model):
+    """
+    Quantidade de logins por dia (accounts.dashboard)
+    """
+    date = models.DateField(
+        unique=True,
+        verbose_name='Data'
+    )
+    logins = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Logins'
+    )
+
+    class Meta:
+        verbose_name = 'Logins por Dia'
+        verbose_name_plural = 'Logins por Dia'
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.date}: {self.logins}"
+
+
+class UserLoginDay(models.Model):
+    """
+    Logins de um usuário em um dia: quantidade, IPs distintos e último
+    user agent (accounts.activity)
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='login_days',
+        verbose_name='Usuário'
+    )
+    date = models.DateField(
+        verbose_name='Data'
+    )
+    logins = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Logins'
+    )
+    ip_addresses = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name='Endereços IP'
+    )
+    distinct_ips = models.PositiveIntegerField(
+        default=0,
+        verbose_name='IPs Distintos'
+    )
+    last_login_time = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Último Login'
+    )
+    last_user_agent = models.TextField(
+        blank=True,
+        verbose_name='Último User Agent'
+    )
+
+    class Meta:
+        verbose_name = 'Logins do Usuário por Dia'
+        verbose_name_plural = 'Logins dos Usuários por Dia'
+        ordering = ['-date']
+        constraints = [
+            # Também atende a leitura do período de um usuário
+            models.UniqueConstraint(fields=['user', 'date'], name='userloginday_user_date_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.date}: {self.logins}"
+
+
+@receiver(post_init, sender=User)
+def remember_user_active_state(sender, instance, **kwargs):
+    """Guarda o is_active carregado para atualizar o contador de ativos"""
+    if instance.pk is not None and 'is_active' in instance.__dict__:
+        instance._loaded_is_active = instance.is_active
+
+
+@receiver(post_save, sender=User)
+def count_user(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Atualiza os contadores de usuários (total e ativos) do dashboard"""
+    if raw:
+        return
+    if created:
+        increment_counters({TOTAL_USERS: 1, ACTIVE_USERS: int(instance.is_active)})
+    elif update_fields is None or 'is_active' in update_fields:
+        was_active = getattr(instance, '_loaded_is_active', None)
+        if was_active is not None and was_active != instance.is_active:
+            increment_counters({ACTIVE_USERS: 1 if instance.is_active else -1})
+    else:
+        return
+    instance._loaded_is_active = instance.is_active
+
+
+@receiver(post_delete, sender=User)
+def uncount_user(sender, instance, **kwargs):
+    increment_counters({TOTAL_USERS: -1, ACTIVE_USERS: -int(instance.is_active)})
+
+
+@receiver(post_save, sender=UserProfile)
+def count_profile(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """
+    Atualiza os contadores de usuários por função e departamento. Roda antes
+    de UserProfile.save() atualizar os valores carregados, então
+    _loaded_values ainda tem a função e o departamento anteriores.
+    """
+    if raw:
+        return
+    if created:
+        increment_counters({role_key(instance.role): 1, department_key(instance.department): 1})
+        return
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None:
+        return
+    amounts = {}
+    for field, key in (('role', role_key), ('department', department_key)):
+        if update_fields is not None and field not in update_fields:
+            continue
+        old, new = loaded.get(field), getattr(instance, field)
+        if field in loaded and old != new:
+            amounts[key(old)] = amounts.get(key(old), 0) - 1
+            amounts[key(new)] = amounts.get(key(new), 0) + 1
+    increment_counters(amounts)
+
+
+@receiver(post_delete, sender=UserProfile)
+def uncount_profile(sender, instance, **kwargs):
+    increment_counters({role_key(instance.role): -1, department_key(instance.department): -1})
+
+
+@receiver(post_save, sender=LoginHistory)
+def count_login(sender, instance, created, raw=False, **kwargs):
+    """
+    Soma o login às contagens diárias e à consolidação por usuário (a
+    gravação em lote chama add_logins e add_user_logins)
+    """
+    if created and not raw:
+        add_logins([instance.login_time])
+        add_user_logins([instance])
+
+
+class Notification(models.Model):
+    """
+    Notificação para um usuário (accounts.notifications)
+    """
+    LEVEL_CHOICES = [
+        ('info', 'Informação'),
+        ('success', 'Sucesso'),
+        ('warning', 'Aviso'),
+        ('danger', 'Urgente'),
+    ]
+
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Destinatário'
+    )
+    title = models.CharField(
+        max_length=200,
+        verbose_name='Título'
+    )
+    message = models.TextField(
+        blank=True,
+        verbose_name='Mensagem'
+    )
+    level = models.CharField(
+        max_length=10,
+        choices=LEVEL_CHOICES,
+        default='info',
+        verbose_name='Nível'
+    )
+    url = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Link'
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        verbose_name='Criada em'
+    )
+    read_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Lida em'
+    )
+
+    class Meta:
+        verbose_name = 'Notificação'
+        verbose_name_plural = 'Notificações'
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Notificações recentes de um usuário (menu do cabeçalho)
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notification_recipient_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient_id} - {self.title}"
+
+    def get_level_icon(self):
+        return {
+            'info': 'bi-info-circle text-primary',
+            'success': 'bi-check-circle text-success',
+            'warning': 'bi-exclamation-triangle text-warning',
+            'danger': 'bi-exclamation-octagon text-danger',
+        }.get(self.level, 'bi-info-circle text-primary')
+
+
+@receiver(post_save, sender=Notification)
+def count_unread_notification(sender, instance, created, raw=False, **kwargs):
+    """
+    Mantém UserProfile.unread_notifications em criações individuais;
+    notify_users e mark_read atualizam o contador em lote
+    """
+    if created and not raw and instance.read_at is None:
+        add_unread([instance.recipient_id], 1)
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_unread_notification(sender, instance, **kwargs):
+    if instance.read_at is None:
+        add_unread([instance.recipient_id], -1)
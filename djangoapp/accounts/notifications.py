@@ -0,0 +1,196 @@
+"""
+Notificações dos usuários.
+
+- O total de não lidas fica desnormalizado em UserProfile.unread_notifications
+  (sem COUNT(*) por página) e em cache (get_unread_count): o contador do
+  cabeçalho não faz consulta.
+- notify_users() cria notificações em lote (bulk_create + um UPDATE dos
+  contadores por lote); broadcast() envia para um departamento e/ou função.
+- stream_unread_counts() entrega o total por Server-Sent Events no servidor
+  ASGI (project.asgi), consultando apenas o cache; no WSGI o navegador
+  reconecta a cada NOTIFICATION_POLL_INTERVAL segundos.
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .backends import invalidate_cached_user
+
+NOTIFICATION_CACHE_PREFIX = 'accounts:notifications'
+
+# Notificações criadas e contadores atualizados por lote
+BATCH_SIZE = 1000
+
+
+def unread_key(user_id):
+    return f'{NOTIFICATION_CACHE_PREFIX}:unread:{user_id}'
+
+
+def get_unread_count(user):
+    """
+    Total de notificações não lidas do usuário, lido do cache. Sem cache, usa
+    o perfil já carregado com o usuário da sessão (ver invalidate_unread_counts).
+    """
+    from django.contrib.auth.models import User
+
+    count = cache.get(unread_key(user.pk))
+    if count is not None:
+        return count
+    if not User.profile.is_cached(user):
+        return load_unread_count(user.pk)
+    profile = getattr(user, 'profile', None)
+    count = profile.unread_notifications if profile else 0
+    cache.set(unread_key(user.pk), count, getattr(settings, 'NOTIFICATION_CACHE_TIMEOUT', 300))
+    return count
+
+
+def load_unread_count(user_id):
+    """Lê o total de não lidas do banco e o guarda no cache"""
+    from .models import UserProfile
+
+    count = (
+        UserProfile.objects.filter(user_id=user_id)
+        .values_list('unread_notifications', flat=True)
+        .first()
+    ) or 0
+    cache.set(unread_key(user_id), count, getattr(settings, 'NOTIFICATION_CACHE_TIMEOUT', 300))
+    return count
+
+
+def invalidate_unread_counts(user_ids):
+    """
+    Remove do cache o total de não lidas e o usuário da sessão (que traz o
+    perfil com o contador), após o commit da transação atual
+    """
+    user_ids = list(user_ids)
+
+    def invalidate():
+        cache.delete_many([unread_key(user_id) for user_id in user_ids])
+        for user_id in user_ids:
+            invalidate_cached_user(user_id)
+
+    transaction.on_commit(invalidate)
+
+
+def add_unread(user_ids, amount):
+    """Soma `amount` (pode ser negativo) ao total de não lidas dos usuários"""
+    from .models import UserProfile
+
+    UserProfile.objects.filter(user_id__in=user_ids).update(
+        unread_notifications=Greatest(F('unread_notifications') + amount, Value(0))
+    )
+    invalidate_unread_counts(user_ids)
+
+
+def notify_users(user_ids, title, message='', level='info', url=''):
+    """Cria a mesma notificação para vários usuários, em lotes"""
+    from .models import Notification
+
+    user_ids = list(user_ids)
+    created = 0
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        batch = user_ids[start:start + BATCH_SIZE]
+        with transaction.atomic():
+            Notification.objects.bulk_create(
+                Notification(
+                    recipient_id=user_id, title=title, message=message,
+                    level=level, url=url,
+                )
+                for user_id in batch
+            )
+            # bulk_create não envia sinais: contadores atualizados aqui
+            add_unread(batch, 1)
+        created += len(batch)
+    return created
+
+
+def broadcast(title, message='', level='info', url='', department=None, role=None):
+    """Notifica os usuários ativos de um departamento e/ou função"""
+    from .models import UserProfile
+
+    profiles = UserProfile.objects.filter(user__is_active=True)
+    if department is not None:
+        profiles = profiles.filter(department=department)
+    if role is not None:
+        profiles = profiles.filter(role=role)
+    user_ids = profiles.order_by().values_list('user_id', flat=True)
+    return notify_users(user_ids, title, message=message, level=level, url=url)
+
+
+def mark_read(user, ids=None):
+    """Marca como lidas as notificações informadas (ou todas) do usuário"""
+    from .models import Notification
+
+    unread = Notification.objects.filter(recipient=user, read_at__isnull=True)
+    if ids is not None:
+        unread = unread.filter(pk__in=ids)
+    with transaction.atomic():
+        updated = unread.update(read_at=timezone.now())
+        if updated:
+            add_unread([user.pk], -updated)
+    return updated
+
+
+def get_recent(user, limit=10):
+    from .models import Notification
+
+    return [
+        {
+            'id': notification.pk,
+            'title': notification.title,
+            'message': notification.message,
+            'level': notification.level,
+            'url': notification.url,
+            'read': notification.read_at is not None,
+            'created_at': notification.created_at.isoformat(),
+        }
+        for notification in Notification.objects.filter(recipient=user)[:limit]
+    ]
+
+
+def format_event(data, event='unread', retry=None):
+    lines = []
+    if retry is not None:
+        lines.append(f'retry: {retry}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def aget_unread_count(user_id):
+    count = await cache.aget(unread_key(user_id))
+    if count is None:
+        count = await sync_to_async(load_unread_count)(user_id)
+    return count
+
+
+async def stream_unread_counts(user_id, interval=None, duration=None):
+    """
+    Eventos SSE com o total de não lidas sempre que ele muda. Só o cache é
+    consultado a cada intervalo; ao fim de `duration` segundos o stream é
+    encerrado e o navegador reconecta (EventSource).
+    """
+    interval = interval or getattr(settings, 'NOTIFICATION_STREAM_INTERVAL', 2)
+    duration = duration or getattr(settings, 'NOTIFICATION_STREAM_DURATION', 300)
+    deadline = time.monotonic() + duration
+    last_count = None
+    last_sent = time.monotonic()
+    while time.monotonic() < deadline:
+        count = await aget_unread_count(user_id)
+        if count != last_count:
+            yield format_event({'unread': count}, retry=3000 if last_count is None else None)
+            last_count = count
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= 15:
+            # Comentário SSE: mantém a conexão aberta em proxies
+            yield ': ping\n\n'
+            last_sent = time.monotonic()
+        await asyncio.sleep(interval)
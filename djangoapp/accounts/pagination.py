@@ -0,0 +1,204 @@
+"""
+Paginação por cursor (keyset).
+
+Em vez de OFFSET + COUNT(*), cada página é buscada com um filtro sobre a
+chave de ordenação a partir do último (ou primeiro) registro da página
+anterior, usando o índice da ordenação. Páginas profundas custam o mesmo
+que a primeira. O total é opcional e aproximado (pg_class.reltuples).
+"""
+import base64
+import datetime
+import json
+
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Mantém os microssegundos (o DjangoJSONEncoder trunca em milissegundos)"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPage:
+    """Página de resultados com cursores para a próxima e a anterior"""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @cached_property
+    def next_cursor(self):
+        if not self.has_next:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], 'next')
+
+    @cached_property
+    def previous_cursor(self):
+        if not self.has_previous:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], 'previous')
+
+
+class KeysetPaginator:
+    """
+    Paginador por cursor. `ordering` deve identificar cada registro de forma
+    única (inclua a chave primária como desempate) e ter um índice
+    correspondente.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-pk',)):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = [
+            (field.lstrip('-'), field.startswith('-')) for field in ordering
+        ]
+
+    def encode_cursor(self, obj, direction):
+        values = [self._get_value(obj, field) for field, _ in self.ordering]
+        payload = json.dumps([direction, values], cls=CursorEncoder)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, values = json.loads(base64.urlsafe_b64decode(padded))
+            if direction not in ('next', 'previous') or len(values) != len(self.ordering):
+                raise ValueError(cursor)
+            return direction, [
+                self._to_python(field, value)
+                for (field, _), value in zip(self.ordering, values)
+            ]
+        except (ValueError, TypeError, json.JSONDecodeError) as error:
+            raise InvalidCursor(cursor) from error
+
+    def _get_value(self, obj, field):
+        if field == 'pk':
+            return obj.pk
+        return getattr(obj, field)
+
+    def _to_python(self, field, value):
+        model = self.queryset.model
+        if field == 'pk':
+            return model._meta.pk.to_python(value)
+        try:
+            return model._meta.get_field(field).to_python(value)
+        except Exception:
+            # Anotações (ex.: relevância da busca) voltam como no JSON
+            return value
+
+    def _after(self, values, reverse):
+        """
+        Filtro (a > x) | (a = x & b > y) | ... respeitando a direção de
+        cada campo da ordenação
+        """
+        condition = Q()
+        equal = Q()
+        for (field, descending), value in zip(self.ordering, values):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def _order_by(self, reverse):
+        return [
+            f'-{field}' if descending != reverse else field
+            for field, descending in self.ordering
+        ]
+
+    def _page_query(self, cursor):
+        direction, values = 'next', None
+        if cursor:
+            try:
+                direction, values = self.decode_cursor(cursor)
+            except InvalidCursor:
+                pass
+
+        reverse = direction == 'previous'
+        queryset = self.queryset.order_by(*self._order_by(reverse))
+        if values is not None:
+            queryset = queryset.filter(self._after(values, reverse))
+        return queryset[:self.per_page + 1], reverse, values
+
+    def get_page(self, cursor=None):
+        """Retorna a página do cursor (ou a primeira se o cursor for inválido)"""
+        queryset, reverse, values = self._page_query(cursor)
+        return self._build_page(list(queryset), reverse, values)
+
+    async def aget_page(self, cursor=None):
+        """get_page com o ORM assíncrono (views ASGI)"""
+        queryset, reverse, values = self._page_query(cursor)
+        return self._build_page([row async for row in queryset], reverse, values)
+
+    def _build_page(self, rows, reverse, values):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+            return KeysetPage(rows, self, has_next=True, has_previous=has_more)
+        return KeysetPage(rows, self, has_next=has_more, has_previous=values is not None)
+
+    @cached_property
+    def approximate_count(self):
+        """Total aproximado (apenas sem filtros), sem COUNT(*)"""
+        return approximate_count(self.queryset)
+
+
+def approximate_count(queryset):
+    """
+    Total aproximado de registros da tabela a partir das estatísticas do
+    PostgreSQL (pg_class.reltuples, somando as partições). Retorna None para
+    querysets filtrados ou em outros bancos.
+    """
+    if connection.vendor != 'postgresql' or queryset.query.has_filters():
+        return None
+    table = queryset.model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint FROM pg_class c "
+            "WHERE c.oid = %s::regclass "
+            "OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)",
+            [table, table],
+        )
+        return cursor.fetchone()[0]
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator do Django que usa o total aproximado quando não há filtros,
+    evitando o COUNT(*) em tabelas grandes (usado no admin)
+    """
+    # Abaixo deste total as estatísticas podem estar desatualizadas e o
+    # COUNT(*) é barato
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        estimate = approximate_count(self.object_list)
+        if estimate is None or estimate < self.exact_count_threshold:
+            return super().count
+        return estimate
@@ -0,0 +1,222 @@
+"""
+Particionamento mensal do histórico de logins (apenas PostgreSQL).
+
+A tabela accounts_loginhistory é particionada por intervalo de login_time,
+com uma partição por mês (accounts_loginhistory_pAAAAMM) e uma partição
+padrão para valores fora dos intervalos criados. Remover o histórico antigo
+passa a ser um DETACH/DROP de partição em vez de um DELETE de milhões de
+linhas.
+
+Se a manutenção ficar parada por mais de months_ahead meses, os logins dos
+meses sem partição caem na partição padrão; ao criar a partição desses
+meses, create_partition move as linhas da padrão para ela.
+"""
+import datetime
+
+from django.db import transaction
+
+TABLE = 'accounts_loginhistory'
+DEFAULT_PARTITION = f'{TABLE}_default'
+SEQUENCE = f'{TABLE}_part_id_seq'
+COLUMNS = '"id", "login_time", "ip_address", "user_agent", "user_id"'
+
+
+def is_supported(connection):
+    return connection.vendor == 'postgresql'
+
+
+def month_start(value):
+    return datetime.date(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return datetime.date(value.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+def is_partitioned(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(connection):
+    """
+    Retorna [(nome, início do mês)] das partições mensais existentes,
+    em ordem cronológica
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    prefix = f'{TABLE}_p'
+    partitions = []
+    for name in names:
+        suffix = name[len(prefix):]
+        if name.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+            month = datetime.date(int(suffix[:4]), int(suffix[4:]), 1)
+            partitions.append((name, month))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def create_partition(connection, month):
+    """
+    Cria (se não existir) a partição do mês informado. Linhas do mês que
+    estejam na partição padrão são movidas para a nova partição: com elas
+    na padrão, o PostgreSQL recusa a criação ("partition constraint for
+    default partition would be violated").
+    """
+    month = month_start(month)
+    name = partition_name(month)
+    start = f'{month.isoformat()} 00:00:00+00'
+    end = f'{add_months(month, 1).isoformat()} 00:00:00+00'
+    bounds = f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    in_month = f'"login_time" >= \'{start}\' AND "login_time" < \'{end}\''
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [f'"{name}"'])
+        if cursor.fetchone()[0]:
+            return name
+        # Sem novos INSERTs na partição padrão até a nova partição existir
+        cursor.execute(f'LOCK TABLE "{DEFAULT_PARTITION}" IN EXCLUSIVE MODE')
+        cursor.execute(f'SELECT 1 FROM "{DEFAULT_PARTITION}" WHERE {in_month} LIMIT 1')
+        if cursor.fetchone() is None:
+            cursor.execute(f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" {bounds}')
+            return name
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE {in_month} '
+            f'RETURNING {COLUMNS}) '
+            f'INSERT INTO "{name}" ({COLUMNS}) SELECT {COLUMNS} FROM moved'
+        )
+        cursor.execute(f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" {bounds}')
+    return name
+
+
+def ensure_partitions(connection, months_ahead=3, today=None):
+    """Garante as partições do mês atual e dos próximos `months_ahead` meses"""
+    current = month_start(today or datetime.date.today())
+    return [
+        create_partition(connection, add_months(current, offset))
+        for offset in range(months_ahead + 1)
+    ]
+
+
+def user_index_name(connection):
+    """
+    Nome que o Django dá ao índice da ForeignKey user: o estado das migrações
+    conta com esse índice (AlterField/RemoveField o procuram)
+    """
+    return connection.schema_editor()._create_index_name(TABLE, ['user_id'])
+
+
+def _rename_indexes(cursor, table):
+    """
+    Renomeia os índices de uma tabela renomeada (ALTER TABLE RENAME mantém
+    os nomes), liberando-os para a tabela nova
+    """
+    cursor.execute('SELECT indexname FROM pg_indexes WHERE tablename = %s', [table])
+    for (name,) in cursor.fetchall():
+        cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name[:59]}_old"')
+
+
+def drop_partition(connection, name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+        cursor.execute(f'DROP TABLE "{name}"')
+
+
+def convert_to_partitioned(connection):
+    """
+    Converte a tabela comum em uma tabela particionada por mês, copiando
+    os registros existentes. A chave primária passa a ser (id, login_time),
+    exigência do PostgreSQL para tabelas particionadas; o id continua único
+    por vir de uma sequência.
+    """
+    if is_partitioned(connection):
+        return
+    old = f'{TABLE}_old'
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{old}"')
+        _rename_indexes(cursor, old)
+        cursor.execute(f'CREATE SEQUENCE "{SEQUENCE}"')
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" ('
+            f'"id" bigint NOT NULL DEFAULT nextval(\'"{SEQUENCE}"\'), '
+            '"login_time" timestamp with time zone NOT NULL, '
+            '"ip_address" inet NULL, '
+            '"user_agent" text NOT NULL, '
+            '"user_id" integer NOT NULL '
+            'REFERENCES "auth_user" ("id") DEFERRABLE INITIALLY DEFERRED, '
+            'PRIMARY KEY ("id", "login_time")'
+            ') PARTITION BY RANGE ("login_time")'
+        )
+        cursor.execute(f'ALTER SEQUENCE "{SEQUENCE}" OWNED BY "{TABLE}"."id"')
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+        cursor.execute(
+            f'SELECT date_trunc(\'month\', min("login_time") AT TIME ZONE \'UTC\')::date '
+            f'FROM "{old}"'
+        )
+        first = cursor.fetchone()[0]
+
+    if first is not None:
+        month = month_start(first)
+        last = month_start(datetime.date.today())
+        while month <= last:
+            create_partition(connection, month)
+            month = add_months(month, 1)
+    ensure_partitions(connection)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO "{TABLE}" ("id", "login_time", "ip_address", "user_agent", "user_id") '
+            f'SELECT "id", "login_time", "ip_address", "user_agent", "user_id" FROM "{old}"'
+        )
+        cursor.execute(f'DROP TABLE "{old}"')
+        # Índice da ForeignKey na tabela particionada (criado em cada partição)
+        cursor.execute(f'CREATE INDEX "{user_index_name(connection)}" ON "{TABLE}" ("user_id")')
+        cursor.execute(
+            f'SELECT setval(\'"{SEQUENCE}"\', COALESCE((SELECT max("id") FROM "{TABLE}"), 0) + 1, false)'
+        )
+
+
+def convert_to_regular(connection):
+    """Desfaz convert_to_partitioned (usado na reversão da migração)"""
+    if not is_partitioned(connection):
+        return
+    old = f'{TABLE}_part'
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{old}"')
+        _rename_indexes(cursor, old)
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" ('
+            '"id" bigint NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY, '
+            '"login_time" timestamp with time zone NOT NULL, '
+            '"ip_address" inet NULL, '
+            '"user_agent" text NOT NULL, '
+            '"user_id" integer NOT NULL '
+            'REFERENCES "auth_user" ("id") DEFERRABLE INITIALLY DEFERRED)'
+        )
+        cursor.execute(f'CREATE INDEX "{user_index_name(connection)}" ON "{TABLE}" ("user_id")')
+        cursor.execute(
+            f'INSERT INTO "{TABLE}" ("id", "login_time", "ip_address", "user_agent", "user_id") '
+            f'OVERRIDING SYSTEM VALUE '
+            f'SELECT "id", "login_time", "ip_address", "user_agent", "user_id" FROM "{old}"'
+        )
+        cursor.execute(f'DROP TABLE "{old}" CASCADE')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('\"{TABLE}\"', 'id'), "
+            f'COALESCE((SELECT max("id") FROM "{TABLE}"), 0) + 1, false)'
+        )
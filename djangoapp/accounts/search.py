@@ -0,0 +1,134 @@
+"""
+Busca de usuários (lista de usuários) e busca global do cabeçalho.
+
+O filtro usa icontains, que no PostgreSQL gera UPPER(coluna::text) LIKE
+UPPER('%termo%'). A migração 0005 cria índices GIN pg_trgm exatamente sobre
+essas expressões, então a busca é resolvida por índice em vez de varrer a
+tabela. Os usuários que casam nos campos do usuário e nos campos do perfil
+são combinados com UNION, para que cada tabela use os seus índices.
+
+Em outros bancos (SQLite nos testes) a mesma consulta funciona sem índice.
+
+A busca global combina usuários (apenas staff) e links do menu visíveis
+para o usuário, com os resultados guardados no cache por usuário.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, FloatField, IntegerField, Q, Value, When
+from django.db.models.functions import Cast, Greatest
+from django.urls import reverse
+
+from .menu import get_permission_snapshot, search_menu
+from .models import UserProfile
+
+USER_SEARCH_FIELDS = ('username', 'first_name', 'last_name', 'email')
+PROFILE_SEARCH_FIELDS = ('department', 'phone')
+
+
+def _contains(fields, query, prefix=''):
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{prefix}{field}__icontains': query})
+    return condition
+
+
+def matching_user_ids(query):
+    """Subconsulta com os ids dos usuários cujo usuário ou perfil contém o termo"""
+    users = User.objects.filter(
+        _contains(USER_SEARCH_FIELDS, query)
+    ).order_by().values('pk')
+    profiles = UserProfile.objects.filter(
+        _contains(PROFILE_SEARCH_FIELDS, query)
+    ).order_by().values('user_id')
+    return users.union(profiles)
+
+
+def rank_expression(query):
+    """Expressão de relevância do resultado (maior é melhor)"""
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        fields = [*USER_SEARCH_FIELDS, *(f'profile__{f}' for f in PROFILE_SEARCH_FIELDS)]
+        # double precision: o valor volta idêntico nos cursores da paginação
+        return Cast(
+            Greatest(*(TrigramSimilarity(field, query) for field in fields)),
+            FloatField(),
+        )
+
+    # Fallback: correspondência exata > prefixo > contém
+    return Case(
+        When(Q(username__iexact=query) | Q(email__iexact=query), then=Value(3)),
+        When(
+            Q(username__istartswith=query) | Q(first_name__istartswith=query) |
+            Q(last_name__istartswith=query),
+            then=Value(2),
+        ),
+        default=Value(1),
+        output_field=IntegerField(),
+    )
+
+
+def search_users(queryset, query):
+    """
+    Filtra o queryset de usuários pelo termo de busca (usuário, nome,
+    sobrenome, email, departamento e telefone), ordenado por relevância
+    """
+    query = query.strip()
+    if not query:
+        return queryset
+    return queryset.filter(pk__in=matching_user_ids(query)).annotate(
+        search_rank=rank_expression(query)
+    ).order_by('-search_rank', 'username')
+
+
+def _user_result(user):
+    return {
+        'id': user.pk,
+        'name': user.get_full_name() or user.username,
+        'username': user.username,
+        'email': user.email,
+        'department': user.profile.department,
+        'role': user.profile.get_role_display(),
+        'url': reverse('accounts:user_detail', args=[user.pk]),
+    }
+
+
+def global_search(user, query):
+    """
+    Busca global do cabeçalho: links do menu visíveis para o usuário e,
+    para staff, usuários e perfis. Os resultados ficam no cache por usuário
+    (GLOBAL_SEARCH_CACHE_TIMEOUT) e cada grupo é limitado a
+    GLOBAL_SEARCH_LIMIT itens.
+    """
+    query = ' '.join(query.split())
+    if len(query) < getattr(settings, 'GLOBAL_SEARCH_MIN_LENGTH', 2):
+        return {'query': query, 'menu': [], 'users': []}
+
+    snapshot = get_permission_snapshot(user)
+    digest = hashlib.sha1(
+        repr((query.lower(), sorted(snapshot.perms), user.is_staff, user.is_superuser)).encode()
+    ).hexdigest()
+    key = f'accounts:search:{user.pk}:{digest}'
+    results = cache.get(key)
+    if results is not None:
+        return results
+
+    limit = getattr(settings, 'GLOBAL_SEARCH_LIMIT', 5)
+    results = {
+        'query': query,
+        'menu': [
+            {'title': str(item.title), 'section': str(section), 'url': item.url, 'icon': item.icon}
+            for item, section in search_menu(snapshot, query, limit)
+        ],
+        'users': [],
+    }
+    if user.is_staff or user.is_superuser:
+        users = search_users(User.objects.select_related('profile'), query)[:limit]
+        results['users'] = [_user_result(found) for found in users]
+
+    cache.set(key, results, getattr(settings, 'GLOBAL_SEARCH_CACHE_TIMEOUT', 60))
+    return results
@@ -0,0 +1,12 @@
+from django import template
+from ..avatars import INITIALS_SIZE, initials_avatar as build_avatar
+
+register = template.Library()
+
+@register.simple_tag(name='initials_avatar')
+def initials_avatar(user, size=INITIALS_SIZE):
+    # SVG com as iniciais embutido na página (ver accounts.avatars)
+    if user is None:
+        return build_avatar('')
+    name = user.get_full_name() or user.get_username()
+    return build_avatar(name, int(size))
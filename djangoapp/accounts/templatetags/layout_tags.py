@@ -0,0 +1,42 @@
+from django import template
+from project.instrumentation import span
+from ..layout import cached_fragment
+
+register = template.Library()
+
+
+class LayoutFragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        user = context.get('user')
+        if user is None:
+            return self.nodelist.render(context)
+        with span('layout_fragment'):
+            return cached_fragment(
+                context.get('request'), user, self.name.resolve(context),
+                lambda: self.nodelist.render(context),
+                vary_on=[value.resolve(context) for value in self.vary_on],
+            )
+
+
+@register.tag
+def layout_fragment(parser, token):
+    """
+    Guarda o trecho do layout no cache por usuário (ver accounts.layout):
+
+        {% layout_fragment 'header_user_menu' [valor ...] %}...{% endlayout_fragment %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' requer o nome do fragmento")
+    nodelist = parser.parse(('endlayout_fragment',))
+    parser.delete_first_token()
+    return LayoutFragmentNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
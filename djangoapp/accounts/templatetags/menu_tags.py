@@ -1,19 +1,35 @@
 from django import template
-from django.urls import resolve, reverse
-from ..menu import get_menu_items
+from project.instrumentation import span
+from ..layout import cached_fragment
+from ..menu import get_active_menu_ids, get_permission_snapshot, get_user_menu
 
 register = template.Library()
 
-@register.inclusion_tag('accounts/tags/menu.html', takes_context=True)
+@register.simple_tag(takes_context=True)
 def render_menu(context):
-    user = context['user']
-    request = context['request']
-    current_url = request.path
+    # Renderiza o template do menu na própria tag (como uma inclusion_tag)
+    # para que a instrumentação meça o tempo total do menu
+    with span('render_menu'):
+        user = context['user']
+        request = context['request']
+        current_url = request.path
 
-    menu_items = get_menu_items(user)
-    
-    return {
-        'menu_items': menu_items,
-        'current_url': current_url,
-        'user': user
-    }
\ No newline at end of file
+        # Itens ativos resolvidos pelo índice de prefixos de URL
+        active_ids = get_active_menu_ids(current_url)
+
+        def render():
+            # Permissões do menu resolvidas de uma só vez e menu compilado e
+            # filtrado a partir do cache (sem reconstruir a árvore)
+            menu_perms = get_permission_snapshot(user)
+            menu_items = get_user_menu(user, menu_perms)
+            menu_template = context.template.engine.get_template('accounts/tags/menu.html')
+            return menu_template.render(context.new({
+                'menu_items': menu_items,
+                'menu_perms': menu_perms,
+                'active_ids': active_ids,
+                'current_url': current_url,
+                'user': user
+            }))
+
+        # HTML guardado por usuário e conjunto de itens ativos (accounts.layout)
+        return cached_fragment(request, user, 'sidebar', render, vary_on=sorted(active_ids))
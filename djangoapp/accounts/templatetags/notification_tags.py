@@ -0,0 +1,12 @@
+from django import template
+from ..notifications import get_unread_count
+
+register = template.Library()
+
+@register.simple_tag(takes_context=True)
+def unread_notifications(context):
+    # Total lido do cache (ver accounts.notifications.get_unread_count)
+    user = context.get('user')
+    if user is None or not user.is_authenticated:
+        return 0
+    return get_unread_count(user)
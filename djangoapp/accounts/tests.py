@@ -1,3 +1,1267 @@
-from django.test import TestCase
+import asyncio
+import csv
+import datetime
+import gzip
+import importlib
+import io
+import tempfile
+import zipfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password, make_password
+from django.contrib.auth.models import User, Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.db import OperationalError, connection
+from django.db.backends.signals import connection_created
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, resolve, reverse
+from django.utils import timezone
+from PIL import Image
+
+import project.urls
+from project import instrumentation
+from project.assets import VENDOR_ASSETS, vendor_url
+from project.checks import check_vendor_files
+from project.db import metrics as db_metrics
+from project.testing import QueryBudgetMixin
+
+from . import menu
+from . import activity
+from . import hashing
+from . import partitions
+from .backends import ProfileModelBackend
+from .audit import LoginAuditWriter
+from .imports import import_users, read_csv
+from .layout import get_layout_version
+from .avatars import initials, initials_avatar, process_avatar, thumbnail_name
+from .pagination import KeysetPaginator
+from .search import global_search, search_users
+from .views import get_client_ip
+from . import notifications
+from . import urls as accounts_urls
+from .models import (
+    DailyLoginCount, DashboardCounter, LoginHistory, LoginLockout, Notification, UserLoginDay,
+    UserProfile,
+)
+from .menu import MenuItem, get_user_menu
+
+
+def get_permission(perm):
+    """Cria (se necessário) uma permissão no formato 'app_label.codename'"""
+    app_label, codename = perm.split('.')
+    content_type, _ = ContentType.objects.get_or_create(
+        app_label=app_label, model=codename.split('_', 1)[1]
+    )
+    permission, _ = Permission.objects.get_or_create(
+        codename=codename, content_type=content_type,
+        defaults={'name': codename},
+    )
+    return permission
+
+
+def menu_titles(items):
+    return [str(item.title) for item in items]
+
+
+def clear_compiled_menu():
+    for func in (menu.get_compiled_menu, menu.get_menu_permissions,
+                 menu.get_menu_digest, menu._get_filtered_menu,
+                 menu.get_menu_prefix_index, menu.get_active_menu_ids):
+        func.cache_clear()
+
+
+class MenuTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('joao', password='senha-forte-123')
+
+    def test_menu_without_permissions(self):
+        self.assertEqual(menu_titles(get_user_menu(self.user)), ['Principal'])
+
+    def test_menu_with_user_permission(self):
+        self.user.user_permissions.add(get_permission('sales.view_customer'))
+        user = User.objects.get(pk=self.user.pk)
+        sections = get_user_menu(user)
+        self.assertEqual(menu_titles(sections), ['Principal', 'Vendas'])
+        self.assertEqual(menu_titles(sections[1].children), ['Clientes'])
+
+    def test_group_permission_change_invalidates_cache(self):
+        group = Group.objects.create(name='Financeiro')
+        self.user.groups.add(group)
+        self.assertEqual(menu_titles(get_user_menu(self.user)), ['Principal'])
+
+        group.permissions.add(get_permission('financial.view_transaction'))
+        user = User.objects.get(pk=self.user.pk)
+        self.assertIn('Financeiro', menu_titles(get_user_menu(user)))
+
+    def test_staff_and_superuser_sections(self):
+        self.user.is_staff = True
+        sections = get_user_menu(self.user)
+        self.assertEqual(menu_titles(sections[-1].children), ['Configurações'])
+
+        self.user.is_superuser = True
+        sections = get_user_menu(self.user)
+        self.assertEqual(menu_titles(sections[-1].children), ['Configurações', 'Administração'])
+
+    def test_active_items(self):
+        def active_titles(path):
+            active_ids = menu.get_active_menu_ids(path)
+            return [str(item.title) for item in menu._walk(menu.get_compiled_menu())
+                    if item.id in active_ids]
+
+        self.assertEqual(active_titles('/'), ['Principal', 'Dashboard'])
+        self.assertEqual(active_titles('/temp/sales/new/'), ['Vendas', 'Vendas', 'Nova Venda'])
+        self.assertEqual(
+            active_titles('/temp/financial/payables/2/'),
+            ['Financeiro', 'Contas a Pagar'],
+        )
+        self.assertEqual(active_titles('/accounts/profile/'), [])
+
+
+class MenuQueryCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('maria', password='senha-forte-123')
+        group = Group.objects.create(name='Vendas')
+        group.permissions.add(get_permission('sales.view_sale'))
+        self.user.groups.add(group)
+        self.user.user_permissions.add(get_permission('inventory.view_product'))
+        self.template = Template('{% load menu_tags %}{% render_menu %}')
+
+    def render_sidebar(self):
+        user = User.objects.get(pk=self.user.pk)
+        request = RequestFactory().get('/')
+        with self.assertNumQueries(2):
+            html = self.template.render(Context({'user': user, 'request': request}))
+        # Com o cache quente a renderização não consulta o banco
+        with self.assertNumQueries(0):
+            self.template.render(Context({'user': user, 'request': request}))
+        return html
+
+    def test_sidebar_query_count(self):
+        html = self.render_sidebar()
+        self.assertIn('Lista de Vendas', html)
+        self.assertIn('Lista de Produtos', html)
+        self.assertNotIn('Contas a Pagar', html)
+
+    def test_sidebar_query_count_independent_of_menu_size(self):
+        definition = menu.get_menu_definition()
+        extra = [
+            MenuItem(
+                title=f'Módulo {i}',
+                permissions=[f'module{i}.view_item'],
+                children=[
+                    MenuItem(
+                        title=f'Item {i}-{j}',
+                        url=f'/temp/module{i}/{j}/',
+                        permissions=[f'module{i}.view_item', f'module{i}.change_item'],
+                    )
+                    for j in range(10)
+                ],
+            )
+            for i in range(50)
+        ]
+        self.addCleanup(clear_compiled_menu)
+        clear_compiled_menu()
+        with mock.patch.object(menu, 'get_menu_definition', return_value=definition + extra):
+            html = self.render_sidebar()
+        self.assertIn('Lista de Vendas', html)
+        self.assertNotIn('Módulo 1', html)
+
+
+class LoginAuditTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('ana', password='senha-forte-123')
+
+    def test_writer_flushes_in_batch(self):
+        writer = LoginAuditWriter(batch_size=1000, flush_interval=3600)
+        for _ in range(3):
+            writer.enqueue(LoginHistory(user=self.user, ip_address='10.0.0.1'))
+        self.assertEqual(LoginHistory.objects.count(), 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(writer.flush(), 3)
+        inserts = [q for q in queries.captured_queries if 'INSERT INTO "accounts_loginhistory"' in q['sql']]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(LoginHistory.objects.filter(user=self.user).count(), 3)
+        # bulk_create não envia sinais: a consolidação diária é feita no flush
+        self.assertEqual(DailyLoginCount.objects.get(date=timezone.localdate()).logins, 3)
+        self.assertEqual(UserLoginDay.objects.get(user=self.user).logins, 3)
+        self.assertEqual(writer.pending(), 0)
+
+    def test_writer_requeues_batch_on_transient_error(self):
+        writer = LoginAuditWriter(batch_size=1000, flush_interval=3600, max_attempts=2)
+        for _ in range(2):
+            writer.enqueue(LoginHistory(user=self.user))
+        with mock.patch.object(LoginHistory.objects, 'bulk_create', side_effect=OperationalError):
+            self.assertEqual(writer.flush(), 0)
+        self.assertEqual(writer.pending(), 2)
+        writer.enqueue(LoginHistory(user=self.user))
+        self.assertEqual(writer.flush(), 3)
+        self.assertEqual(LoginHistory.objects.count(), 3)
+
+        # Com a falha persistente, o lote é descartado após max_attempts
+        writer.enqueue(LoginHistory(user=self.user))
+        with mock.patch.object(LoginHistory.objects, 'bulk_create', side_effect=OperationalError), \
+                self.assertLogs('accounts.audit', 'ERROR'):
+            writer.flush()
+            writer.flush()
+        self.assertEqual(writer.pending(), 0)
+
+    def test_writer_drops_only_invalid_rows(self):
+        writer = LoginAuditWriter(batch_size=1000, flush_interval=3600)
+        writer.enqueue(LoginHistory(user=self.user))
+        writer.enqueue(LoginHistory(user=self.user, login_time=None))
+        writer.enqueue(LoginHistory(user=self.user))
+        with self.assertLogs('accounts.audit', 'ERROR'):
+            self.assertEqual(writer.flush(), 2)
+        self.assertEqual(LoginHistory.objects.count(), 2)
+        self.assertEqual(UserLoginDay.objects.get(user=self.user).logins, 2)
+
+    @override_settings(LOGIN_AUDIT_ASYNC=False)
+    def test_login_records_history_synchronously(self):
+        self.client.post(
+            reverse('accounts:login'),
+            {'username': 'ana', 'password': 'senha-forte-123'},
+            REMOTE_ADDR='10.0.0.2',
+        )
+        entry = LoginHistory.objects.get(user=self.user)
+        self.assertEqual(entry.ip_address, '10.0.0.2')
+
+
+@override_settings(LOGIN_THROTTLE_USERNAME_LIMIT=3, LOGIN_THROTTLE_IP_LIMIT=5, LOGIN_AUDIT_ASYNC=False)
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('ana', password='senha-forte-123')
+
+    def attempt(self, username='ana', password='errada', ip='10.0.0.1'):
+        return self.client.post(
+            reverse('accounts:login'), {'username': username, 'password': password}, REMOTE_ADDR=ip,
+        )
+
+    def test_username_lockout_rejects_before_hashing(self):
+        self.assertEqual(self.attempt().status_code, 200)
+        self.assertEqual(self.attempt().status_code, 200)
+        response = self.attempt(username=' ANA ')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(int(response['Retry-After']), 900)
+
+        lockout = LoginLockout.objects.get()
+        self.assertEqual(
+            (lockout.scope, lockout.user, lockout.ip_address, lockout.attempts),
+            ('username', self.user, '10.0.0.1', 3),
+        )
+
+        # Bloqueado: nem o hash da senha nem consultas, mesmo com a senha correta
+        with mock.patch('django.contrib.auth.forms.authenticate') as authenticate, \
+                self.assertNumQueries(0):
+            response = self.attempt(password='senha-forte-123')
+        authenticate.assert_not_called()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(LoginLockout.objects.count(), 1)
+
+        # O dono da conta continua entrando de outro IP
+        self.assertEqual(self.attempt(password='senha-forte-123', ip='10.0.0.2').status_code, 302)
+
+    @override_settings(LOGIN_THROTTLE_ACCOUNT_LIMIT=4)
+    def test_account_lockout_across_ips(self):
+        for i in range(3):
+            self.assertEqual(self.attempt(ip=f'10.0.1.{i}').status_code, 200)
+        self.assertEqual(self.attempt(ip='10.0.1.9').status_code, 429)
+        self.assertEqual(LoginLockout.objects.get().scope, 'account')
+        self.assertEqual(self.attempt(password='senha-forte-123', ip='10.0.2.1').status_code, 429)
+
+    def test_forwarded_for_ignored_without_trusted_proxy(self):
+        for i in range(3):
+            self.client.post(
+                reverse('accounts:login'), {'username': 'ana', 'password': 'errada'},
+                REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'192.0.2.{i}',
+            )
+        self.assertEqual(LoginLockout.objects.get().ip_address, '10.0.0.1')
+
+        request = RequestFactory().get(
+            '/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='192.0.2.1, 198.51.100.7',
+        )
+        self.assertEqual(get_client_ip(request), '10.0.0.1')
+        with override_settings(TRUSTED_PROXY_COUNT=1):
+            self.assertEqual(get_client_ip(request), '198.51.100.7')
+
+    def test_lockout_survives_cache_eviction(self):
+        for _ in range(3):
+            self.attempt()
+        cache.clear()
+        # Bloqueio lido do LoginLockout e devolvido ao cache
+        with mock.patch('django.contrib.auth.forms.authenticate') as authenticate:
+            self.assertEqual(self.attempt(password='senha-forte-123').status_code, 429)
+        authenticate.assert_not_called()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.attempt(password='senha-forte-123').status_code, 429)
+
+    def test_ip_lockout_across_usernames(self):
+        for i in range(4):
+            self.assertEqual(self.attempt(username=f'usuario{i}').status_code, 200)
+        self.assertEqual(self.attempt(username='outro').status_code, 429)
+        self.assertEqual(self.attempt(password='senha-forte-123').status_code, 429)
+        self.assertEqual(self.attempt(password='senha-forte-123', ip='10.0.0.9').status_code, 302)
+        self.assertEqual(LoginLockout.objects.get().scope, 'ip')
+
+    def test_successful_login_resets_username_attempts(self):
+        self.attempt()
+        self.attempt()
+        self.assertEqual(self.attempt(password='senha-forte-123').status_code, 302)
+        self.client.logout()
+        self.attempt()
+        self.assertEqual(self.attempt().status_code, 200)
+
+    @override_settings(LOGIN_THROTTLE_ENABLED=False)
+    def test_disabled(self):
+        for _ in range(4):
+            self.assertEqual(self.attempt().status_code, 200)
+        self.assertFalse(LoginLockout.objects.exists())
+
+
+class PruneLoginHistoryTests(TestCase):
+    def test_prune_archives_old_entries(self):
+        user = User.objects.create_user('pedro', password='senha-forte-123')
+        now = timezone.now()
+        LoginHistory.objects.create(user=user, login_time=now - datetime.timedelta(days=800))
+        recent = LoginHistory.objects.create(user=user, login_time=now)
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            call_command(
+                'prune_login_history', retention_months=12,
+                archive_dir=archive_dir, stdout=StringIO(),
+            )
+            archives = list(Path(archive_dir).glob('*.csv.gz'))
+            self.assertEqual(len(archives), 1)
+            with gzip.open(archives[0], 'rt') as archive:
+                self.assertEqual(len(archive.readlines()), 2)
+
+        self.assertQuerysetEqual(LoginHistory.objects.all(), [recent])
+
+
+class AvatarTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root.name, AVATAR_PROCESSING_ASYNC=False,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user('carla', password='senha-forte-123')
+
+    def upload(self, color='red'):
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 600), color).save(buffer, 'PNG')
+        return SimpleUploadedFile('avatar.png', buffer.getvalue(), content_type='image/png')
+
+    def test_thumbnails_generated_when_avatar_changes(self):
+        profile = self.user.profile
+        profile.avatar = self.upload()
+        profile.save()
+
+        profile.refresh_from_db()
+        self.assertTrue(profile.avatar_hash)
+        for size in (32, 64, 300):
+            name = thumbnail_name(profile.avatar_hash, size)
+            self.assertTrue(default_storage.exists(name))
+            with default_storage.open(name) as thumb:
+                self.assertEqual(Image.open(thumb).size, (size, size))
+        self.assertIn(profile.avatar_hash, profile.avatar_medium_url)
+
+    def test_avatar_not_reprocessed_when_other_fields_change(self):
+        profile = self.user.profile
+        profile.avatar = self.upload()
+        profile.save()
+
+        profile = type(profile).objects.get(pk=profile.pk)
+        profile.phone = '(92) 99999-0000'
+        with mock.patch('accounts.models.schedule_avatar_processing') as schedule:
+            profile.save()
+        schedule.assert_not_called()
+
+    @override_settings(USER_CACHE_TIMEOUT=300)
+    def test_processing_invalidates_cached_user_and_layout(self):
+        profile = self.user.profile
+        profile.avatar = self.upload()
+        profile.save()
+        type(profile).objects.filter(pk=profile.pk).update(avatar_hash='')
+
+        backend = ProfileModelBackend()
+        self.assertEqual(backend.get_user(self.user.pk).profile.avatar_hash, '')
+        version = get_layout_version(self.user.pk)
+
+        content_hash = process_avatar(profile.pk)
+        self.assertEqual(backend.get_user(self.user.pk).profile.avatar_hash, content_hash)
+        self.assertNotEqual(get_layout_version(self.user.pk), version)
+
+
+@override_settings(LOGIN_AUDIT_ASYNC=False)
+class UserProfileSaveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lucas', password='senha-forte-123')
+
+    def test_login_query_count(self):
+        # Bloqueios ativos (accounts.throttling), usuário (formulário),
+        # sessão (verificação da chave e INSERT), last_login, histórico de
+        # login, logins do dia (UPDATE e, no primeiro login do dia, INSERT),
+        # logins do usuário no dia (SELECT e INSERT ou UPDATE) e UPDATE da
+        # sessão por set_expiry
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('accounts:login'),
+                {'username': 'lucas', 'password': 'senha-forte-123'},
+            )
+        self.assertEqual(response.status_code, 302)
+        sql = [
+            query['sql'] for query in queries.captured_queries
+            if 'SAVEPOINT' not in query['sql']
+        ]
+        self.assertEqual(len(sql), 11, sql)
+        self.assertFalse([q for q in sql if 'accounts_userprofile' in q])
+
+    def test_user_save_skips_clean_profile(self):
+        user = User.objects.select_related('profile').get(pk=self.user.pk)
+        user.first_name = 'Lucas'
+        with self.assertNumQueries(1):
+            user.save()
+
+    def test_user_save_persists_dirty_profile(self):
+        user = User.objects.select_related('profile').get(pk=self.user.pk)
+        user.profile.department = 'TI'
+        with CaptureQueriesContext(connection) as queries:
+            user.save()
+        # Contadores do dashboard (departamentos) à parte
+        sql = [
+            query['sql'] for query in queries.captured_queries
+            if 'accounts_dashboardcounter' not in query['sql'] and 'SAVEPOINT' not in query['sql']
+        ]
+        self.assertEqual(len(sql), 2, sql)
+        self.assertIn('"department"', sql[1])
+        self.assertNotIn('"bio"', sql[1])
+        self.assertEqual(User.objects.get(pk=user.pk).profile.department, 'TI')
+
+    def test_full_save_keeps_unread_counter(self):
+        profile = UserProfile.objects.get(user=self.user)
+        Notification.objects.create(recipient=self.user, title='Pedido pendente')
+        profile.bio = 'Vendas'
+        profile.save()
+        profile.refresh_from_db()
+        self.assertEqual((profile.bio, profile.unread_notifications), ('Vendas', 1))
+
+    def test_full_save_inserts_missing_row(self):
+        # Semântica do Django: sem linha para o UPDATE, o save faz INSERT
+        profile = UserProfile.objects.get(user=self.user)
+        UserProfile.objects.filter(pk=profile.pk).delete()
+        profile.save()
+        self.assertTrue(UserProfile.objects.filter(pk=profile.pk).exists())
+
+
+class PasswordHashingTests(TestCase):
+    SCRYPT_FIRST = [
+        'accounts.hashers.ScryptPasswordHasher',
+        'accounts.hashers.PBKDF2PasswordHasher',
+    ]
+
+    def test_hashes_are_compatible_with_django_hashers(self):
+        encoded = make_password('senha-forte-123')
+        self.assertTrue(encoded.startswith('pbkdf2_sha256$'))
+        self.assertTrue(PBKDF2PasswordHasher().verify('senha-forte-123', encoded))
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000, LOGIN_AUDIT_ASYNC=False)
+    def test_login_upgrades_hasher_and_cost(self):
+        user = User.objects.create_user('lucas', password='senha-forte-123')
+        self.assertIn('$1000$', user.password)
+
+        with override_settings(PASSWORD_HASHERS=self.SCRYPT_FIRST, PASSWORD_SCRYPT_WORK_FACTOR=2 ** 10):
+            response = self.client.post(
+                reverse('accounts:login'),
+                {'username': 'lucas', 'password': 'senha-forte-123'},
+            )
+            self.assertEqual(response.status_code, 302)
+            user.refresh_from_db()
+            self.assertTrue(user.password.startswith('scrypt$'))
+            self.assertTrue(user.check_password('senha-forte-123'))
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_hashing_in_process_pool(self):
+        self.addCleanup(hashing.shutdown_executor)
+        encoded = make_password('senha-forte-123')
+        self.assertIsNotNone(hashing.get_executor())
+        self.assertIn('$1000$', encoded)
+        self.assertTrue(check_password('senha-forte-123', encoded))
+        self.assertFalse(check_password('outra-senha', encoded))
+
+
+class CleanupSessionsTests(TestCase):
+    def test_removes_only_expired_sessions(self):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            Session(session_key=f'expirada{i}', session_data='', expire_date=now - datetime.timedelta(days=1))
+            for i in range(5)
+        )
+        Session.objects.create(session_key='valida', session_data='', expire_date=now + datetime.timedelta(days=1))
+
+        call_command('cleanup_sessions', batch_size=2, stdout=StringIO())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['valida'])
+
+
+class DashboardStatsTests(TestCase):
+    def counters(self):
+        return dict(DashboardCounter.objects.exclude(value=0).values_list('key', 'value'))
+
+    def test_counters_follow_writes_and_match_rebuild(self):
+        ana = User.objects.create_user('ana', password='senha-forte-123')
+        bia = User.objects.create_user('bia', password='senha-forte-123')
+        User.objects.create_user('caio', password='senha-forte-123').delete()
+        ana.profile.role = 'manager'
+        ana.profile.department = 'Vendas'
+        ana.profile.save()
+        bia.is_active = False
+        bia.save()
+        LoginHistory.objects.create(user=ana)
+
+        incremental = self.counters()
+        self.assertEqual(incremental['users:total'], 2)
+        self.assertEqual(incremental['users:active'], 1)
+        self.assertEqual(incremental['role:manager'], 1)
+        self.assertEqual(incremental['department:Vendas'], 1)
+        self.assertEqual(DailyLoginCount.objects.get().logins, 1)
+
+        total = DashboardCounter.objects.get(key='users:total')
+        DashboardCounter.objects.filter(key='users:total').update(value=50)
+        DashboardCounter.objects.create(key='department:Removido', value=3)
+        call_command('rebuild_dashboard_stats', stdout=StringIO())
+        self.assertEqual(self.counters(), incremental)
+        self.assertEqual(DailyLoginCount.objects.get().logins, 1)
+        # Atualizado no lugar, sem apagar e recriar a tabela
+        self.assertEqual(DashboardCounter.objects.get(key='users:total').pk, total.pk)
+
+    def test_migration_seeds_rollups(self):
+        User.objects.create_user('ana', password='senha-forte-123')
+        LoginHistory.objects.create(user=User.objects.get())
+        expected = self.counters()
+        DashboardCounter.objects.all().delete()
+        DailyLoginCount.objects.all().delete()
+
+        seed_migration = importlib.import_module('accounts.migrations.0007_dashboard_rollups')
+        seed_migration.seed_rollups(django_apps, mock.Mock(connection=connection))
+        self.assertEqual(self.counters(), expected)
+        self.assertEqual(DailyLoginCount.objects.get().logins, 1)
+
+    def test_dashboard_reads_stats_from_cache(self):
+        cache.clear()
+        staff = User.objects.create_user('ana', password='senha-forte-123', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['stats']['active_users'], 1)
+        self.assertContains(response, 'Usuários Ativos')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('dashboard'))
+        self.assertFalse([q for q in queries.captured_queries if 'accounts_dashboard' in q['sql']])
+
+        user = User.objects.create_user('bia', password='senha-forte-123')
+        self.client.force_login(user)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['stats'], {})
+
+
+class NotificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ana = User.objects.create_user('ana', password='senha-forte-123')
+        self.bia = User.objects.create_user('bia', password='senha-forte-123')
+        for user, department in ((self.ana, 'Vendas'), (self.bia, 'TI')):
+            user.profile.department = department
+            user.profile.save()
+
+    def unread(self, user):
+        return UserProfile.objects.get(user=user).unread_notifications
+
+    def test_broadcast_fans_out_and_updates_counters(self):
+        self.assertEqual(notifications.broadcast('Meta batida', department='Vendas'), 1)
+        Notification.objects.create(recipient=self.ana, title='Pedido pendente')
+        self.assertEqual(self.unread(self.ana), 2)
+        self.assertEqual(self.unread(self.bia), 0)
+
+        notifications.mark_read(self.ana, [Notification.objects.filter(recipient=self.ana).first().pk])
+        self.assertEqual(self.unread(self.ana), 1)
+        Notification.objects.filter(recipient=self.ana, read_at__isnull=True).delete()
+        self.assertEqual(self.unread(self.ana), 0)
+
+    def test_badge_comes_from_cache(self):
+        notifications.notify_users([self.ana.pk], 'Bem-vinda')
+        self.client.force_login(self.ana)
+        self.client.get(reverse('dashboard'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, 'id="notificationBadge">1<')
+        self.assertFalse([q for q in queries.captured_queries if 'notification' in q['sql']])
+
+        response = self.client.post(reverse('accounts:notifications_read'), {'id': ['', 'abc']})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.unread(self.ana), 1)
+        response = self.client.post(reverse('accounts:notifications_read'))
+        self.assertEqual(response.json(), {'unread': 0})
+        response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, 'id="notificationBadge" hidden>0<')
+
+    def test_stream_sends_unread_count(self):
+        notifications.notify_users([self.ana.pk], 'Bem-vinda')
+        self.client.force_login(self.ana)
+        # WSGI: um evento e reconexão do navegador
+        response = self.client.get(reverse('accounts:notifications_stream'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertIn(b'data: {"unread": 1}', response.content)
+
+    @override_settings(NOTIFICATION_STREAM_INTERVAL=0.01, NOTIFICATION_STREAM_DURATION=0.05)
+    async def test_asgi_stream_keeps_connection_open(self):
+        await sync_to_async(self.async_client.force_login)(self.ana)
+        response = await self.async_client.get(reverse('accounts:notifications_stream'))
+        self.assertTrue(response.streaming)
+        events = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(events), 1)
+        self.assertIn(b'data: {"unread": 0}', events[0])
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user('staff', password='senha-forte-123', is_staff=True)
+        self.bruno = User.objects.create_user('bruno', first_name='Bruno <&>')
+        self.bruno.profile.department = 'Financeiro'
+        self.bruno.profile.save()
+        LoginHistory.objects.create(user=self.bruno, ip_address='10.0.0.1')
+        self.client.force_login(self.staff)
+
+    def content(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_user_csv_honours_search(self):
+        response = self.client.get(
+            reverse('accounts:user_export', args=['csv']), {'search': 'financeiro'}
+        )
+        self.assertIn('attachment;', response['Content-Disposition'])
+        lines = self.content(response).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('ID,Usuário,Nome'))
+        self.assertIn('bruno,Bruno <&>', lines[1])
+
+    def test_csv_neutralizes_formulas(self):
+        self.bruno.first_name = '=HYPERLINK("http://exemplo.com")'
+        self.bruno.save()
+        LoginHistory.objects.create(user=self.bruno, user_agent='@SUM(1+1)')
+        response = self.client.get(reverse('accounts:user_export', args=['csv']), {'search': 'bruno'})
+        rows = list(csv.reader(self.content(response).decode('utf-8-sig').splitlines()))
+        self.assertEqual(rows[1][2], '\'=HYPERLINK("http://exemplo.com")')
+        response = self.client.get(
+            reverse('accounts:login_history_export', args=['csv']), {'user': self.bruno.pk}
+        )
+        self.assertIn("'@SUM(1+1)", self.content(response).decode('utf-8-sig'))
+
+    def test_login_history_xlsx(self):
+        response = self.client.get(
+            reverse('accounts:login_history_export', args=['xlsx']), {'user': self.bruno.pk}
+        )
+        with zipfile.ZipFile(io.BytesIO(self.content(response))) as archive:
+            self.assertIn('xl/workbook.xml', archive.namelist())
+            sheet = archive.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 2)
+        self.assertIn('>bruno<', sheet)
+        self.assertIn('>10.0.0.1<', sheet)
+
+    def test_requires_staff_and_known_format(self):
+        self.assertEqual(self.client.get(reverse('accounts:user_export', args=['pdf'])).status_code, 404)
+        self.client.force_login(self.bruno)
+        response = self.client.get(reverse('accounts:user_export', args=['csv']))
+        self.assertEqual(response.status_code, 302)
+
+
+class ImportUsersTests(TestCase):
+    CSV = (
+        'username,email,first_name,password,role,department\n'
+        'ana,ana@empresa.com,Ana,senha-forte-123,manager,Vendas\n'
+        'bia,bia@empresa.com,Bia,,,Vendas\n'
+        'existente,,,,,\n'
+        'ana,outra@empresa.com,,,,\n'
+        'caio,email-invalido,,123,chefe,\n'
+        'duda,bia@empresa.com,,,,\n'
+    )
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user('existente')
+
+    def test_bulk_import_reports_row_errors(self):
+        with CaptureQueriesContext(connection) as queries:
+            result = import_users(read_csv(io.StringIO(self.CSV)), workers=1)
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual([line for line, _ in result.errors], [4, 5, 6, 7])
+        self.assertIn('email', result.errors[2][1])
+        self.assertIn('role', result.errors[2][1])
+        self.assertIn('password', result.errors[2][1])
+        # Consultas por lote, não por linha (fora os contadores novos do dashboard)
+        sql = [
+            q['sql'] for q in queries.captured_queries
+            if 'dashboardcounter' not in q['sql'] and 'SAVEPOINT' not in q['sql']
+        ]
+        # Usuários e emails existentes, INSERT dos usuários e dos perfis
+        self.assertEqual(len(sql), 4)
+
+        ana = User.objects.select_related('profile').get(username='ana')
+        self.assertTrue(ana.check_password('senha-forte-123'))
+        self.assertEqual((ana.profile.role, ana.profile.department), ('manager', 'Vendas'))
+        self.assertFalse(User.objects.get(username='bia').has_usable_password())
+        counters = dict(DashboardCounter.objects.values_list('key', 'value'))
+        self.assertEqual(counters['users:total'], 3)
+        self.assertEqual(counters['department:Vendas'], 2)
+
+    def test_command_and_upload_view(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write(self.CSV)
+        self.addCleanup(Path(file.name).unlink)
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_users', file.name, '--dry-run', '--workers=1', stdout=stdout, stderr=stderr)
+        self.assertIn('2 linhas válidas, 4 com erro', stdout.getvalue())
+        self.assertIn('linha 5:', stderr.getvalue())
+        self.assertFalse(User.objects.filter(username='ana').exists())
+
+        staff = User.objects.create_user('staff', is_staff=True)
+        self.client.force_login(staff)
+        upload = SimpleUploadedFile('usuarios.csv', self.CSV.encode('utf-8-sig'), 'text/csv')
+        with override_settings(USER_IMPORT_WORKERS=1):
+            response = self.client.post(reverse('accounts:user_import'), {'file': upload})
+        self.assertEqual(response.context['result'].created, 2)
+        self.assertContains(response, 'já existe')
+
+    def test_upload_view_limits_plain_passwords(self):
+        staff = User.objects.create_user('staff', is_staff=True)
+        self.client.force_login(staff)
+        csv_data = 'username,password\n' + ''.join(
+            f'usuario{i},senha-forte-{i}23\n' for i in range(3)
+        )
+        with override_settings(USER_IMPORT_WEB_MAX_PASSWORDS=2):
+            response = self.client.post(reverse('accounts:user_import'), {
+                'file': SimpleUploadedFile('usuarios.csv', csv_data.encode(), 'text/csv'),
+            })
+            self.assertIsNone(response.context['result'])
+            self.assertContains(response, 'O arquivo tem 3 senhas em texto')
+            self.assertFalse(User.objects.filter(username__startswith='usuario').exists())
+
+            response = self.client.post(reverse('accounts:user_import'), {
+                'file': SimpleUploadedFile('usuarios.csv', csv_data.encode(), 'text/csv'),
+                'dry_run': 'on',
+            })
+            self.assertEqual(response.context['result'].valid, 3)
+
+        with override_settings(USER_IMPORT_WEB_MAX_PASSWORDS=3), \
+                mock.patch('accounts.views.import_users', wraps=import_users) as mocked:
+            response = self.client.post(reverse('accounts:user_import'), {
+                'file': SimpleUploadedFile('usuarios.csv', csv_data.encode(), 'text/csv'),
+            })
+        self.assertEqual(response.context['result'].created, 3)
+        self.assertEqual(mocked.call_args.kwargs['workers'], 1)
+
+
+class UserSearchTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', email='alice@empresa.com')
+        self.alberto = User.objects.create_user('alberto', first_name='Malice')
+        self.bruno = User.objects.create_user('bruno')
+        self.bruno.profile.department = 'Financeiro'
+        self.bruno.profile.save()
+
+    def test_search_user_and_profile_fields(self):
+        users = User.objects.select_related('profile')
+        self.assertEqual(list(search_users(users, 'alice')), [self.alice, self.alberto])
+        self.assertEqual(list(search_users(users, 'financ')), [self.bruno])
+        self.assertEqual(search_users(users, '  ').count(), 3)
+
+    def test_user_list_view_search(self):
+        staff = User.objects.create_user('staff', password='senha-forte-123', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('accounts:user_list'), {'search': 'financeiro'})
+        self.assertEqual(list(response.context['page_obj']), [self.bruno])
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('rita')
+        now = timezone.now()
+        # Horários repetidos: o desempate é feito pela chave primária
+        self.entries = [
+            LoginHistory.objects.create(
+                user=self.user, login_time=now - datetime.timedelta(hours=i // 2)
+            )
+            for i in range(7)
+        ]
+        self.expected = sorted(
+            self.entries, key=lambda e: (e.login_time, e.pk), reverse=True
+        )
+
+    def test_navigate_forward_and_back(self):
+        paginator = KeysetPaginator(
+            LoginHistory.objects.filter(user=self.user), 3, ordering=('-login_time', '-pk')
+        )
+        pages = [paginator.get_page()]
+        while pages[-1].has_next:
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([e for page in pages for e in page], self.expected)
+        self.assertFalse(pages[0].has_previous)
+
+        previous = paginator.get_page(pages[2].previous_cursor)
+        self.assertEqual(list(previous), list(pages[1]))
+        self.assertTrue(previous.has_next)
+        self.assertTrue(previous.has_previous)
+
+    def test_invalid_cursor_returns_first_page(self):
+        paginator = KeysetPaginator(LoginHistory.objects.all(), 3, ordering=('-login_time', '-pk'))
+        self.assertEqual(list(paginator.get_page('inválido')), self.expected[:3])
+
+
+class GlobalSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user('gestor', password='senha-forte-123', is_staff=True)
+        self.user = User.objects.create_user('operador', password='senha-forte-123')
+        self.user.user_permissions.add(get_permission('sales.view_sale'))
+        self.url = reverse('accounts:global_search')
+
+    def test_menu_results_respect_permissions(self):
+        self.client.force_login(self.user)
+        data = self.client.get(self.url, {'q': 'vend'}).json()
+        self.assertEqual(
+            [item['title'] for item in data['menu']],
+            ['Lista de Vendas', 'Relatórios de Vendas'],
+        )
+        self.assertEqual(data['users'], [])
+        data = self.client.get(self.url, {'q': 'financeiro'}).json()
+        self.assertEqual(data['menu'], [])
+
+    def test_staff_results_include_users_and_are_cached(self):
+        self.client.force_login(self.staff)
+        data = self.client.get(self.url, {'q': 'operad'}).json()
+        self.assertEqual([user['username'] for user in data['users']], ['operador'])
+
+        staff = User.objects.get(pk=self.staff.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(global_search(staff, 'operad'), data)
+
+
+class ProfileBackendTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('sofia', password='senha-forte-123')
+        self.client.force_login(self.user)
+        self.client.get(reverse('dashboard'))
+
+    def page_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries.captured_queries]
+
+    @override_settings(USER_CACHE_TIMEOUT=0)
+    def test_user_and_profile_loaded_in_one_query(self):
+        sql = self.page_queries()
+        # Sessão lida do cache; usuário com perfil (JOIN)
+        self.assertEqual(len(sql), 1, sql)
+        self.assertIn('accounts_userprofile', sql[0])
+
+    @override_settings(USER_CACHE_TIMEOUT=60)
+    def test_cached_user_skips_user_query(self):
+        self.page_queries()
+        sql = self.page_queries()
+        self.assertEqual(sql, [])
+
+        # Alterar o perfil invalida o cache
+        self.user.profile.department = 'RH'
+        self.user.profile.save()
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.wsgi_request.user.profile.department, 'RH')
+
+    def test_sessions_from_model_backend_stay_logged_in(self):
+        client = Client()
+        client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        response = client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user, self.user)
+
+    def test_failed_login_checks_password_once(self):
+        with mock.patch.object(User, 'check_password', autospec=True, return_value=False) as check:
+            self.assertIsNone(authenticate(username='sofia', password='errada'))
+        self.assertEqual(check.call_count, 1)
+
+
+class ConnectionMetricsTests(TestCase):
+    def setUp(self):
+        db_metrics.reset()
+
+    def test_counts_requests_and_new_connections(self):
+        self.client.get(reverse('accounts:login'))
+        self.client.get(reverse('accounts:login'))
+        connection_created.send(sender=connection.__class__, connection=connection)
+
+        metrics = db_metrics.get_metrics()
+        self.assertEqual(metrics['requests'], 2)
+        self.assertEqual(metrics['connections_opened'], 1)
+        self.assertEqual(metrics['physical_connections'], 1)
+        self.assertEqual(metrics['reuse_ratio'], 0.5)
+
+    def test_endpoint_is_staff_only(self):
+        user = User.objects.create_user('lia', password='senha-forte-123')
+        self.client.force_login(user)
+        response = self.client.get(reverse('db_metrics'))
+        self.assertEqual(response.status_code, 302)
+
+        user.is_staff = True
+        user.save()
+        response = self.client.get(reverse('db_metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('reuse_ratio', response.json())
+
+
+class ViewQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Consultas por view com caches frios; N+1 ou consultas novas falham aqui"""
+    query_budgets = {
+        'dashboard': 6,
+        'accounts:profile': 6,
+        'accounts:profile_edit': 4,
+        'accounts:user_list': 5,
+        'accounts:user_detail': 8,
+        'accounts:global_search': 5,
+    }
+
+    def setUp(self):
+        self.staff = User.objects.create_user('ana', password='senha-forte-123', is_staff=True)
+        for i in range(15):
+            User.objects.create_user(f'usuario{i}', first_name='Usuário')
+            LoginHistory.objects.create(user=self.staff)
+        self.client.force_login(self.staff)
+
+    def get(self, name, *args, **params):
+        cache.clear()
+        clear_compiled_menu()
+        response = self.client.get(reverse(name, args=args), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_views_within_budget(self):
+        for response in (
+            self.get('dashboard'),
+            self.get('accounts:profile'),
+            self.get('accounts:profile_edit'),
+            self.get('accounts:user_list'),
+            self.get('accounts:user_list', search='usuario1'),
+            self.get('accounts:user_detail', self.staff.pk),
+            self.get('accounts:global_search', q='usuario1'),
+        ):
+            with self.subTest(response.resolver_match.view_name):
+                self.assertWithinQueryBudget(response)
+
+    def test_duplicates_keyed_on_params_hash(self):
+        stats = instrumentation.RequestStats()
+        execute = mock.Mock()
+        for params in ((1,), [1], (2,), [['10.0.0.1']], [['10.0.0.1']]):
+            stats(execute, 'SELECT %s', params, False, {})
+        stats(execute, 'INSERT %s', iter([(1,), (2,)]), True, {})
+        self.assertEqual(stats.queries, 6)
+        # Sem hash (lista de IPs) conta como distinta
+        self.assertEqual(stats.duplicates, 1)
+
+    @override_settings(INSTRUMENTATION_HEADERS=True)
+    def test_debug_headers_and_metrics(self):
+        instrumentation.reset()
+        response = self.get('dashboard')
+        self.assertEqual(response['X-DB-Queries'], str(response.instrumentation.queries))
+        self.assertIn('render_menu;dur=', response['Server-Timing'])
+        self.assertIn('template;dur=', response['Server-Timing'])
+
+        metrics = self.get('metrics').json()
+        self.assertEqual(metrics['views']['dashboard']['requests'], 1)
+
+
+class StaticAssetsTests(TestCase):
+    COMPRESSED_MANIFEST = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'project.storage.CompressedManifestStaticFilesStorage'},
+    }
+
+    def test_collectstatic_hashes_and_compresses(self):
+        with tempfile.TemporaryDirectory() as root, override_settings(
+            STATIC_ROOT=root, STORAGES=self.COMPRESSED_MANIFEST, STATIC_SERVE=True,
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            from django.contrib.staticfiles.storage import staticfiles_storage
+            hashed = staticfiles_storage.stored_name('accounts/css/base.css')
+            self.assertNotEqual(hashed, 'accounts/css/base.css')
+            self.assertTrue(Path(root, hashed + '.gz').exists())
+
+            response = self.client.get(f'/static/{hashed}', HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['Content-Type'], 'text/css')
+            self.assertIn('immutable', response['Cache-Control'])
+            body = gzip.decompress(b''.join(response.streaming_content))
+            self.assertIn(b'--primary-color', body)
+
+            response = self.client.get('/static/accounts/css/base.css')
+            self.assertNotIn('Content-Encoding', response)
+            self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+
+            response = self.client.get(
+                '/static/accounts/css/base.css', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+            )
+            self.assertEqual(response.status_code, 304)
+
+    def test_vendor_asset_is_served_locally(self):
+        self.assertEqual(VENDOR_ASSETS['bootstrap.css'], 'vendor/bootstrap/bootstrap.min.css')
+        self.assertEqual(vendor_url('bootstrap.css'), '/static/vendor/bootstrap/bootstrap.min.css')
+
+    def test_missing_vendor_files_fail_deploy_check(self):
+        with mock.patch('project.assets.finders.find', return_value=None):
+            errors = check_vendor_files(None)
+        self.assertEqual([error.id for error in errors], ['project.E001'])
+        self.assertIn('vendor/inter/inter.css', errors[0].msg)
+        with mock.patch('project.assets.finders.find', return_value='/tmp/arquivo'):
+            self.assertEqual(check_vendor_files(None), [])
+
+    def test_initials_avatar(self):
+        self.assertEqual(initials('Maria da Silva'), 'MS')
+        self.assertEqual(initials('ana'), 'AN')
+        self.assertEqual(initials(''), '?')
+        uri = initials_avatar('<Ana> Souza', 40)
+        self.assertTrue(uri.startswith('data:image/svg+xml,'))
+        self.assertIn('%26lt%3BS%3C/text%3E', uri)
+
+        user = User.objects.create_user('joao', first_name='João', last_name='Souza')
+        html = Template('{% load avatar_tags %}{% initials_avatar user 40 %}').render(Context({'user': user}))
+        self.assertIn('%3EJS%3C/text%3E', html)
+
+
+class LayoutFragmentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('ana', password='senha-forte-123', first_name='Ana')
+        self.client.force_login(self.user)
+
+    def test_header_and_sidebar_served_from_cache(self):
+        self.client.get(reverse('dashboard'))
+        with mock.patch('accounts.templatetags.menu_tags.get_user_menu') as get_user_menu, \
+                mock.patch('accounts.templatetags.avatar_tags.build_avatar') as build_avatar:
+            response = self.client.get(reverse('dashboard'))
+        get_user_menu.assert_not_called()
+        build_avatar.assert_not_called()
+        self.assertContains(response, 'class="sidebar-menu"')
+        self.assertContains(response, 'id="globalSearch"')
+
+    def test_sidebar_varies_with_active_item(self):
+        dashboard = self.client.get(reverse('dashboard')).content.decode()
+        profile = self.client.get(reverse('accounts:profile')).content.decode()
+        self.assertIn('menu-link active', dashboard)
+        self.assertNotEqual(
+            dashboard.count('menu-link active'), profile.count('menu-link active'),
+        )
+
+    def test_user_and_profile_changes_invalidate(self):
+        self.client.get(reverse('dashboard'))
+        self.user.first_name = 'Beatriz'
+        self.user.save()
+        self.assertContains(self.client.get(reverse('dashboard')), '<div class="user-name">Beatriz</div>')
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertContains(self.client.get(reverse('dashboard')), 'Gerenciar Usuários')
+
+        self.user.profile.role = 'admin'
+        self.user.profile.save()
+        self.assertContains(self.client.get(reverse('dashboard')), self.user.profile.get_role_display())
+
+    def test_login_does_not_invalidate(self):
+        version = get_layout_version(self.user.pk)
+        self.client.login(username='ana', password='senha-forte-123')
+        self.assertEqual(get_layout_version(self.user.pk), version)
+
+
+@override_settings(ASYNC_VIEWS=True, LOGIN_AUDIT_ASYNC=False, LOGIN_THROTTLE_ENABLED=False)
+class AsyncViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reload_urls()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.reload_urls()
+
+    @staticmethod
+    def reload_urls():
+        # As views são escolhidas ao carregar as URLs
+        importlib.reload(accounts_urls)
+        importlib.reload(project.urls)
+        clear_url_caches()
+
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user(
+            'ana', password='senha-forte-123', first_name='Ana', is_staff=True,
+        )
+        self.other = User.objects.create_user('bia', password='senha-forte-123', first_name='Beatriz')
+
+    def test_async_views_selected(self):
+        for url in ('/', '/accounts/profile/', '/accounts/users/', '/accounts/login/'):
+            self.assertTrue(asyncio.iscoroutinefunction(resolve(url).func), url)
+
+    async def test_login_and_pages(self):
+        response = await self.async_client.post(
+            reverse('accounts:login'), {'username': 'ana', 'password': 'senha-forte-123'},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(await LoginHistory.objects.filter(user=self.staff).acount(), 1)
+
+        response = await self.async_client.get(reverse('accounts:profile'))
+        self.assertContains(response, 'Ana')
+        # Consultas feitas nas threads do sync_to_async também são medidas
+        self.assertGreater(response.instrumentation.queries, 0)
+        response = await self.async_client.get(reverse('accounts:user_list'))
+        self.assertContains(response, 'Beatriz')
+        response = await self.async_client.get(reverse('accounts:user_detail', args=[self.other.pk]))
+        self.assertContains(response, 'Beatriz')
+        response = await self.async_client.get(reverse('accounts:user_detail', args=[9999]))
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+
+    async def test_permissions(self):
+        response = await self.async_client.get(reverse('accounts:profile'))
+        self.assertRedirects(
+            response, f"{reverse('accounts:login')}?next={reverse('accounts:profile')}",
+            fetch_redirect_response=False,
+        )
+        await sync_to_async(self.async_client.force_login)(self.other)
+        response = await self.async_client.get(reverse('accounts:user_list'))
+        self.assertEqual(response.status_code, 302)
+
+
+class LoginActivityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('ana', password='senha-forte-123')
+        self.today = timezone.localdate()
+
+    def login_at(self, days_ago, ip, user_agent='Mozilla/5.0 (X11; Linux x86_64)'):
+        login_time = timezone.now() - datetime.timedelta(days=days_ago)
+        return LoginHistory.objects.create(
+            user=self.user, login_time=login_time, ip_address=ip, user_agent=user_agent,
+        )
+
+    def test_rollup_maintained_incrementally(self):
+        self.login_at(0, '10.0.0.1', 'Firefox')
+        self.login_at(0, '10.0.0.2', 'Chrome')
+        self.login_at(0, '10.0.0.1', 'Safari')
+        self.login_at(1, '10.0.0.3')
+
+        day = UserLoginDay.objects.get(user=self.user, date=self.today)
+        self.assertEqual((day.logins, day.distinct_ips), (3, 2))
+        self.assertEqual(day.ip_addresses, ['10.0.0.1', '10.0.0.2'])
+        self.assertEqual(day.last_user_agent, 'Safari')
+        self.assertEqual(UserLoginDay.objects.filter(user=self.user).count(), 2)
+
+        fields = (
+            'pk', 'date', 'logins', 'ip_addresses', 'distinct_ips', 'last_login_time', 'last_user_agent',
+        )
+        incremental = list(UserLoginDay.objects.order_by('date').values_list(*fields))
+        UserLoginDay.objects.filter(date=self.today).update(logins=99, last_user_agent='')
+        stale = UserLoginDay.objects.create(
+            user=self.user, date=self.today - datetime.timedelta(days=5), logins=1,
+        )
+        # Atualiza as linhas no lugar (mesmo pk) e remove os dias sem histórico
+        self.assertEqual(activity.rebuild_user_logins(30), 2)
+        self.assertEqual(list(UserLoginDay.objects.order_by('date').values_list(*fields)), incremental)
+        self.assertFalse(UserLoginDay.objects.filter(pk=stale.pk).exists())
+
+    def test_activity_reads_only_rollup(self):
+        self.login_at(0, '10.0.0.1')
+        self.login_at(1, '10.0.0.2')
+        self.login_at(2, '10.0.0.1')
+        # O histórico pode ser arquivado sem alterar os totais
+        LoginHistory.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            stats = activity.get_login_activity(self.user.pk)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('accounts_loginhistory', queries[0]['sql'])
+        self.assertEqual((stats['logins'], stats['active_days'], stats['distinct_ips']), (3, 3, 2))
+        self.assertEqual(len(stats['daily']), activity.ACTIVITY_DAYS)
+        self.assertEqual(stats['daily'][-1], {
+            'date': self.today, 'logins': 1, 'distinct_ips': 1, 'percent': 100,
+        })
+        self.assertEqual(sum(week['logins'] for week in stats['weekly']), 3)
+
+        # Em cache até um novo login do usuário ser consolidado
+        with self.assertNumQueries(0):
+            activity.get_login_activity(self.user.pk)
+        self.login_at(0, '10.0.0.9')
+        self.assertEqual(activity.get_login_activity(self.user.pk)['distinct_ips'], 3)
+
+    def test_user_detail_and_admin_charts(self):
+        self.login_at(0, '10.0.0.1')
+        staff = User.objects.create_superuser('admin', password='senha-forte-123')
+        self.client.force_login(staff)
+
+        response = self.client.get(reverse('accounts:user_detail', args=[self.user.pk]))
+        self.assertContains(response, 'Atividade de Login')
+        self.assertEqual(response.context['activity']['logins'], 1)
+
+        response = self.client.get(reverse('admin:auth_user_change', args=[self.user.pk]))
+        self.assertContains(response, 'Logins por semana')
+        self.assertContains(response, '10.0.0.1')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Particionamento apenas no PostgreSQL')
+class LoginHistoryPartitionTests(TestCase):
+    def default_rows(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM "{partitions.DEFAULT_PARTITION}"')
+            return cursor.fetchone()[0]
+
+    def test_create_partition_moves_rows_from_default(self):
+        # Mês sem partição (manutenção parada): o login cai na partição padrão
+        month = partitions.add_months(partitions.month_start(datetime.date.today()), 24)
+        login_time = datetime.datetime.combine(month, datetime.time(12), tzinfo=datetime.timezone.utc)
+        entry = LoginHistory.objects.create(user=User.objects.create_user('ana'), login_time=login_time)
+        self.assertEqual(self.default_rows(), 1)
+
+        name = partitions.partition_name(month)
+        self.assertEqual(partitions.ensure_partitions(connection, months_ahead=0, today=month), [name])
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT "id" FROM "{name}"')
+            self.assertEqual(cursor.fetchall(), [(entry.pk,)])
+        self.assertEqual(self.default_rows(), 0)
+        self.assertTrue(LoginHistory.objects.filter(pk=entry.pk).exists())
+        # Idempotente
+        self.assertEqual(partitions.create_partition(connection, month), name)
+
+    def test_user_index_matches_migration_state(self):
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(cursor, partitions.TABLE)
+        self.assertIn(partitions.user_index_name(connection), indexes)
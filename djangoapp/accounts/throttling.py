@@ -0,0 +1,168 @@
+"""
+Limite de tentativas de login contra força bruta e credential stuffing.
+
+As tentativas inválidas são contadas no cache em janelas deslizantes de
+LOGIN_THROTTLE_WINDOW segundos (aproximadas por dois contadores de janela
+fixa: o atual e o anterior, ponderado pelo quanto dele ainda cabe na
+janela), em até três escopos:
+
+- ip: todas as tentativas do IP (LOGIN_THROTTLE_IP_LIMIT);
+- username: o usuário informado a partir do mesmo IP
+  (LOGIN_THROTTLE_USERNAME_LIMIT). O bloqueio não impede o dono da conta
+  de entrar de outro IP;
+- account: o usuário informado a partir de qualquer IP
+  (LOGIN_THROTTLE_ACCOUNT_LIMIT, desligado com 0, o padrão). Barra
+  tentativas distribuídas contra uma conta, mas qualquer um pode bloquear
+  o dono da conta só sabendo o nome de usuário.
+
+Ao passar do limite, a chave fica bloqueada por LOGIN_THROTTLE_LOCKOUT
+segundos e um LoginLockout é gravado. O IP vem de get_client_ip
+(accounts.views), que só usa o X-Forwarded-For atrás de proxies
+confiáveis (TRUSTED_PROXY_COUNT).
+
+Durante o bloqueio a view de login responde 429 depois de uma única
+leitura do cache, sem calcular o hash da senha. O LoginLockout é a cópia
+do bloqueio que não é descartada: sem bloqueio no cache (chave descartada
+ao atingir CACHE_MAX_ENTRIES, ou cache reiniciado), os bloqueios ativos
+são conferidos no banco e voltam ao cache.
+
+Os contadores dependem de cache.incr atômico e sem descarte: em produção
+use CACHE_BACKEND=redis (manage.py check --deploy avisa, accounts.W001).
+No file o incr é leitura e gravação e tentativas simultâneas podem ser
+perdidas.
+"""
+import hashlib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_ipv46_address
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import LoginLockout
+
+THROTTLE_CACHE_PREFIX = 'accounts:login-throttle'
+
+
+def get_config():
+    return {
+        'enabled': getattr(settings, 'LOGIN_THROTTLE_ENABLED', True),
+        'window': getattr(settings, 'LOGIN_THROTTLE_WINDOW', 300),
+        'lockout': getattr(settings, 'LOGIN_THROTTLE_LOCKOUT', 900),
+        'ip': getattr(settings, 'LOGIN_THROTTLE_IP_LIMIT', 30),
+        'username': getattr(settings, 'LOGIN_THROTTLE_USERNAME_LIMIT', 5),
+        'account': getattr(settings, 'LOGIN_THROTTLE_ACCOUNT_LIMIT', 0),
+    }
+
+
+def normalize_username(username):
+    return (username or '').strip().lower()[:150]
+
+
+def _hash(value):
+    # Chaves de cache de tamanho fixo e sem caracteres inválidos
+    return hashlib.sha1(value.encode()).hexdigest()[:20]
+
+
+class LoginThrottle:
+    """Tentativas de login de um IP com um usuário"""
+
+    def __init__(self, ip_address, username):
+        self.config = get_config()
+        self.username = normalize_username(username)
+        self.targets = {'ip': _hash(ip_address or '')}
+        if self.username:
+            self.targets['username'] = _hash(f'{self.username}|{ip_address or ""}')
+            if self.config['account']:
+                self.targets['account'] = _hash(self.username)
+        try:
+            validate_ipv46_address(ip_address)
+        except ValidationError:
+            # X-Forwarded-For inválido
+            ip_address = None
+        # Endereço gravado nos LoginLockout
+        self.ip_address = ip_address
+
+    def _key(self, kind, scope, *parts):
+        return ':'.join((THROTTLE_CACHE_PREFIX, kind, scope, self.targets[scope], *map(str, parts)))
+
+    def retry_after(self):
+        """
+        Segundos até o fim do bloqueio (0 sem bloqueio). Uma leitura do
+        cache e, se não houver bloqueio nele, uma consulta aos LoginLockout
+        ativos; chamado antes de qualquer trabalho com a senha.
+        """
+        if not self.config['enabled']:
+            return 0
+        keys = [self._key('lock', scope) for scope in self.targets]
+        locked_until = max(cache.get_many(keys).values(), default=0) or self._stored_lock()
+        return max(0, int(locked_until - time.time() + 0.999))
+
+    def _stored_lock(self):
+        """Fim do bloqueio gravado no banco; devolve o bloqueio ao cache"""
+        targets = Q(scope='ip', ip_address=self.ip_address)
+        if 'username' in self.targets:
+            targets |= Q(scope='username', username=self.username, ip_address=self.ip_address)
+        if 'account' in self.targets:
+            targets |= Q(scope='account', username=self.username)
+        now = time.time()
+        locked_until = 0
+        for scope, until in LoginLockout.objects.filter(
+            targets, locked_until__gt=timezone.now()
+        ).values_list('scope', 'locked_until'):
+            until = until.timestamp()
+            cache.add(self._key('lock', scope), until, max(1, int(until - now)))
+            locked_until = max(locked_until, until)
+        return locked_until
+
+    def _hit(self, scope, now):
+        window = self.config['window']
+        bucket, elapsed = divmod(now, window)
+        current = self._key('count', scope, int(bucket))
+        try:
+            count = cache.incr(current)
+        except ValueError:
+            cache.add(current, 0, window * 2)
+            count = cache.incr(current)
+        previous = cache.get(self._key('count', scope, int(bucket) - 1), 0)
+        # Janela deslizante: parte da janela anterior que ainda está nela
+        return count + previous * (1 - elapsed / window)
+
+    def failure(self):
+        """Registra uma tentativa inválida; retorna os segundos de bloqueio"""
+        if not self.config['enabled']:
+            return 0
+        now = time.time()
+        lockout = self.config['lockout']
+        for scope in self.targets:
+            attempts = self._hit(scope, now)
+            if attempts >= self.config[scope]:
+                # add: só a primeira requisição a passar do limite grava o evento
+                if cache.add(self._key('lock', scope), now + lockout, lockout):
+                    self._record(scope, int(attempts))
+        return self.retry_after()
+
+    def success(self):
+        """Login válido: zera as tentativas do usuário (não as do IP)"""
+        if not self.config['enabled'] or 'username' not in self.targets:
+            return
+        bucket = int(time.time() // self.config['window'])
+        cache.delete_many([
+            self._key('count', scope, b)
+            for scope in self.targets if scope != 'ip'
+            for b in (bucket, bucket - 1)
+        ])
+
+    def _record(self, scope, attempts):
+        LoginLockout.objects.create(
+            scope=scope,
+            username=self.username,
+            user=User.objects.filter(username__iexact=self.username).first() if self.username else None,
+            ip_address=self.ip_address,
+            attempts=attempts,
+            locked_until=timezone.now() + timedelta(seconds=self.config['lockout']),
+        )
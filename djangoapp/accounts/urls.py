@@ -1,23 +1,41 @@
+from django.conf import settings
 from django.urls import path, re_path
-from . import views
+from . import views, views_async
 from .views_temp import temp_view
 
 app_name = 'accounts'
 
+
+def _view(name):
+    """Variante assíncrona da view (accounts.views_async) com ASYNC_VIEWS"""
+    return getattr(views_async if settings.ASYNC_VIEWS else views, name)
+
+
 urlpatterns = [
     # Autenticação
-    path('login/', views.login_view, name='login'),
+    path('login/', _view('login_view'), name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('register/', views.register_view, name='register'),
     
     # Perfil
-    path('profile/', views.profile_view, name='profile'),
+    path('profile/', _view('profile_view'), name='profile'),
     path('profile/edit/', views.profile_edit_view, name='profile_edit'),
     path('password/change/', views.password_change_view, name='password_change'),
     
     # Gerenciamento de usuários (staff only)
-    path('users/', views.user_list_view, name='user_list'),
-    path('users/<int:user_id>/', views.user_detail_view, name='user_detail'),
+    path('users/', _view('user_list_view'), name='user_list'),
+    path('users/<int:user_id>/', _view('user_detail_view'), name='user_detail'),
+    path('users/import/', views.user_import_view, name='user_import'),
+    path('users/export/<str:fmt>/', views.user_export_view, name='user_export'),
+    path('logins/export/<str:fmt>/', views.login_history_export_view, name='login_history_export'),
+    
+    # Busca global do cabeçalho
+    path('search/', views.global_search_view, name='global_search'),
+
+    # Notificações do cabeçalho
+    path('notifications/', views.notification_list_view, name='notifications'),
+    path('notifications/read/', views.notification_read_view, name='notifications_read'),
+    path('notifications/stream/', views.notification_stream_view, name='notifications_stream'),
     
     # URLs temporárias - Será removido quando as URLs reais forem implementadas
     re_path(r'^temp/(?P<path>.*)$', temp_view, name='temp_view'),
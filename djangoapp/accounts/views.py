@@ -1,63 +1,115 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth import login, logout, authenticate, update_session_auth_hash
+from django.contrib.auth import login, logout, update_session_auth_hash
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db.models import Q
-from django.core.paginator import Paginator
-from .forms import LoginForm, UserRegisterForm, UserUpdateForm, ProfileUpdateForm
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+from asgiref.sync import sync_to_async
+from .forms import LoginForm, UserRegisterForm, UserUpdateForm, ProfileUpdateForm, UserImportForm
 from .models import LoginHistory
+from .activity import get_login_activity
+from .audit import record_login
+from .exports import FORMATS, export_login_history, export_users
+from .imports import COLUMNS as IMPORT_COLUMNS, count_plain_passwords, import_users, read_csv
+from .notifications import (
+    format_event, get_recent, get_unread_count, load_unread_count, mark_read,
+    stream_unread_counts,
+)
+from .pagination import KeysetPaginator
+from .search import global_search, search_users
+from .throttling import LoginThrottle
 
 
 def get_client_ip(request):
-    """Obtém o IP do cliente"""
+    """
+    Obtém o IP do cliente. O X-Forwarded-For pode ser enviado pelo próprio
+    cliente: só é usado atrás de TRUSTED_PROXY_COUNT proxies, e o IP é o
+    acrescentado pelo proxy mais externo
+    """
+    proxies = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
+    if proxies and x_forwarded_for:
+        addresses = [address.strip() for address in x_forwarded_for.split(',')]
+        if len(addresses) >= proxies:
+            return addresses[-proxies]
+    return request.META.get('REMOTE_ADDR')
+
+
+def throttled_login_response(request, retry_after):
+    """
+    Resposta 429 durante o bloqueio por excesso de tentativas: página
+    simples, sem formulário, para custar pouco sob ataque
+    """
+    response = render(
+        request, 'accounts/login_throttled.html', {'minutes': -(-retry_after // 60)}, status=429,
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
 
 
 def login_view(request):
     """
     View de login
     """
+    response, user = _process_login(request)
+    if user is not None:
+        # Registrar histórico de login (gravação em lote)
+        record_login(
+            user,
+            ip_address=get_client_ip(request),
+            user_agent=request.META.get('HTTP_USER_AGENT', '')
+        )
+    return response
+
+
+def _process_login(request):
+    """
+    Login sem o registro no histórico, compartilhado com a view assíncrona
+    (accounts.views_async). Retorna a resposta e o usuário que entrou.
+    """
     if request.user.is_authenticated:
-        return redirect('dashboard')
+        return redirect('dashboard'), None
     
     if request.method == 'POST':
+        # Tentativas bloqueadas são recusadas antes do hash da senha e de
+        # qualquer consulta ao banco (accounts.throttling)
+        throttle = LoginThrottle(get_client_ip(request), request.POST.get('username'))
+        retry_after = throttle.retry_after()
+        if retry_after:
+            return throttled_login_response(request, retry_after), None
+
         form = LoginForm(request, data=request.POST)
         if form.is_valid():
-            username = form.cleaned_data.get('username')
-            password = form.cleaned_data.get('password')
             remember_me = form.cleaned_data.get('remember_me')
             
-            user = authenticate(username=username, password=password)
+            # O formulário já autenticou o usuário (um único hash por login)
+            user = form.get_user()
             
             if user is not None:
+                throttle.success()
                 login(request, user)
                 
                 # Configurar sessão
                 if not remember_me:
                     request.session.set_expiry(0)
                 
-                # Registrar histórico de login
-                LoginHistory.objects.create(
-                    user=user,
-                    ip_address=get_client_ip(request),
-                    user_agent=request.META.get('HTTP_USER_AGENT', '')
-                )
-                
                 messages.success(request, f'Bem-vindo de volta, {user.get_full_name() or user.username}!')
                 
                 # Redirecionar para a página solicitada ou dashboard
                 next_page = request.GET.get('next', 'dashboard')
-                return redirect(next_page)
+                return redirect(next_page), user
             else:
                 messages.error(request, 'Usuário ou senha inválidos.')
         else:
+            retry_after = throttle.failure()
+            if retry_after:
+                return throttled_login_response(request, retry_after), None
             messages.error(request, 'Por favor, corrija os erros abaixo.')
     else:
         form = LoginForm()
@@ -66,7 +118,7 @@ def login_view(request):
         'form': form,
         'title': 'Login'
     }
-    return render(request, 'accounts/login.html', context)
+    return render(request, 'accounts/login.html', context), None
 
 
 def logout_view(request):
@@ -88,7 +140,10 @@ def register_view(request):
     if request.method == 'POST':
         form = UserRegisterForm(request.POST)
         if form.is_valid():
-            user = form.save()
+            # Usuário, perfil e contadores do dashboard (sinais) juntos, como
+            # espera dashboard.rebuild_counters
+            with transaction.atomic():
+                user = form.save()
             username = form.cleaned_data.get('username')
             messages.success(request, f'Conta criada com sucesso para {username}! Você já pode fazer login.')
             return redirect('accounts:login')
@@ -114,7 +169,9 @@ def profile_view(request):
     
     context = {
         'title': 'Meu Perfil',
-        'recent_logins': recent_logins
+        'recent_logins': recent_logins,
+        # Totais e gráficos da consolidação por dia, não do histórico
+        'activity': get_login_activity(request.user.pk),
     }
     return render(request, 'accounts/profile.html', context)
 
@@ -133,8 +190,10 @@ def profile_edit_view(request):
         )
         
         if user_form.is_valid() and profile_form.is_valid():
-            user_form.save()
+            # Perfil primeiro: ao salvar o usuário o perfil já está limpo e
+            # o sinal save_user_profile não o grava novamente
             profile_form.save()
+            user_form.save()
             messages.success(request, 'Seu perfil foi atualizado com sucesso!')
             return redirect('accounts:profile')
         else:
@@ -184,28 +243,30 @@ def is_staff_or_superuser(user):
     return user.is_staff or user.is_superuser
 
 
+def _user_list_queryset(search_query):
+    """Usuários da listagem (e da exportação) e a ordenação usada"""
+    users = User.objects.select_related('profile').all()
+    ordering = ('username', 'pk')
+    
+    if search_query:
+        # Busca indexada (pg_trgm) incluindo campos do perfil, com relevância
+        users = search_users(users, search_query)
+        ordering = ('-search_rank', 'username', 'pk')
+    return users, ordering
+
+
 @login_required
 @user_passes_test(is_staff_or_superuser)
 def user_list_view(request):
     """
     View para listar todos os usuários (apenas para staff)
     """
-    search_query = request.GET.get('search', '')
-    
-    users = User.objects.select_related('profile').all()
+    search_query = request.GET.get('search', '').strip()
+    users, ordering = _user_list_queryset(search_query)
     
-    if search_query:
-        users = users.filter(
-            Q(username__icontains=search_query) |
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) |
-            Q(email__icontains=search_query)
-        )
-    
-    # Paginação
-    paginator = Paginator(users, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginação por cursor (sem COUNT(*) nem OFFSET)
+    paginator = KeysetPaginator(users, 10, ordering=ordering)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'title': 'Gerenciar Usuários',
@@ -215,6 +276,87 @@ def user_list_view(request):
     return render(request, 'accounts/user_list.html', context)
 
 
+@login_required
+@user_passes_test(is_staff_or_superuser)
+def user_export_view(request, fmt):
+    """
+    Exporta os usuários da listagem (com a mesma busca) em CSV ou XLSX,
+    em streaming
+    """
+    if fmt not in FORMATS:
+        raise Http404
+    users, ordering = _user_list_queryset(request.GET.get('search', '').strip())
+    return export_users(users.order_by(*ordering), fmt)
+
+
+@login_required
+@user_passes_test(is_staff_or_superuser)
+def login_history_export_view(request, fmt):
+    """
+    Exporta o histórico de logins (de todos ou de um usuário) em CSV ou
+    XLSX, em streaming
+    """
+    if fmt not in FORMATS:
+        raise Http404
+    logins = LoginHistory.objects.order_by('-login_time', '-pk')
+    user_id = request.GET.get('user', '')
+    if user_id:
+        if not user_id.isdigit():
+            raise Http404
+        logins = logins.filter(user_id=user_id)
+    return export_login_history(logins, fmt)
+
+
+@login_required
+@user_passes_test(is_staff_or_superuser)
+def user_import_view(request):
+    """
+    View para importar usuários em lote a partir de um CSV (apenas staff)
+    """
+    result = None
+    max_passwords = getattr(settings, 'USER_IMPORT_WEB_MAX_PASSWORDS', 50)
+    if request.method == 'POST':
+        form = UserImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            dry_run = form.cleaned_data['dry_run']
+            upload = form.cleaned_data['file'].file
+            try:
+                # O hash das senhas roda dentro da requisição (timeout do
+                # gunicorn), em um processo: importações maiores ficam para
+                # o comando import_users
+                plain = 0 if dry_run else count_plain_passwords(read_csv(upload))
+                upload.seek(0)
+                if plain > max_passwords:
+                    messages.error(
+                        request,
+                        f'O arquivo tem {plain} senhas em texto e o limite aqui é {max_passwords}. '
+                        'Use "python manage.py import_users" no servidor.'
+                    )
+                else:
+                    result = import_users(read_csv(upload), workers=1, dry_run=dry_run)
+            except (UnicodeDecodeError, ValidationError) as exc:
+                messages.error(request, f'Não foi possível ler o arquivo: {exc}')
+            if result is not None:
+                if dry_run:
+                    messages.info(request, f'{result.valid} linhas válidas, {len(result.errors)} com erro.')
+                elif result.created:
+                    messages.success(request, f'{result.created} usuários importados.')
+                if result.errors:
+                    messages.warning(request, f'{len(result.errors)} linhas com erro não foram importadas.')
+    else:
+        form = UserImportForm()
+    
+    context = {
+        'title': 'Importar Usuários',
+        'form': form,
+        'result': result,
+        'errors': result.errors[:200] if result else [],
+        'columns': IMPORT_COLUMNS,
+        'max_passwords': max_passwords,
+    }
+    return render(request, 'accounts/user_import.html', context)
+
+
 @login_required
 @user_passes_test(is_staff_or_superuser)
 def user_detail_view(request, user_id):
@@ -222,11 +364,83 @@ def user_detail_view(request, user_id):
     View para ver detalhes de um usuário específico
     """
     user = get_object_or_404(User, id=user_id)
-    recent_logins = LoginHistory.objects.filter(user=user)[:10]
+    recent_logins = KeysetPaginator(
+        LoginHistory.objects.filter(user=user), 10, ordering=('-login_time', '-pk')
+    ).get_page(request.GET.get('cursor'))
     
     context = {
         'title': f'Perfil de {user.get_full_name() or user.id}',
         'profile_user': user,
-        'recent_logins': recent_logins
+        'recent_logins': recent_logins,
+        'activity': get_login_activity(user.pk),
     }
     return render(request, 'accounts/user_detail.html', context)
+
+
+@login_required
+def global_search_view(request):
+    """
+    Busca global do cabeçalho (JSON), usada pelo autocompletar
+    """
+    results = global_search(request.user, request.GET.get('q', ''))
+    return JsonResponse(results)
+
+
+@login_required
+def notification_list_view(request):
+    """
+    Notificações recentes (JSON), carregadas ao abrir o menu do cabeçalho
+    """
+    return JsonResponse({
+        'unread': get_unread_count(request.user),
+        'notifications': get_recent(request.user),
+    })
+
+
+@login_required
+@require_POST
+def notification_read_view(request):
+    """
+    Marca notificações como lidas (parâmetro id repetido) ou todas, sem id
+    """
+    if 'id' in request.POST:
+        ids = [int(value) for value in request.POST.getlist('id') if value.isdigit()]
+        if not ids:
+            # Ids inválidos não viram "marcar todas"
+            return JsonResponse({'error': 'id inválido.'}, status=400)
+    else:
+        ids = None
+    mark_read(request.user, ids)
+    # O perfil do usuário da requisição traz o total anterior
+    return JsonResponse({'unread': load_unread_count(request.user.pk)})
+
+
+def _get_authenticated_user_id(request):
+    return request.user.pk if request.user.is_authenticated else None
+
+
+async def notification_stream_view(request):
+    """
+    Total de não lidas por Server-Sent Events. No servidor ASGI a conexão
+    fica aberta e recebe um evento a cada mudança; no WSGI a resposta traz
+    um único evento e o navegador reconecta após NOTIFICATION_POLL_INTERVAL.
+    """
+    user_id = await sync_to_async(_get_authenticated_user_id)(request)
+    if user_id is None:
+        return HttpResponse(status=401)
+
+    if not isinstance(request, ASGIRequest):
+        count = await sync_to_async(load_unread_count)(user_id)
+        retry = getattr(settings, 'NOTIFICATION_POLL_INTERVAL', 30) * 1000
+        return HttpResponse(
+            format_event({'unread': count}, retry=retry),
+            content_type='text/event-stream',
+            headers={'Cache-Control': 'no-cache'},
+        )
+
+    return StreamingHttpResponse(
+        stream_unread_counts(user_id),
+        content_type='text/event-stream',
+        # X-Accel-Buffering: o nginx não acumula os eventos
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
@@ -0,0 +1,129 @@
+"""
+Variantes assíncronas das views com mais espera pelo banco, usadas no
+servidor ASGI (ASYNC_VIEWS, ver accounts.urls); no WSGI continuam as de
+accounts.views.
+
+As consultas principais usam o ORM assíncrono (aget, iteração com async
+for) e o event loop fica livre enquanto o banco responde. A renderização
+dos templates continua síncrona (cabeçalho e menu podem consultar o banco
+quando o cache expira) e roda em uma thread com sync_to_async.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.shortcuts import render
+
+from .activity import aget_login_activity
+from .audit import arecord_login
+from .models import LoginHistory
+from .pagination import KeysetPaginator
+from .views import (
+    _process_login, _user_list_queryset, get_client_ip, is_staff_or_superuser,
+)
+
+arender = sync_to_async(render)
+
+
+def _load_user(request):
+    user = request.user
+    # Carrega o usuário da sessão (SimpleLazyObject) nesta thread
+    user.is_authenticated
+    return user
+
+
+async def aget_user(request):
+    """request.user carregado fora do event loop (o Django 4.2 não tem request.auser)"""
+    return await sync_to_async(_load_user)(request)
+
+
+def async_user_passes_test(test_func):
+    """user_passes_test para views assíncronas"""
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            user = await aget_user(request)
+            if not test_func(user):
+                return redirect_to_login(request.get_full_path())
+            return await view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async_login_required = async_user_passes_test(lambda user: user.is_authenticated)
+async_staff_required = async_user_passes_test(
+    lambda user: user.is_authenticated and is_staff_or_superuser(user)
+)
+
+
+async def login_view(request):
+    """
+    View de login: formulário e hash da senha em uma thread, histórico de
+    login com o ORM assíncrono
+    """
+    response, user = await sync_to_async(_process_login)(request)
+    if user is not None:
+        await arecord_login(
+            user,
+            ip_address=get_client_ip(request),
+            user_agent=request.META.get('HTTP_USER_AGENT', '')
+        )
+    return response
+
+
+@async_login_required
+async def profile_view(request):
+    """
+    View do perfil do usuário
+    """
+    recent_logins = [
+        entry async for entry in LoginHistory.objects.filter(user_id=request.user.pk)[:5]
+    ]
+    context = {
+        'title': 'Meu Perfil',
+        'recent_logins': recent_logins,
+        'activity': await aget_login_activity(request.user.pk),
+    }
+    return await arender(request, 'accounts/profile.html', context)
+
+
+@async_staff_required
+async def user_list_view(request):
+    """
+    View para listar todos os usuários (apenas para staff)
+    """
+    search_query = request.GET.get('search', '').strip()
+    users, ordering = _user_list_queryset(search_query)
+    paginator = KeysetPaginator(users, 10, ordering=ordering)
+    page_obj = await paginator.aget_page(request.GET.get('cursor'))
+
+    context = {
+        'title': 'Gerenciar Usuários',
+        'page_obj': page_obj,
+        'search_query': search_query
+    }
+    return await arender(request, 'accounts/user_list.html', context)
+
+
+@async_staff_required
+async def user_detail_view(request, user_id):
+    """
+    View para ver detalhes de um usuário específico
+    """
+    try:
+        user = await User.objects.aget(id=user_id)
+    except User.DoesNotExist:
+        raise Http404('Usuário não encontrado.')
+    recent_logins = await KeysetPaginator(
+        LoginHistory.objects.filter(user=user), 10, ordering=('-login_time', '-pk')
+    ).aget_page(request.GET.get('cursor'))
+
+    context = {
+        'title': f'Perfil de {user.get_full_name() or user.id}',
+        'profile_user': user,
+        'recent_logins': recent_logins,
+        'activity': await aget_login_activity(user.pk),
+    }
+    return await arender(request, 'accounts/user_detail.html', context)
@@ -0,0 +1,55 @@
+"""
+Benchmarks do projeto.
+
+Cada módulo pode ser executado com ``python -m benchmarks.<nome>`` a partir
+da pasta djangoapp. Os benchmarks rodam contra um banco de testes criado e
+destruído a cada execução (nunca contra os dados reais).
+"""
+import contextlib
+import os
+import time
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+    import django
+    django.setup()
+
+
+@contextlib.contextmanager
+def test_database(**overrides):
+    """Cria um banco de testes e aplica as configurações informadas"""
+    setup_django()
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import (
+        override_settings, setup_test_environment, teardown_test_environment,
+    )
+
+    # Sem collectstatic: arquivos estáticos sem o manifesto de nomes com hash
+    overrides.setdefault('STORAGES', {
+        **settings.STORAGES,
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    })
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with override_settings(**overrides):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, iterations):
+    """Executa func `iterations` vezes e retorna (segundos, operações/s)"""
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    elapsed = time.perf_counter() - start
+    return elapsed, iterations / elapsed
+
+
+def report(label, elapsed, rate, unit='ops/s'):
+    print(f'{label:<40} {elapsed:8.3f}s  {rate:10.1f} {unit}')
@@ -0,0 +1,88 @@
+"""
+Teste de carga comparando requisições/segundo entre o runserver (modo
+anterior do container) e o gunicorn (gunicorn.conf.py).
+
+Sobe cada servidor em uma porta local, dispara requisições concorrentes
+contra uma URL e encerra o servidor:
+
+    python -m benchmarks.app_server --path /accounts/login/ --concurrency 16 --requests 2000
+
+Usa o banco configurado no ambiente (a página de login não consulta o banco).
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SERVERS = {
+    'runserver': lambda port: [
+        sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{port}', '--noreload',
+    ],
+    'gunicorn': lambda port: [
+        sys.executable, '-m', 'gunicorn', 'project.wsgi:application',
+        '--bind', f'127.0.0.1:{port}', '--access-logfile', '/dev/null',
+    ],
+}
+
+
+def wait_ready(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Servidor não respondeu em {url}')
+
+
+def load(url, concurrency, requests):
+    def fetch(_):
+        with urllib.request.urlopen(url, timeout=30) as response:
+            response.read()
+            return response.status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        statuses = list(pool.map(fetch, range(requests)))
+    elapsed = time.perf_counter() - start
+    errors = sum(1 for status in statuses if status != 200)
+    return requests / elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--path', default='/accounts/login/')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--servers', default='runserver,gunicorn')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    env = {**os.environ, 'DEBUG': '0', 'ALLOWED_HOSTS': '127.0.0.1'}
+    for offset, name in enumerate(args.servers.split(',')):
+        port = args.port + offset
+        url = f'http://127.0.0.1:{port}{args.path}'
+        process = subprocess.Popen(
+            SERVERS[name](port), cwd=BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_ready(url)
+            load(url, args.concurrency, min(100, args.requests))  # aquecimento
+            rate, errors = load(url, args.concurrency, args.requests)
+            print(f'{name:<10} {rate:10.1f} req/s  erros: {errors}')
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=30)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Views síncronas e assíncronas (ASYNC_VIEWS, accounts.views_async) com um
+banco lento: cada consulta espera --latency ms a mais (execute wrapper
+instalado em todas as conexões), simulando um banco remoto ou carregado.
+
+Compara, para as páginas de perfil, listagem e detalhe de usuários e
+dashboard:
+- wsgi: views síncronas em um pool fixo de --threads threads (como o
+  gunicorn com threads), o limite de requisições simultâneas;
+- asgi-sync: views síncronas no ASGIHandler (uma thread por requisição);
+- asgi-async: views assíncronas no ASGIHandler.
+
+Nos modos ASGI, --concurrency requisições ficam em andamento ao mesmo
+tempo. Mostra req/s e a latência p50/p95.
+
+    python -m benchmarks.async_views --latency 20 --requests 400 --concurrency 50
+"""
+import argparse
+import asyncio
+import importlib
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import test_database
+
+
+def slow_database(latency):
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+    connection_created.connect(install, weak=False)
+    for connection in connections.all():
+        install(None, connection)
+
+
+def use_async_views(enabled):
+    import accounts.urls
+    import project.urls
+    from django.conf import settings
+    from django.urls import clear_url_caches
+
+    # As views são escolhidas ao carregar as URLs (accounts.urls)
+    settings.ASYNC_VIEWS = enabled
+    importlib.reload(accounts.urls)
+    importlib.reload(project.urls)
+    clear_url_caches()
+
+
+def run_wsgi(paths, cookie, requests, threads):
+    from django.test import Client
+
+    local = threading.local()
+
+    def fetch(i):
+        if not hasattr(local, 'client'):
+            local.client = Client()
+            local.client.cookies['sessionid'] = cookie
+        start = time.perf_counter()
+        status = local.client.get(paths[i % len(paths)]).status_code
+        return status, time.perf_counter() - start
+
+    with ThreadPoolExecutor(threads) as pool:
+        return list(pool.map(fetch, range(requests)))
+
+
+async def asgi_get(app, path, cookie):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'cookie', f'sessionid={cookie}'.encode())],
+        'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+    }
+    body_sent = False
+    status = None
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Cliente conectado até o fim da resposta
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    return status
+
+
+def run_asgi(paths, cookie, requests, concurrency):
+    from django.core.handlers.asgi import ASGIHandler
+
+    app = ASGIHandler()
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(i):
+            async with semaphore:
+                start = time.perf_counter()
+                status = await asgi_get(app, paths[i % len(paths)], cookie)
+                return status, time.perf_counter() - start
+
+        return await asyncio.gather(*(fetch(i) for i in range(requests)))
+
+    return asyncio.run(main())
+
+
+def run(latency, requests, threads, concurrency):
+    from django.contrib.auth.models import User
+    from django.test import Client
+
+    staff = User.objects.create_user('bench', password='senha-forte-123', is_staff=True)
+    other = User.objects.bulk_create(
+        User(username=f'usuario{i}', first_name=f'Usuário {i}') for i in range(50)
+    )[0]
+    client = Client()
+    client.force_login(staff)
+    cookie = client.cookies['sessionid'].value
+    paths = ['/accounts/profile/', '/accounts/users/', f'/accounts/users/{other.pk}/', '/']
+
+    # Aquecimento (templates, caches do layout e do dashboard) sem latência
+    for path in paths:
+        assert client.get(path).status_code == 200, path
+    slow_database(latency / 1000)
+
+    modes = (
+        (f'wsgi ({threads} threads)', False, lambda: run_wsgi(paths, cookie, requests, threads)),
+        ('asgi-sync', False, lambda: run_asgi(paths, cookie, requests, concurrency)),
+        ('asgi-async', True, lambda: run_asgi(paths, cookie, requests, concurrency)),
+    )
+    for label, async_views, func in modes:
+        use_async_views(async_views)
+        start = time.perf_counter()
+        results = func()
+        elapsed = time.perf_counter() - start
+        latencies = sorted(duration * 1000 for _, duration in results)
+        errors = sum(1 for status, _ in results if status != 200)
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(
+            f'{label:<18} {requests / elapsed:8.1f} req/s  '
+            f'p50 {statistics.median(latencies):7.1f} ms  p95 {p95:7.1f} ms  erros: {errors}'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=20, help='ms por consulta')
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--threads', type=int, default=4, help='threads do modo wsgi')
+    parser.add_argument('--concurrency', type=int, default=50, help='requisições simultâneas (ASGI)')
+    args = parser.parse_args()
+    with test_database(LOGIN_AUDIT_ASYNC=False):
+        run(args.latency, args.requests, args.threads, args.concurrency)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Custo da conexão com o banco por requisição: sem reutilização
+(CONN_MAX_AGE=0) e com conexões persistentes. Cada "requisição" dispara
+os sinais request_started/request_finished, que abrem e fecham conexões
+como no servidor, e executa uma consulta simples.
+
+    python -m benchmarks.db_connections --requests 500
+
+Rode com DB_POOL=1 para medir o pool (project.db.pool). Só faz sentido
+contra o PostgreSQL: o SQLite de testes em memória nunca fecha a conexão.
+"""
+import argparse
+import statistics
+import time
+
+from . import test_database
+from .global_search import percentile
+
+
+def run(requests):
+    from django.core.signals import request_finished, request_started
+    from django.db import connection
+
+    from project.db import metrics
+
+    original_max_age = connection.settings_dict['CONN_MAX_AGE']
+    for label, max_age in (('sem reutilização', 0), ('persistente', 60)):
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        metrics.reset()
+        samples = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            request_started.send(sender=None)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            request_finished.send(sender=None)
+            samples.append((time.perf_counter() - start) * 1000)
+        result = metrics.get_metrics()
+        print(
+            f'{label:<18} p50 {statistics.median(samples):7.3f} ms  '
+            f'p95 {percentile(samples, 0.95):7.3f} ms  '
+            f'conexões físicas {result["physical_connections"]:5d}  '
+            f'reutilização {result["reuse_ratio"]}'
+        )
+    connection.settings_dict['CONN_MAX_AGE'] = original_max_age
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+    with test_database():
+        run(args.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Memória e tempo da exportação do histórico de logins em streaming
+(accounts.exports), comparada à geração do arquivo inteiro em memória.
+
+    python -m benchmarks.export_memory --rows 1000000
+
+Para cada formato mostra o tempo até o primeiro bloco, o tempo total, o
+tamanho do arquivo e o pico de memória alocada (tracemalloc) durante a
+geração. Com --skip-naive a comparação em memória não é executada (com
+milhões de linhas ela pode usar vários GB).
+"""
+import argparse
+import time
+import tracemalloc
+
+from . import test_database
+
+SEED_BATCH_SIZE = 10000
+
+
+def seed(rows):
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+
+    from accounts.models import LoginHistory
+
+    users = User.objects.bulk_create(
+        User(username=f'export{i}', email=f'export{i}@example.com') for i in range(100)
+    )
+    now = timezone.now()
+    for start in range(0, rows, SEED_BATCH_SIZE):
+        LoginHistory.objects.bulk_create(
+            LoginHistory(
+                user=users[i % len(users)],
+                login_time=now,
+                ip_address='10.0.0.1',
+                user_agent='Mozilla/5.0 (X11; Linux x86_64) Benchmark',
+            )
+            for i in range(start, min(start + SEED_BATCH_SIZE, rows))
+        )
+
+
+def measure_stream(chunks):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_chunk = None
+    size = 0
+    for chunk in chunks:
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - start
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first_chunk or elapsed, elapsed, size, peak
+
+
+def naive(queryset, fmt):
+    """Arquivo inteiro em memória: todas as linhas lidas de uma vez"""
+    from accounts import exports
+
+    header = [label for label, _ in exports.LOGIN_HISTORY_COLUMNS]
+    fields = [field for _, field in exports.LOGIN_HISTORY_COLUMNS]
+    rows = list(queryset.values_list(*fields))
+    stream = exports.stream_xlsx if fmt == 'xlsx' else exports.stream_csv
+    yield b''.join(stream(rows, header))
+
+
+def run(rows, skip_naive):
+    from accounts.exports import FORMATS, export_login_history
+    from accounts.models import LoginHistory
+
+    seed(rows)
+    queryset = LoginHistory.objects.order_by('-login_time', '-pk')
+    print(f'{rows} linhas')
+    for fmt in FORMATS:
+        modes = [('streaming', lambda: export_login_history(queryset, fmt).streaming_content)]
+        if not skip_naive:
+            modes.append(('em memória', lambda: naive(queryset, fmt)))
+        for label, chunks in modes:
+            first, elapsed, size, peak = measure_stream(chunks())
+            print(
+                f'{fmt:<5} {label:<11} primeiro bloco {first * 1000:9.1f} ms  '
+                f'total {elapsed:7.2f} s  arquivo {size / 2**20:8.1f} MB  '
+                f'pico de memória {peak / 2**20:8.1f} MB'
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--skip-naive', action='store_true')
+    args = parser.parse_args()
+    with test_database():
+        run(args.rows, args.skip_naive)
+
+
+if __name__ == '__main__':
+    main()
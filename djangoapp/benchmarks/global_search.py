@@ -0,0 +1,70 @@
+"""
+Latência (p50/p95) do endpoint de busca global do cabeçalho, com cache frio
+(termos distintos) e quente (termos repetidos).
+
+    python -m benchmarks.global_search --users 20000 --requests 300
+"""
+import argparse
+import random
+import statistics
+import string
+import time
+
+from . import test_database
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run(total_users, requests):
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.test import Client
+    from django.urls import reverse
+
+    from accounts.models import UserProfile
+
+    random.seed(42)
+    names = [''.join(random.choices(string.ascii_lowercase, k=8)) for _ in range(total_users)]
+    User.objects.bulk_create(
+        User(username=f'{name}{i}', first_name=name.title(), email=f'{name}{i}@empresa.com')
+        for i, name in enumerate(names)
+    )
+    UserProfile.objects.bulk_create(
+        UserProfile(user_id=pk, department=random.choice(['Vendas', 'TI', 'RH', 'Financeiro']))
+        for pk in User.objects.values_list('pk', flat=True)
+    )
+    staff = User.objects.create_user('bench', is_staff=True)
+
+    client = Client()
+    client.force_login(staff)
+    url = reverse('accounts:global_search')
+    terms = [name[:3] for name in random.sample(names, requests)]
+
+    for label, clear in (('cache frio', True), ('cache quente', False)):
+        samples = []
+        for term in terms:
+            if clear:
+                cache.clear()
+            start = time.perf_counter()
+            client.get(url, {'q': term})
+            samples.append((time.perf_counter() - start) * 1000)
+        print(
+            f'{label:<14} p50 {statistics.median(samples):7.2f} ms  '
+            f'p95 {percentile(samples, 0.95):7.2f} ms'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+    with test_database():
+        run(args.users, args.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Tempo de renderização do layout (cabeçalho, busca, menu do usuário e menu
+lateral) com e sem o cache de fragmentos (accounts.layout). Usa as páginas
+temporárias (/accounts/temp/...), de conteúdo quase vazio: o tempo de
+template é praticamente todo do layout.
+
+    python -m benchmarks.layout_render --requests 500
+"""
+import argparse
+import statistics
+
+from . import test_database
+
+
+def run(requests):
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.test import Client, override_settings
+
+    user = User.objects.create_user(
+        'bench', password='senha-forte-123', first_name='Ana', last_name='Souza', is_staff=True,
+    )
+    client = Client()
+    client.force_login(user)
+    paths = ['/accounts/temp/sales/list/', '/accounts/temp/customers/', '/accounts/temp/sales/new/']
+
+    for label, timeout in (('sem cache', 0), ('com cache', 300)):
+        with override_settings(LAYOUT_CACHE_TIMEOUT=timeout):
+            cache.clear()
+            template_ms, total_ms = [], []
+            for i in range(requests):
+                response = client.get(paths[i % len(paths)])
+                stats = response.instrumentation
+                template_ms.append(stats.template_time * 1000)
+                total_ms.append(stats.total_time * 1000)
+        print(
+            f'{label:<10} template p50 {statistics.median(template_ms):6.2f} ms  '
+            f'resposta p50 {statistics.median(total_ms):6.2f} ms'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+    with test_database():
+        run(args.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Compara logins/segundo com a gravação síncrona do LoginHistory (caminho
+anterior) e com a gravação em lote de accounts.audit.
+
+    python -m benchmarks.login_audit --iterations 500
+"""
+import argparse
+
+from . import measure, report, test_database
+
+
+def run(iterations):
+    from django.contrib.auth.models import User
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from accounts.audit import get_writer
+    from accounts.models import LoginHistory
+
+    User.objects.create_user('bench', password='senha-forte-123')
+    url = reverse('accounts:login')
+    data = {'username': 'bench', 'password': 'senha-forte-123'}
+
+    def login(_):
+        client = Client()
+        client.post(url, data)
+
+    for label, is_async in (('síncrono (LoginHistory.create)', False),
+                            ('em lote (accounts.audit)', True)):
+        with override_settings(LOGIN_AUDIT_ASYNC=is_async):
+            LoginHistory.objects.all().delete()
+            elapsed, rate = measure(login, iterations)
+            report(f'login {label}', elapsed, rate, 'logins/s')
+            get_writer().flush()
+            assert LoginHistory.objects.count() == iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=300)
+    args = parser.parse_args()
+
+    # Hasher rápido: isola o custo da gravação do histórico
+    with test_database(
+        PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+        LOGIN_AUDIT_BATCH_SIZE=100,
+        LOGIN_AUDIT_FLUSH_INTERVAL=60,
+    ):
+        run(args.iterations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Credential stuffing contra a view de login: threads enviando tentativas
+com um usuário diferente a cada vez (o Django calcula o hash mesmo para
+usuários inexistentes) a uma taxa alvo (padrão: 1000 req/s) a partir de
+poucos IPs, com o limite de tentativas (accounts.throttling) ligado e
+desligado.
+
+Mostra a taxa atingida, o uso de CPU do processo (núcleos ocupados), o
+tempo de CPU por requisição e quantas vezes o hash da senha foi calculado,
+em três fases:
+- limite ligado, até todos os IPs do ataque serem bloqueados: custo
+  limitado a LOGIN_THROTTLE_IP_LIMIT hashes por IP;
+- limite ligado, IPs já bloqueados: recusa com uma leitura do cache;
+- limite desligado: um hash por tentativa.
+
+    python -m benchmarks.login_throttle --rate 1000 --seconds 5
+
+O cache usado é o configurado (CACHE_BACKEND).
+"""
+import argparse
+import threading
+import time
+from collections import Counter
+from unittest import mock
+
+from . import test_database
+
+
+def attack(rate, seconds, threads, ips, until_blocked=False):
+    import django.contrib.auth.forms as auth_forms
+    from django.test import Client
+
+    original = auth_forms.authenticate
+    hashes = Counter()
+
+    def counting_authenticate(*args, **kwargs):
+        hashes['total'] += 1
+        return original(*args, **kwargs)
+
+    statuses = Counter()
+    lock = threading.Lock()
+    interval = threads / rate
+    deadline = time.perf_counter() + seconds
+
+    def worker(index):
+        client = Client()
+        ip = f'203.0.113.{index % ips + 1}'
+        next_at = time.perf_counter()
+        sent = 0
+        local = Counter()
+        while until_blocked or time.perf_counter() < deadline:
+            response = client.post(
+                '/accounts/login/',
+                {'username': f'usuario-{index}-{sent}', 'password': f'tentativa-{sent}'},
+                REMOTE_ADDR=ip,
+            )
+            local[response.status_code] += 1
+            sent += 1
+            if until_blocked and response.status_code == 429:
+                break
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        with lock:
+            statuses.update(local)
+
+    with mock.patch.object(auth_forms, 'authenticate', counting_authenticate):
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    return statuses, hashes['total'], cpu, wall
+
+
+def run(rate, seconds, threads, ips):
+    from django.core.cache import cache
+    from django.test import override_settings
+
+    from accounts.models import LoginLockout
+
+    cache.clear()
+    phases = (
+        ('ligado, até bloquear', True, True),
+        ('ligado, bloqueado', True, False),
+        ('desligado', False, False),
+    )
+    for label, enabled, until_blocked in phases:
+        with override_settings(LOGIN_THROTTLE_ENABLED=enabled, LOGIN_AUDIT_ASYNC=False):
+            statuses, hashes, cpu, wall = attack(rate, seconds, threads, ips, until_blocked)
+        total = sum(statuses.values())
+        print(
+            f'{label:<20} {wall:6.1f}s {total / wall:8.1f} req/s  CPU {cpu / wall:5.2f} núcleos  '
+            f'{cpu / total * 1000:7.3f} ms CPU/req  hashes {hashes:6d}  '
+            f'respostas {dict(sorted(statuses.items()))}'
+        )
+    print(f'bloqueios registrados: {LoginLockout.objects.count()}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rate', type=int, default=1000, help='req/s alvo (total)')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--ips', type=int, default=4, help='IPs de origem do ataque')
+    args = parser.parse_args()
+    with test_database():
+        run(args.rate, args.seconds, args.threads, args.ips)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Logins simultâneos por núcleo com cada hasher (accounts.hashers), com o hash
+na thread da requisição (PASSWORD_HASHING_WORKERS=0) e no pool de
+processos. Enquanto as threads fazem login, outra thread executa um
+trabalho leve em Python (como renderizar uma página) e mede a latência dele:
+mostra quanto a rajada de logins atrasa o restante do servidor.
+
+    python -m benchmarks.password_hashing --threads 8 --logins 200
+
+O hasher argon2 só é medido com argon2-cffi instalado.
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+from . import test_database
+from .global_search import percentile
+
+HASHERS = ('pbkdf2', 'scrypt', 'argon2')
+
+
+def light_work():
+    return sum(i * i for i in range(2000))
+
+
+def storm(threads, logins, username):
+    from django.contrib.auth import authenticate
+
+    per_thread = max(1, logins // threads)
+    done = threading.Event()
+    latencies = []
+
+    def login_loop():
+        for _ in range(per_thread):
+            assert authenticate(username=username, password='senha-forte-123')
+
+    def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            light_work()
+            latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.005)
+
+    workers = [threading.Thread(target=login_loop) for _ in range(threads)]
+    prober = threading.Thread(target=probe)
+    prober.start()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    prober.join()
+    return per_thread * threads / elapsed, latencies
+
+
+def run(threads, logins, pool_workers):
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.test import override_settings
+
+    from accounts import hashing
+
+    cores = os.cpu_count() or 1
+    baseline = [0.0] * 50
+    for i in range(len(baseline)):
+        start = time.perf_counter()
+        light_work()
+        baseline[i] = (time.perf_counter() - start) * 1000
+    print(f'{cores} núcleos; trabalho leve sem carga: p50 {statistics.median(baseline):.2f} ms')
+
+    for name in HASHERS:
+        if name == 'argon2':
+            try:
+                import argon2  # noqa: F401
+            except ImportError:
+                print('argon2: argon2-cffi não instalado, ignorado')
+                continue
+        preferred = settings.PASSWORD_HASHER_CHOICES[name]
+        hashers = [preferred, *(h for h in settings.PASSWORD_HASHERS if h != preferred)]
+        with override_settings(PASSWORD_HASHERS=hashers):
+            username = f'bench-{name}'
+            User.objects.create_user(username, password='senha-forte-123')
+            for label, workers in (('na thread', 0), (f'pool ({pool_workers})', pool_workers)):
+                with override_settings(PASSWORD_HASHING_WORKERS=workers):
+                    if workers:
+                        # Inicia os processos antes da medição
+                        hashing.get_executor().submit(light_work).result()
+                    rate, latencies = storm(threads, logins, username)
+                    hashing.shutdown_executor()
+                print(
+                    f'{name:<7} {label:<10} {rate:8.1f} logins/s  '
+                    f'{rate / cores:7.1f} logins/s/núcleo  '
+                    f'trabalho leve p50 {statistics.median(latencies):7.2f} ms  '
+                    f'p95 {percentile(latencies, 0.95):7.2f} ms'
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    with test_database():
+        run(args.threads, args.logins, args.workers)
+
+
+if __name__ == '__main__':
+    main()
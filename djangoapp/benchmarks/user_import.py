@@ -0,0 +1,66 @@
+"""
+Importação de usuários: criação um a um (create_user, com os sinais do
+perfil e dos contadores) comparada à importação em lote de accounts.imports.
+
+    python -m benchmarks.user_import --rows 50000
+
+O caminho um a um é medido com --baseline linhas (é lento) e extrapolado.
+Sem --passwords as linhas não têm senha (senha inutilizável); com
+--passwords cada linha traz uma senha em texto, convertida em hash no pool
+de processos (--workers): o tempo passa a ser dominado pelo hasher.
+"""
+import argparse
+import io
+import os
+
+from . import measure, report, test_database
+
+
+def make_csv(rows, prefix, passwords):
+    from accounts.imports import COLUMNS
+
+    lines = [','.join(COLUMNS)]
+    for i in range(rows):
+        password = f'Senha-{i}-forte' if passwords else ''
+        lines.append(
+            f'{prefix}{i},{prefix}{i}@example.com,Nome{i},Sobrenome,{password},'
+            f'user,Departamento {i % 20},'
+        )
+    return '\n'.join(lines) + '\n'
+
+
+def run(rows, baseline, passwords, workers):
+    from django.contrib.auth.models import User
+
+    from accounts.imports import import_users, read_csv
+
+    def create(i):
+        User.objects.create_user(
+            f'um{i}', f'um{i}@example.com', f'Senha-{i}-forte' if passwords else None,
+        )
+
+    elapsed, rate = measure(create, baseline)
+    report(f'um a um ({baseline} linhas)', elapsed, rate, 'usuários/s')
+    print(f'{"":<40} estimativa para {rows}: {rows / rate:8.1f}s')
+
+    data = make_csv(rows, 'lote', passwords)
+    elapsed, rate = measure(
+        lambda _: import_users(read_csv(io.StringIO(data)), workers=workers), 1,
+    )
+    assert User.objects.filter(username__startswith='lote').count() == rows
+    report(f'em lote ({rows} linhas)', elapsed, rows / elapsed, 'usuários/s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--baseline', type=int, default=500)
+    parser.add_argument('--passwords', action='store_true')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    with test_database():
+        run(args.rows, args.baseline, args.passwords, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Configuração do Gunicorn (modo de produção do container).
+
+Lida automaticamente pelo gunicorn quando executado na pasta djangoapp.
+Todos os valores podem ser ajustados por variáveis de ambiente.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Processos: (2 x CPUs) + 1, com threads por processo para sobrepor a
+# espera de banco de dados
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 2))
+worker_class = 'gthread' if threads > 1 else 'sync'
+# APP_SERVER=uvicorn: workers ASGI (project.asgi), em que as conexões SSE
+# das notificações não ocupam uma thread cada
+if os.getenv('APP_SERVER') == 'uvicorn':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+
+# Carrega a aplicação no processo mestre antes do fork: os workers
+# compartilham a memória (copy-on-write) e iniciam mais rápido.
+# Com preload, `kill -HUP` recria os workers de forma graciosa mas não
+# recarrega o código; use GUNICORN_PRELOAD=0 para recarregar código com HUP.
+preload_app = bool(int(os.getenv('GUNICORN_PRELOAD', 1)))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Recicla os workers periodicamente (limita vazamentos de memória), com
+# jitter para não reiniciar todos ao mesmo tempo
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOGLEVEL', 'info')
+
+
+def post_fork(server, worker):
+    # Conexões abertas no mestre (preload) não podem ser compartilhadas
+    from django.db import connections
+    connections.close_all()
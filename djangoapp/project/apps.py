@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class ProjectConfig(AppConfig):
+    name = 'project'
+    verbose_name = 'Projeto'
+
+    def ready(self):
+        # Registra os contadores de conexões com o banco e a instrumentação
+        # das consultas
+        from . import checks, instrumentation  # noqa: F401
+        from .db import metrics  # noqa: F401
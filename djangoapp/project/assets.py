@@ -0,0 +1,79 @@
+"""
+Bibliotecas de terceiros (Bootstrap, Bootstrap Icons, fonte Inter) servidas
+pela própria aplicação.
+
+manage.py vendor_static baixa as versões fixadas abaixo para
+project/static/vendor/, que deve ser versionado junto com o código: as
+páginas não dependem de CDNs externas e os arquivos passam pelo
+collectstatic como os demais (nomes com hash, gzip/brotli; ver
+project.storage e project.staticfiles).
+
+A tag {% vendor_asset 'nome' %} (asset_tags) só aponta para a cópia local,
+sem CDN de reserva. Arquivo ausente é erro: o check project.E001 (manage.py
+check --deploy, executado pelo commands.sh antes do servidor subir) recusa a
+inicialização fora do DEBUG, e com o manifest static() também falha; no
+DEBUG o check avisa (project.W001).
+"""
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+
+BOOTSTRAP_VERSION = '5.3.2'
+BOOTSTRAP_ICONS_VERSION = '1.11.1'
+INTER_VERSION = '5.0.16'
+INTER_WEIGHTS = (300, 400, 500, 600, 700)
+
+JSDELIVR = 'https://cdn.jsdelivr.net/npm'
+
+# Arquivos baixados: caminho em static/ e URL de origem
+VENDOR_FILES = {
+    'vendor/bootstrap/bootstrap.min.css':
+        f'{JSDELIVR}/bootstrap@{BOOTSTRAP_VERSION}/dist/css/bootstrap.min.css',
+    'vendor/bootstrap/bootstrap.bundle.min.js':
+        f'{JSDELIVR}/bootstrap@{BOOTSTRAP_VERSION}/dist/js/bootstrap.bundle.min.js',
+    'vendor/bootstrap-icons/bootstrap-icons.min.css':
+        f'{JSDELIVR}/bootstrap-icons@{BOOTSTRAP_ICONS_VERSION}/font/bootstrap-icons.min.css',
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff2':
+        f'{JSDELIVR}/bootstrap-icons@{BOOTSTRAP_ICONS_VERSION}/font/fonts/bootstrap-icons.woff2',
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff':
+        f'{JSDELIVR}/bootstrap-icons@{BOOTSTRAP_ICONS_VERSION}/font/fonts/bootstrap-icons.woff',
+    **{
+        f'vendor/inter/inter-latin-{weight}-normal.woff2':
+            f'{JSDELIVR}/@fontsource/inter@{INTER_VERSION}/files/inter-latin-{weight}-normal.woff2'
+        for weight in INTER_WEIGHTS
+    },
+}
+
+# Folha de estilos da fonte Inter, gerada pelo vendor_static
+INTER_CSS = 'vendor/inter/inter.css'
+
+# Nome usado nos templates: arquivo em static/
+VENDOR_ASSETS = {
+    'bootstrap.css': 'vendor/bootstrap/bootstrap.min.css',
+    'bootstrap.js': 'vendor/bootstrap/bootstrap.bundle.min.js',
+    'bootstrap-icons.css': 'vendor/bootstrap-icons/bootstrap-icons.min.css',
+    'inter.css': INTER_CSS,
+}
+
+
+def inter_css():
+    """@font-face da Inter apontando para os arquivos locais"""
+    return ''.join(
+        '@font-face {\n'
+        "  font-family: 'Inter';\n"
+        '  font-style: normal;\n'
+        f'  font-weight: {weight};\n'
+        '  font-display: swap;\n'
+        f"  src: url('inter-latin-{weight}-normal.woff2') format('woff2');\n"
+        '}\n'
+        for weight in INTER_WEIGHTS
+    )
+
+
+def missing_vendor_files():
+    """Arquivos de VENDOR_FILES (e a folha da Inter) ausentes de static/"""
+    return [path for path in (*VENDOR_FILES, INTER_CSS) if finders.find(path) is None]
+
+
+def vendor_url(name):
+    """URL da cópia local do recurso (com hash no nome fora do DEBUG)"""
+    return static(VENDOR_ASSETS[name])
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+from .assets import missing_vendor_files
+
+VENDOR_HINT = 'Rode "python manage.py vendor_static" e versione project/static/vendor/.'
+
+
+def _missing_message(missing):
+    return f'Bibliotecas de terceiros ausentes de static/: {", ".join(missing)}.'
+
+
+@register(Tags.staticfiles, deploy=True)
+def check_vendor_files(app_configs, **kwargs):
+    """As páginas carregam Bootstrap, ícones e fonte só da cópia local"""
+    missing = missing_vendor_files()
+    if not missing:
+        return []
+    return [Error(_missing_message(missing), hint=VENDOR_HINT, id='project.E001')]
+
+
+@register(Tags.staticfiles)
+def check_vendor_files_debug(app_configs, **kwargs):
+    """No DEBUG (runserver) apenas avisa: as páginas ficam sem estilos"""
+    if not settings.DEBUG:
+        return []
+    missing = missing_vendor_files()
+    if not missing:
+        return []
+    return [Warning(_missing_message(missing), hint=VENDOR_HINT, id='project.W001')]
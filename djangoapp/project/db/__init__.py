@@ -0,0 +1,4 @@
+"""
+Infraestrutura de banco de dados do projeto: métricas de conexões e o
+backend PostgreSQL com pool (project.db.pool).
+"""
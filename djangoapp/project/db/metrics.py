@@ -0,0 +1,76 @@
+"""
+Métricas de reutilização de conexões com o banco de dados.
+
+Os contadores são por processo: cada worker do gunicorn mantém os seus.
+- requests: requisições atendidas;
+- connections_opened: vezes em que o Django abriu uma conexão (com o
+  pool, inclui as conexões retiradas do pool);
+- physical_connections: conexões realmente abertas no PostgreSQL
+  (handshake TCP + autenticação).
+
+reuse_ratio = 1 - physical_connections / requests. Perto de 1, quase
+nenhuma requisição paga o custo de abrir uma conexão.
+"""
+import os
+import threading
+from collections import Counter
+
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_lock = threading.Lock()
+_counters = Counter()
+_pools = {}
+
+
+def increment(name, amount=1):
+    with _lock:
+        _counters[name] += amount
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+
+
+def register_pool(alias, pool):
+    """Registra o pool de uma conexão para exibir sua ocupação"""
+    _pools[alias] = pool
+
+
+def get_metrics():
+    """Retorna os contadores do processo atual"""
+    with _lock:
+        counters = dict(_counters)
+    requests = counters.get('requests', 0)
+    physical = counters.get('physical_connections', 0)
+    metrics = {
+        'pid': os.getpid(),
+        'requests': requests,
+        'connections_opened': counters.get('connections_opened', 0),
+        'physical_connections': physical,
+        'pool_checkouts': counters.get('pool_checkouts', 0),
+        'pool_discarded': counters.get('pool_discarded', 0),
+        'reuse_ratio': (
+            round(max(0.0, 1 - physical / requests), 4) if requests else None
+        ),
+    }
+    if _pools:
+        metrics['pools'] = {
+            alias: pool.stats() for alias, pool in _pools.items()
+        }
+    return metrics
+
+
+@receiver(request_started, dispatch_uid='db_metrics_request_started')
+def count_request(sender, **kwargs):
+    increment('requests')
+
+
+@receiver(connection_created, dispatch_uid='db_metrics_connection_created')
+def count_connection(sender, connection, **kwargs):
+    increment('connections_opened')
+    # Conexões do pool contam como físicas só quando o pool as cria
+    if not getattr(connection, 'is_pooled', False):
+        increment('physical_connections')
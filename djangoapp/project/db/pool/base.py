@@ -0,0 +1,145 @@
+"""
+Backend PostgreSQL com pool de conexões no processo.
+
+Ativado com DB_POOL=1 (ENGINE = 'project.db.pool'). Cada processo mantém
+um pool por banco: ao fim da requisição o Django "fecha" a conexão, que
+volta ao pool em vez de ser encerrada, e a próxima requisição (de
+qualquer thread) a reutiliza sem novo handshake TCP + autenticação.
+
+Configuração em DATABASES[alias]['POOL']:
+- MIN_SIZE: conexões ociosas mantidas abertas (use >= threads do worker);
+- MAX_SIZE: limite de conexões simultâneas do processo; acima dele a
+  abertura falha com erro de banco.
+
+Use com CONN_MAX_AGE = 0, para que a conexão volte ao pool a cada
+requisição. Com CONN_HEALTH_CHECKS, conexões ociosas são testadas ao sair
+do pool e descartadas se o servidor as tiver encerrado.
+
+O Django 5.1+ com psycopg 3 tem pool nativo (OPTIONS={'pool': ...});
+este backend cobre o Django 4.2 com psycopg2.
+"""
+import os
+import threading
+
+from django.db.backends.postgresql import base
+from psycopg2 import pool as pg_pool
+
+from project.db import metrics
+
+_lock = threading.Lock()
+_pools = {}
+
+
+class ConnectionPool(pg_pool.ThreadedConnectionPool):
+    """Pool do psycopg2 cujas conexões são criadas pelo Django"""
+
+    def __init__(self, minconn, maxconn, connect):
+        self._connect_func = connect
+        self._fresh = set()
+        self.pid = os.getpid()
+        super().__init__(minconn, maxconn)
+
+    def _connect(self, key=None):
+        conn = self._connect_func()
+        metrics.increment('physical_connections')
+        self._fresh.add(id(conn))
+        if key is not None:
+            self._used[key] = conn
+            self._rused[id(conn)] = key
+        else:
+            self._pool.append(conn)
+        return conn
+
+    def checkout(self, health_checks=False):
+        """
+        Retira uma conexão do pool. Com health_checks, conexões reutilizadas
+        são testadas e as que falharem são descartadas.
+        """
+        for _ in range(self.maxconn + 1):
+            conn = self.getconn()
+            with self._lock:
+                fresh = id(conn) in self._fresh
+                self._fresh.discard(id(conn))
+            if fresh or not health_checks or self._is_usable(conn):
+                metrics.increment('pool_checkouts')
+                return conn
+            metrics.increment('pool_discarded')
+            self.putconn(conn, close=True)
+        raise pg_pool.PoolError('no usable connection in pool')
+
+    @staticmethod
+    def _is_usable(conn):
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            conn.rollback()
+        except base.Database.Error:
+            return False
+        return True
+
+    def stats(self):
+        return {
+            'idle': len(self._pool),
+            'in_use': len(self._used),
+            'min_size': self.minconn,
+            'max_size': self.maxconn,
+        }
+
+
+def get_pool(wrapper, conn_params):
+    """Pool do alias da conexão, criado no primeiro uso em cada processo"""
+    pool = _pools.get(wrapper.alias)
+    if pool is not None and pool.pid == os.getpid() and not pool.closed:
+        return pool
+    with _lock:
+        pool = _pools.get(wrapper.alias)
+        # Após um fork o pool herdado é abandonado: seus sockets pertencem
+        # ao processo pai
+        if pool is None or pool.pid != os.getpid() or pool.closed:
+            options = wrapper.settings_dict.get('POOL') or {}
+            pool = ConnectionPool(
+                int(options.get('MIN_SIZE', 1)),
+                int(options.get('MAX_SIZE', 10)),
+                lambda: base.DatabaseWrapper.get_new_connection(
+                    wrapper, conn_params
+                ),
+            )
+            _pools[wrapper.alias] = pool
+            metrics.register_pool(wrapper.alias, pool)
+    return pool
+
+
+def close_pools():
+    """Fecha todas as conexões dos pools do processo atual"""
+    with _lock:
+        for alias, pool in list(_pools.items()):
+            if pool.pid == os.getpid() and not pool.closed:
+                pool.closeall()
+            del _pools[alias]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    is_pooled = True
+
+    def get_new_connection(self, conn_params):
+        pool = get_pool(self, conn_params)
+        connection = pool.checkout(
+            health_checks=self.settings_dict['CONN_HEALTH_CHECKS']
+        )
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = base.IsolationLevel(
+            options.get('isolation_level', base.IsolationLevel.READ_COMMITTED)
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = _pools.get(self.alias)
+        with self.wrap_database_errors:
+            if pool is None or pool.closed or pool.pid != os.getpid():
+                return self.connection.close()
+            # putconn desfaz transações abertas e descarta conexões quebradas
+            pool.putconn(self.connection)
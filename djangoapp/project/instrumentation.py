@@ -0,0 +1,289 @@
+"""
+Instrumentação das requisições: consultas SQL, consultas duplicadas, tempo
+de banco, de renderização de templates e latência total por view.
+
+- InstrumentationMiddleware mede cada requisição e agrega os números por
+  view (get_view_metrics, exposto em /metrics/ para staff).
+- Com INSTRUMENTATION_HEADERS (padrão: DEBUG) a resposta traz os números
+  nos cabeçalhos X-DB-Queries, X-DB-Duplicate-Queries e Server-Timing
+  (visível na aba de rede do navegador).
+- span(nome) mede trechos específicos, como a tag render_menu; o backend
+  DjangoTemplates deste módulo mede a renderização dos templates.
+- response.instrumentation guarda as medidas da requisição, usadas pelos
+  orçamentos de consultas dos testes (project.testing).
+
+As medidas da requisição ficam em uma ContextVar, e cada conexão recebe um
+único execute wrapper (connection_created) que as atualiza: funciona nas
+views síncronas e nas assíncronas (ASGI), em que as consultas rodam em
+threads do sync_to_async com uma cópia do contexto.
+"""
+import contextlib
+import contextvars
+import logging
+import statistics
+import threading
+import time
+from collections import Counter, deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('instrumentation', default=None)
+
+# Latências guardadas por view para os percentis
+SAMPLE_SIZE = 500
+
+
+def _params_key(params, many):
+    """
+    Identifica os parâmetros de uma consulta para contar duplicadas: hash()
+    em vez de repr(), que montaria strings enormes em cada bulk_create.
+    Parâmetros sem hash (executemany, listas, JSON) contam como distintos.
+    """
+    if many or params is None:
+        return None if params is None else object()
+    try:
+        return hash(tuple(params) if isinstance(params, list) else params)
+    except TypeError:
+        return object()
+
+
+class RequestStats:
+    """Medidas de uma requisição"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.total_time = 0.0
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.spans = Counter()
+        self._active = set()
+
+    @property
+    def queries(self):
+        return sum(self.statements.values())
+
+    @property
+    def duplicates(self):
+        """Consultas repetidas com o mesmo SQL e os mesmos parâmetros"""
+        return sum(count - 1 for count in self.statements.values())
+
+    @property
+    def similar(self):
+        """Consultas repetidas com o mesmo SQL (parâmetros diferentes: N+1)"""
+        return sum(count - 1 for count in self._by_sql().values())
+
+    @property
+    def template_time(self):
+        return self.spans['template']
+
+    def _by_sql(self):
+        by_sql = Counter()
+        for (sql, _), count in self.statements.items():
+            by_sql[sql] += count
+        return by_sql
+
+    def repeated_sql(self):
+        return [sql for sql, count in self._by_sql().most_common() if count > 1]
+
+    def __call__(self, execute, sql, params, many, context):
+        # Execute wrapper das conexões (ver connection.execute_wrapper)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.statements[(sql, _params_key(params, many))] += 1
+
+    def server_timing(self):
+        entries = [
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+        ]
+        entries += [
+            f'{name};dur={elapsed * 1000:.1f}' for name, elapsed in self.spans.items()
+        ]
+        entries.append(f'total;dur={self.total_time * 1000:.1f}')
+        return ', '.join(entries)
+
+
+@contextlib.contextmanager
+def span(name):
+    """Soma o tempo do trecho às medidas da requisição atual"""
+    stats = _current.get()
+    # Trechos aninhados com o mesmo nome (ex.: templates) contam uma vez
+    if stats is None or name in stats._active:
+        yield
+        return
+    stats._active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats._active.discard(name)
+        stats.spans[name] += time.perf_counter() - start
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+@receiver(connection_created, dispatch_uid='instrumentation_connection_created')
+def install_execute_wrapper(sender, connection, **kwargs):
+    # A conexão (DatabaseWrapper) é reaproveitada entre reconexões
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+@contextlib.contextmanager
+def instrument():
+    """Mede as consultas e trechos executados dentro do bloco"""
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        stats.total_time = time.perf_counter() - stats.start
+        _current.reset(token)
+
+
+class ViewMetrics:
+    """Agregado das requisições de uma view no processo atual"""
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.duplicates = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.total_time = 0.0
+        self.latencies = deque(maxlen=SAMPLE_SIZE)
+
+    def add(self, stats):
+        self.requests += 1
+        self.queries += stats.queries
+        self.max_queries = max(self.max_queries, stats.queries)
+        self.duplicates += stats.duplicates
+        self.db_time += stats.db_time
+        self.template_time += stats.template_time
+        self.total_time += stats.total_time
+        self.latencies.append(stats.total_time)
+
+    def as_dict(self):
+        latencies = sorted(self.latencies)
+        return {
+            'requests': self.requests,
+            'avg_queries': round(self.queries / self.requests, 2),
+            'max_queries': self.max_queries,
+            'duplicates': self.duplicates,
+            'avg_db_ms': round(self.db_time / self.requests * 1000, 2),
+            'avg_template_ms': round(self.template_time / self.requests * 1000, 2),
+            'avg_total_ms': round(self.total_time / self.requests * 1000, 2),
+            'p50_ms': round(statistics.median(latencies) * 1000, 2),
+            'p95_ms': round(
+                latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 2
+            ),
+        }
+
+
+_lock = threading.Lock()
+_views = {}
+
+
+def record(view_name, stats):
+    with _lock:
+        _views.setdefault(view_name, ViewMetrics()).add(stats)
+
+
+def get_view_metrics():
+    with _lock:
+        return {name: metrics.as_dict() for name, metrics in sorted(_views.items())}
+
+
+def reset():
+    with _lock:
+        _views.clear()
+
+
+class InstrumentationMiddleware:
+    """
+    Deve ser o primeiro middleware, para incluir sessão e autenticação nas
+    medidas. Síncrono ou assíncrono conforme a cadeia (WSGI/ASGI).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        self.enabled = getattr(settings, 'INSTRUMENTATION_ENABLED', True)
+        self.headers = getattr(settings, 'INSTRUMENTATION_HEADERS', settings.DEBUG)
+        self.duplicate_threshold = getattr(
+            settings, 'INSTRUMENTATION_DUPLICATE_THRESHOLD', 5
+        )
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        with instrument() as stats:
+            response = self.get_response(request)
+        return self.process_response(request, response, stats)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        with instrument() as stats:
+            response = await self.get_response(request)
+        return self.process_response(request, response, stats)
+
+    def process_response(self, request, response, stats):
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        if view_name:
+            record(view_name, stats)
+        if stats.similar >= self.duplicate_threshold:
+            logger.warning(
+                '%s: %d consultas repetidas (possível N+1) em %s',
+                view_name or request.path, stats.similar,
+                stats.repeated_sql()[:3],
+            )
+
+        response.instrumentation = stats
+        if self.headers:
+            response['X-DB-Queries'] = str(stats.queries)
+            response['X-DB-Duplicate-Queries'] = str(stats.duplicates)
+            response['Server-Timing'] = stats.server_timing()
+        return response
+
+
+class InstrumentedTemplate(django_backend.Template):
+    def render(self, context=None, request=None):
+        with span('template'):
+            return super().render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Backend de templates padrão, com o tempo de renderização medido"""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return InstrumentedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
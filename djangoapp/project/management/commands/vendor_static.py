@@ -0,0 +1,52 @@
+import re
+import urllib.request
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from project.assets import INTER_CSS, VENDOR_FILES, inter_css
+
+STATIC_DIR = Path(__file__).resolve().parents[2] / 'static'
+
+# Comentários de source map: os .map não são baixados (e o collectstatic
+# com ManifestStaticFilesStorage falharia ao procurá-los)
+SOURCE_MAP = re.compile(rb'\n?/[*/]# sourceMappingURL=\S+(?: \*/)?\s*$')
+
+
+class Command(BaseCommand):
+    help = (
+        'Baixa as bibliotecas de terceiros (Bootstrap, Bootstrap Icons e a '
+        'fonte Inter) para project/static/vendor/, para servi-las localmente.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Baixa novamente os arquivos já existentes',
+        )
+        parser.add_argument(
+            '--timeout', type=int, default=30,
+            help='Tempo limite (s) de cada download',
+        )
+
+    def handle(self, *args, **options):
+        downloaded = 0
+        for name, url in VENDOR_FILES.items():
+            path = STATIC_DIR / name
+            if path.exists() and not options['force']:
+                continue
+            try:
+                with urllib.request.urlopen(url, timeout=options['timeout']) as response:
+                    content = response.read()
+            except OSError as exc:
+                raise CommandError(f'Falha ao baixar {url}: {exc}')
+            if path.suffix in ('.css', '.js'):
+                content = SOURCE_MAP.sub(b'\n', content)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+            downloaded += 1
+            self.stdout.write(f'{name} ({len(content) / 1024:.1f} KB)')
+
+        (STATIC_DIR / INTER_CSS).parent.mkdir(parents=True, exist_ok=True)
+        (STATIC_DIR / INTER_CSS).write_text(inter_css())
+        self.stdout.write(f'{downloaded} arquivos baixados para {STATIC_DIR / "vendor"}')
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
+import sys
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR.parent / 'data' / 'web'
@@ -41,10 +44,15 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'accounts',
     'accounts.templatetags',
+    'project',
 ]
 
 MIDDLEWARE = [
+    # Primeiro: mede consultas e tempo de toda a requisição
+    'project.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Arquivos estáticos (collectstatic) servidos com cache longo e gzip/brotli
+    'project.staticfiles.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -55,14 +63,25 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'project.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates com o tempo de renderização medido
+        'BACKEND': 'project.instrumentation.DjangoTemplates',
+        'NAME': 'django',
         'DIRS': [
             BASE_DIR / 'templates',  # Templates globais
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Fora do DEBUG os templates são lidos e compilados uma vez por
+            # processo (loader em cache); com DEBUG são relidos a cada uso
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -75,6 +94,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'project.wsgi.application'
 
+# Views assíncronas (accounts.views_async) no lugar das síncronas; padrão:
+# ligado com o servidor ASGI (APP_SERVER=uvicorn)
+ASYNC_VIEWS = bool(int(os.getenv('ASYNC_VIEWS', int(os.getenv('APP_SERVER') == 'uvicorn'))))
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -87,8 +110,117 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'change-me'),
         'HOST': os.getenv('POSTGRES_HOST', 'change-me'),
         'PORT': os.getenv('POSTGRES_PORT', 'change-me'),
+        # Conexões persistentes: reaproveitadas entre requisições por até
+        # DB_CONN_MAX_AGE segundos (0 fecha ao fim de cada requisição)
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        # Testa a conexão persistente antes de reutilizá-la
+        'CONN_HEALTH_CHECKS': bool(int(os.getenv('DB_CONN_HEALTH_CHECKS', 1))),
+    }
+}
+
+# Pool de conexões no processo (project.db.pool), apenas para PostgreSQL.
+# A conexão volta ao pool ao fim de cada requisição, por isso
+# CONN_MAX_AGE passa a 0 por padrão.
+if (
+    bool(int(os.getenv('DB_POOL', 0)))
+    and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'
+):
+    DATABASES['default'].update({
+        'ENGINE': 'project.db.pool',
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0)),
+        'POOL': {
+            'MIN_SIZE': int(os.getenv('DB_POOL_MIN_SIZE', 4)),
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 20)),
+        },
+    })
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# CACHE_BACKEND: locmem (por processo, desenvolvimento), file (diretório
+# compartilhado pelos workers e pelos containers que o montam: no
+# docker-compose, djangoapp e maintenance montam ./data/web/cache; não vale
+# entre hosts) ou redis (compartilhado entre containers e hosts;
+# CACHE_LOCATION=redis://host:6379/0). Os testes usam sempre locmem.
+
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'default'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(DATA_DIR / 'cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://localhost:6379/0'),
+}
+CACHE_BACKEND = 'locmem' if TESTING else os.getenv(
+    'CACHE_BACKEND', 'locmem' if DEBUG else 'file'
+)
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(
+        f'CACHE_BACKEND inválido: {CACHE_BACKEND} '
+        f'(use {", ".join(CACHE_BACKENDS)})'
+    )
+CACHE_LOCATION = CACHE_BACKENDS[CACHE_BACKEND][1]
+if not TESTING:
+    CACHE_LOCATION = os.getenv('CACHE_LOCATION', CACHE_LOCATION)
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': CACHE_LOCATION,
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'ddp'),
     }
 }
+# locmem e file: o limite padrão do Django (300 entradas) é dividido entre
+# sessões, usuários, menus, fragmentos do layout, contadores e o limite de
+# tentativas de login; ao atingir o limite, 1/CACHE_CULL_FREQUENCY das
+# entradas é descartada ao acaso. O file ainda lista o diretório a cada
+# gravação: com muitos usuários, prefira redis (sem descarte antes do
+# maxmemory), necessário para contadores e bloqueios de login confiáveis
+# entre workers (accounts.throttling).
+if CACHE_BACKEND != 'redis':
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 50000)),
+        'CULL_FREQUENCY': int(os.getenv('CACHE_CULL_FREQUENCY', 10)),
+    }
+
+# Sessões lidas do cache e gravadas também no banco: requisições autenticadas
+# não consultam django_session. Sessões expiradas são removidas por
+# manage.py cleanup_sessions (scripts/maintenance.sh).
+# Com locmem o cache não é compartilhado: use apenas com um processo.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CLEANUP_BATCH_SIZE = int(os.getenv('SESSION_CLEANUP_BATCH_SIZE', 5000))
+
+
+# Hash de senhas (accounts.hashers)
+# https://docs.djangoproject.com/en/4.2/topics/auth/passwords/
+# PASSWORD_HASHER: pbkdf2 (padrão do Django), scrypt ou argon2 (requer
+# argon2-cffi), ambos memory-hard e mais rápidos com a mesma resistência.
+# Os demais continuam aceitos: senhas antigas passam para o hasher
+# preferido (e o custo configurado) no próximo login.
+# PASSWORD_HASHING_WORKERS > 0 executa o hash em um pool de processos
+# limitado, fora das threads do servidor.
+
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'accounts.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'accounts.hashers.ScryptPasswordHasher',
+    'argon2': 'accounts.hashers.Argon2PasswordHasher',
+}
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'pbkdf2')
+if PASSWORD_HASHER not in PASSWORD_HASHER_CHOICES:
+    raise ImproperlyConfigured(
+        f'PASSWORD_HASHER inválido: {PASSWORD_HASHER!r} '
+        f'(use {", ".join(PASSWORD_HASHER_CHOICES)})'
+    )
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_CHOICES[PASSWORD_HASHER],
+    *(path for name, path in PASSWORD_HASHER_CHOICES.items() if name != PASSWORD_HASHER),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', 0))
+# Custo dos hashers (vazio: padrão do Django)
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', 0)) or None
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.getenv('PASSWORD_SCRYPT_WORK_FACTOR', 0)) or None
 
 
 # Password validation
@@ -129,15 +261,131 @@ STATIC_URL = '/static/'
 # /data/web/static
 STATIC_ROOT = DATA_DIR / 'static'
 
+# Fora do DEBUG: nomes com hash do conteúdo e versões .gz/.br geradas no
+# collectstatic (project.storage), servidas por project.staticfiles com
+# cache de um ano. Bibliotecas de terceiros: manage.py vendor_static.
+STATIC_MANIFEST = bool(int(os.getenv('STATIC_MANIFEST', int(not DEBUG and not TESTING))))
+STATIC_SERVE = bool(int(os.getenv('STATIC_SERVE', int(not DEBUG))))
+# Cache (s) dos arquivos sem hash no nome
+STATIC_MAX_AGE = int(os.getenv('STATIC_MAX_AGE', 60))
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'project.storage.CompressedManifestStaticFilesStorage' if STATIC_MANIFEST
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
 MEDIA_URL = '/media/'
 # /data/web/media
 MEDIA_ROOT = DATA_DIR / 'media'
 
 # Authentication
+# Carrega o usuário da sessão junto com o perfil (uma consulta por página).
+# O ModelBackend continua listado para as sessões criadas antes da troca: o
+# Django guarda o caminho do backend na sessão e descarta sessões de
+# backends fora desta lista (todos os usuários seriam deslogados no deploy).
+# Ele não autentica senhas (ver ProfileModelBackend.authenticate).
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.ProfileModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+# Tempo (s) de cache do usuário + perfil da sessão; 0 desativa
+USER_CACHE_TIMEOUT = int(os.getenv('USER_CACHE_TIMEOUT', 60))
+
 LOGIN_URL = 'accounts:login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'accounts:login'
 
+# Histórico de login: gravação em lote fora do caminho da requisição.
+# LOGIN_AUDIT_ASYNC=0 grava de forma síncrona (padrão nos testes: a thread
+# de gravação sobreviveria ao banco de testes).
+LOGIN_AUDIT_ASYNC = bool(int(os.getenv('LOGIN_AUDIT_ASYNC', int(not TESTING))))
+LOGIN_AUDIT_BATCH_SIZE = int(os.getenv('LOGIN_AUDIT_BATCH_SIZE', 100))
+LOGIN_AUDIT_FLUSH_INTERVAL = float(os.getenv('LOGIN_AUDIT_FLUSH_INTERVAL', 2))
+
+# Limite de tentativas de login (accounts.throttling): tentativas inválidas
+# por IP e por usuário em uma janela deslizante (s); acima do limite, login
+# bloqueado por LOGIN_THROTTLE_LOCKOUT segundos. Os contadores ficam no cache
+# (incr atômico só no redis); os bloqueios também ficam no banco (LoginLockout)
+LOGIN_THROTTLE_ENABLED = bool(int(os.getenv('LOGIN_THROTTLE_ENABLED', 1)))
+LOGIN_THROTTLE_WINDOW = int(os.getenv('LOGIN_THROTTLE_WINDOW', 300))
+LOGIN_THROTTLE_IP_LIMIT = int(os.getenv('LOGIN_THROTTLE_IP_LIMIT', 30))
+# Limite por usuário a partir de um mesmo IP: quem ataca de outros IPs não
+# bloqueia o dono da conta
+LOGIN_THROTTLE_USERNAME_LIMIT = int(os.getenv('LOGIN_THROTTLE_USERNAME_LIMIT', 5))
+# Limite por usuário somando todos os IPs (0 desliga). Barra ataques
+# distribuídos a uma conta, mas permite bloquear o dono da conta de qualquer
+# lugar (negação de serviço) só com o nome de usuário
+LOGIN_THROTTLE_ACCOUNT_LIMIT = int(os.getenv('LOGIN_THROTTLE_ACCOUNT_LIMIT', 0))
+LOGIN_THROTTLE_LOCKOUT = int(os.getenv('LOGIN_THROTTLE_LOCKOUT', 900))
+
+# Proxies reversos na frente da aplicação: o IP do cliente (histórico e
+# limite de login) é lido do X-Forwarded-For apenas quando maior que 0
+TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', 0))
+
+# Retenção do histórico de login (manage.py prune_login_history)
+LOGIN_HISTORY_RETENTION_MONTHS = int(os.getenv('LOGIN_HISTORY_RETENTION_MONTHS', 12))
+LOGIN_HISTORY_ARCHIVE_DIR = os.getenv(
+    'LOGIN_HISTORY_ARCHIVE_DIR', str(DATA_DIR / 'archive' / 'login_history')
+)
+
+# Avatares: miniaturas geradas em segundo plano (accounts.avatars)
+AVATAR_PROCESSING_ASYNC = bool(int(os.getenv('AVATAR_PROCESSING_ASYNC', 1)))
+AVATAR_WORKERS = int(os.getenv('AVATAR_WORKERS', 2))
+AVATAR_FORMAT = os.getenv('AVATAR_FORMAT', 'WEBP')
+
+# Instrumentação (project.instrumentation): consultas e tempos por view,
+# agregados em /metrics/ (staff); cabeçalhos de depuração nas respostas
+INSTRUMENTATION_ENABLED = bool(int(os.getenv('INSTRUMENTATION_ENABLED', 1)))
+INSTRUMENTATION_HEADERS = bool(int(os.getenv('INSTRUMENTATION_HEADERS', int(DEBUG))))
+# Consultas repetidas (mesmo SQL) a partir das quais um aviso é registrado
+INSTRUMENTATION_DUPLICATE_THRESHOLD = int(
+    os.getenv('INSTRUMENTATION_DUPLICATE_THRESHOLD', 5)
+)
+
+# Dashboard: tempo (s) de cache das estatísticas (accounts.dashboard)
+DASHBOARD_STATS_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_STATS_CACHE_TIMEOUT', 60))
+
+# Atividade de login por usuário (perfil, detalhes do usuário e admin):
+# tempo (s) de cache dos gráficos (accounts.activity)
+LOGIN_ACTIVITY_CACHE_TIMEOUT = int(os.getenv('LOGIN_ACTIVITY_CACHE_TIMEOUT', 300))
+
+# Importação de usuários (accounts.imports): linhas por lote e processos
+# usados para converter as senhas em hash
+USER_IMPORT_BATCH_SIZE = int(os.getenv('USER_IMPORT_BATCH_SIZE', 1000))
+USER_IMPORT_WORKERS = int(os.getenv('USER_IMPORT_WORKERS', os.cpu_count() or 1))
+# A tela de importação converte as senhas em hash dentro da requisição, em
+# um só processo (cada hash leva ~0,3 s): acima deste número de senhas em
+# texto o arquivo é recusado e deve ir pelo manage.py import_users
+USER_IMPORT_WEB_MAX_PASSWORDS = int(os.getenv('USER_IMPORT_WEB_MAX_PASSWORDS', 50))
+
+# Notificações (accounts.notifications)
+NOTIFICATION_CACHE_TIMEOUT = int(os.getenv('NOTIFICATION_CACHE_TIMEOUT', 300))
+# Servidor ASGI: intervalo (s) de leitura do cache e duração (s) de cada
+# conexão SSE antes da reconexão do navegador
+NOTIFICATION_STREAM_INTERVAL = float(os.getenv('NOTIFICATION_STREAM_INTERVAL', 2))
+NOTIFICATION_STREAM_DURATION = int(os.getenv('NOTIFICATION_STREAM_DURATION', 300))
+# Servidor WSGI: intervalo (s) de reconexão do navegador
+NOTIFICATION_POLL_INTERVAL = int(os.getenv('NOTIFICATION_POLL_INTERVAL', 30))
+
+# Menu lateral: tempo (s) de cache das permissões do menu por usuário
+MENU_CACHE_TIMEOUT = int(os.getenv('MENU_CACHE_TIMEOUT', 300))
+
+# Layout (accounts.layout): tempo (s) de cache do HTML do cabeçalho e do menu
+# lateral por usuário; 0 desativa
+LAYOUT_CACHE_TIMEOUT = int(os.getenv('LAYOUT_CACHE_TIMEOUT', 300))
+
+# Busca global do cabeçalho
+GLOBAL_SEARCH_LIMIT = int(os.getenv('GLOBAL_SEARCH_LIMIT', 5))
+GLOBAL_SEARCH_MIN_LENGTH = 2
+GLOBAL_SEARCH_CACHE_TIMEOUT = int(os.getenv('GLOBAL_SEARCH_CACHE_TIMEOUT', 60))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
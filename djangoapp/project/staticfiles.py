@@ -0,0 +1,125 @@
+"""
+Serve os arquivos do STATIC_ROOT (collectstatic) pelo próprio servidor da
+aplicação, sem proxy na frente.
+
+- Arquivos com hash no nome (manifesto do ManifestStaticFilesStorage) nunca
+  mudam: Cache-Control de um ano com immutable, e o navegador não volta a
+  pedi-los. Os demais: STATIC_MAX_AGE segundos e Last-Modified.
+- As versões .br/.gz geradas no collectstatic (project.storage) são
+  enviadas conforme o Accept-Encoding, com Vary: Accept-Encoding.
+- O arquivo é enviado com FileResponse (wsgi.file_wrapper/sendfile no
+  gunicorn).
+
+Ativado com STATIC_SERVE (padrão: DEBUG desligado; com DEBUG o runserver
+já serve os arquivos).
+"""
+import mimetypes
+import os
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Codificações pré-comprimidas, em ordem de preferência
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_ACCEPT_TOKEN = re.compile(r'\s*([a-z*]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?', re.IGNORECASE)
+
+
+def accepted_encodings(header):
+    accepted = set()
+    for part in header.split(','):
+        match = _ACCEPT_TOKEN.match(part)
+        if match and float(match.group(2) or 1) > 0:
+            accepted.add(match.group(1).lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        self.enabled = getattr(settings, 'STATIC_SERVE', not settings.DEBUG)
+        self.prefix = settings.STATIC_URL
+        if not self.prefix.startswith('/'):
+            self.prefix = '/' + self.prefix
+        self.root = str(settings.STATIC_ROOT)
+        self.max_age = getattr(settings, 'STATIC_MAX_AGE', 60)
+        self._immutable = None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.handle(request)
+        if response is not None:
+            return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        # stat e open de arquivos locais: rápidos o bastante para o event loop
+        response = self.handle(request)
+        if response is not None:
+            return response
+        return await self.get_response(request)
+
+    def handle(self, request):
+        if (
+            self.enabled
+            and request.method in ('GET', 'HEAD')
+            and request.path_info.startswith(self.prefix)
+        ):
+            return self.serve(request, request.path_info[len(self.prefix):])
+        return None
+
+    def immutable_names(self):
+        """Nomes com hash do manifesto (lido uma vez por processo)"""
+        if self._immutable is None:
+            hashed_files = getattr(staticfiles_storage, 'hashed_files', None) or {}
+            self._immutable = set(hashed_files.values())
+        return self._immutable
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+            stat = os.stat(path)
+        except (ValueError, OSError):
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+            response = HttpResponseNotModified()
+        else:
+            content_type, _ = mimetypes.guess_type(name)
+            accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+            encoding = None
+            for candidate, suffix in ENCODINGS:
+                if candidate in accepted and os.path.isfile(path + suffix):
+                    encoding, path = candidate, path + suffix
+                    break
+            response = FileResponse(
+                open(path, 'rb'), content_type=content_type or 'application/octet-stream',
+            )
+            # O FileResponse inclui o nome do arquivo enviado (ex.: .css.gz)
+            response.headers.pop('Content-Disposition', None)
+            if encoding:
+                response['Content-Encoding'] = encoding
+
+        response['Vary'] = 'Accept-Encoding'
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if name in self.immutable_names():
+            response['Cache-Control'] = IMMUTABLE
+        else:
+            response['Cache-Control'] = f'public, max-age={self.max_age}'
+        return response
@@ -0,0 +1,52 @@
+"""
+Storage dos arquivos estáticos para produção.
+
+CompressedManifestStaticFilesStorage é o ManifestStaticFilesStorage do
+Django (nomes com o hash do conteúdo, ex.: base.3f2a9c1e7b4d.css, e
+referências url() reescritas) que, no collectstatic, grava também as
+versões pré-comprimidas de cada arquivo de texto: .gz e, com o pacote
+brotli instalado, .br. project.staticfiles serve essas versões conforme o
+Accept-Encoding, sem comprimir nada durante a requisição.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.xml', '.html', '.map', '.ico')
+
+# Versões comprimidas que não economizam ao menos 5% são descartadas
+MIN_RATIO = 0.95
+
+
+def compress(path):
+    """Grava path.gz (e path.br) ao lado do arquivo; retorna os criados"""
+    with open(path, 'rb') as file:
+        data = file.read()
+    variants = [('.gz', lambda: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', lambda: brotli.compress(data, quality=11)))
+    created = []
+    for suffix, encode in variants:
+        compressed = encode()
+        if len(compressed) < len(data) * MIN_RATIO:
+            with open(path + suffix, 'wb') as file:
+                file.write(compressed)
+            created.append(path + suffix)
+    return created
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        # Originais e versões com hash (o {% static %} usa as com hash)
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                compress(self.path(name))
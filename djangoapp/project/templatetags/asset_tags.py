@@ -0,0 +1,11 @@
+from django import template
+
+from ..assets import vendor_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendor_asset(name):
+    # Cópia local em static/vendor/ (ver project.assets)
+    return vendor_url(name)
@@ -0,0 +1,36 @@
+"""
+Apoio aos testes: orçamentos de consultas por view.
+
+As medidas vêm do InstrumentationMiddleware (response.instrumentation).
+Um aumento no número de consultas de uma view (ex.: N+1 ao listar) faz o
+teste falhar com a lista de SQL executado.
+"""
+
+
+class QueryBudgetMixin:
+    """
+    Mixin para TestCase. Declare os orçamentos por nome de view:
+
+        query_budgets = {'accounts:user_list': 4}
+
+        response = self.client.get(reverse('accounts:user_list'))
+        self.assertWithinQueryBudget(response)
+    """
+    query_budgets = {}
+
+    def assertWithinQueryBudget(self, response, queries=None, duplicates=0):
+        stats = response.instrumentation
+        view_name = response.resolver_match.view_name
+        if queries is None:
+            queries = self.query_budgets[view_name]
+        executed = '\n'.join(
+            f'{count}x {sql}' for (sql, _), count in stats.statements.items()
+        )
+        self.assertLessEqual(
+            stats.queries, queries,
+            f'{view_name}: {stats.queries} consultas (orçamento {queries})\n{executed}',
+        )
+        self.assertLessEqual(
+            stats.duplicates, duplicates,
+            f'{view_name}: {stats.duplicates} consultas duplicadas\n{executed}',
+        )
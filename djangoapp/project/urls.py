@@ -2,12 +2,14 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from . import views
+from . import views, views_async
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
-    path('', views.dashboard, name='dashboard'),
+    path('', (views_async if settings.ASYNC_VIEWS else views).dashboard, name='dashboard'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('metrics/db/', views.db_metrics, name='db_metrics'),
     # Rota temporária para capturar todas as URLs /temp/
     path('temp/', include('accounts.urls')),
     # ... outras URLs
@@ -1,5 +1,11 @@
 from django.shortcuts import render
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import JsonResponse
+
+from accounts.dashboard import get_dashboard_stats
+
+from .db.metrics import get_metrics
+from .instrumentation import get_view_metrics
 
 @login_required
 def dashboard(request):
@@ -8,5 +14,25 @@ def dashboard(request):
     """
     context = {
         'title': 'Dashboard',
+        # Estatísticas consolidadas, lidas do cache
+        'stats': get_dashboard_stats(request.user),
     }
     return render(request, 'dashboard.html', context)
+
+
+@login_required
+@user_passes_test(lambda user: user.is_staff or user.is_superuser)
+def db_metrics(request):
+    """
+    Métricas de reutilização de conexões do processo que atendeu a requisição
+    """
+    return JsonResponse(get_metrics())
+
+
+@login_required
+@user_passes_test(lambda user: user.is_staff or user.is_superuser)
+def metrics(request):
+    """
+    Consultas e tempos por view, e conexões com o banco, do processo atual
+    """
+    return JsonResponse({'db': get_metrics(), 'views': get_view_metrics()})
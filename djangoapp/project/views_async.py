@@ -0,0 +1,14 @@
+from accounts.dashboard import aget_dashboard_stats
+from accounts.views_async import arender, async_login_required
+
+
+@async_login_required
+async def dashboard(request):
+    """
+    View principal do dashboard (servidor ASGI)
+    """
+    context = {
+        'title': 'Dashboard',
+        'stats': await aget_dashboard_stats(request.user),
+    }
+    return await arender(request, 'dashboard.html', context)
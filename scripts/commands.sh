@@ -10,7 +10,36 @@ done
 
 echo "✅ Postgres Database Started Successfully ($POSTGRES_HOST:$POSTGRES_PORT)"
 
-#python manage.py collectstatic --noinput
-python manage.py makemigrations --noinput
-python manage.py migrate --noinput
-python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
+# Migrações na inicialização apenas quando RUN_MIGRATIONS=1. Em produção,
+# rode migrate.sh como etapa única antes de subir os containers da aplicação.
+if [ "${RUN_MIGRATIONS:-$DEBUG}" = "1" ]; then
+  migrate.sh
+fi
+
+# Fora do DEBUG os arquivos estáticos são servidos do STATIC_ROOT, com nomes
+# com hash e versões .gz/.br (project.storage), gerados pelo collectstatic.
+# Sem as bibliotecas de project/static/vendor/ (manage.py vendor_static) o
+# check project.E001 interrompe a inicialização.
+if [ "$DEBUG" != "1" ]; then
+  python manage.py check --deploy --fail-level ERROR
+  python manage.py collectstatic --noinput --verbosity 0
+fi
+
+# APP_SERVER: runserver (desenvolvimento), gunicorn (produção, WSGI) ou
+# uvicorn (produção, ASGI: notificações em tempo real por SSE).
+# Padrão: runserver com DEBUG=1, gunicorn caso contrário.
+if [ "$DEBUG" = "1" ]; then
+  APP_SERVER="${APP_SERVER:-runserver}"
+else
+  APP_SERVER="${APP_SERVER:-gunicorn}"
+fi
+
+if [ "$APP_SERVER" = "gunicorn" ]; then
+  # Configuração em djangoapp/gunicorn.conf.py
+  exec gunicorn project.wsgi:application
+elif [ "$APP_SERVER" = "uvicorn" ]; then
+  # gunicorn gerenciando workers uvicorn (worker_class em gunicorn.conf.py)
+  exec gunicorn project.asgi:application
+else
+  exec python manage.py runserver 0.0.0.0:8000
+fi
@@ -0,0 +1,17 @@
+#!/bin/sh
+
+# Tarefas periódicas de manutenção (serviço "maintenance" do
+# docker-compose). MAINTENANCE_INTERVAL: segundos entre as execuções.
+# Uma tarefa com erro não interrompe as demais nem o agendamento.
+
+while ! nc -z $POSTGRES_HOST $POSTGRES_PORT; do
+  echo "🟡 Waiting for Postgres Database Startup ($POSTGRES_HOST $POSTGRES_PORT) ..."
+  sleep 2
+done
+
+while true; do
+  python manage.py cleanup_sessions || echo "🔴 cleanup_sessions falhou"
+  python manage.py prune_login_history || echo "🔴 prune_login_history falhou"
+  python manage.py rebuild_dashboard_stats --days 2 || echo "🔴 rebuild_dashboard_stats falhou"
+  sleep "${MAINTENANCE_INTERVAL:-86400}"
+done
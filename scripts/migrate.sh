@@ -0,0 +1,9 @@
+#!/bin/sh
+
+# Etapa única de migração (ex.: docker compose run --rm djangoapp migrate.sh)
+set -e
+
+if [ "$DEBUG" = "1" ]; then
+  python manage.py makemigrations --noinput
+fi
+python manage.py migrate --noinput